@@ -0,0 +1 @@
+"""Load-test harness: ``python -m benchmarks.run --help``."""
@@ -0,0 +1,54 @@
+"""Seeded synthetic corpora: versioned manuals sharing boilerplate, like the real uploads."""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+
+_TOPICS = [
+    "authentication", "billing", "deployment", "backups", "retention", "monitoring", "onboarding",
+    "incident", "networking", "storage", "encryption", "permissions", "quotas", "exports", "search",
+]
+_WORDS = [
+    "configure", "service", "request", "limit", "policy", "token", "cluster", "replica", "timeout",
+    "endpoint", "schedule", "archive", "rotation", "threshold", "account", "region", "latency", "index",
+    "upload", "report", "audit", "version", "release", "window", "owner", "escalation", "credential",
+]
+_BOILERPLATE = (
+    "This document is internal. Do not distribute outside the company. "
+    "Questions about this policy go to the platform team."
+)
+
+
+@dataclass(frozen=True)
+class SyntheticDocument:
+    file_name: str
+    text: str
+    topic: str
+
+
+def _sentence(rng: random.Random, topic: str) -> str:
+    words = rng.sample(_WORDS, k=rng.randint(6, 12))
+    words.insert(rng.randrange(len(words)), topic)
+    return " ".join(words).capitalize() + f" (ref {rng.randint(1000, 9999)})."
+
+
+def generate_corpus(documents: int, paragraphs: int, seed: int = 0) -> list[SyntheticDocument]:
+    rng = random.Random(seed)
+    corpus: list[SyntheticDocument] = []
+    for index in range(documents):
+        topic = rng.choice(_TOPICS)
+        body = [
+            " ".join(_sentence(rng, topic) for _ in range(rng.randint(3, 7))) for _ in range(paragraphs)
+        ]
+        text = f"# {topic.title()} guide v{index}\n\n" + "\n\n".join([*body, _BOILERPLATE])
+        corpus.append(SyntheticDocument(file_name=f"{topic}-{index:05d}.md", text=text, topic=topic))
+    return corpus
+
+
+def generate_questions(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed + 1)
+    return [
+        f"How do I {rng.choice(_WORDS)} the {rng.choice(_TOPICS)} {rng.choice(_WORDS)}? #{index}"
+        for index in range(count)
+    ]
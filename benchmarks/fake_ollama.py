@@ -0,0 +1,57 @@
+"""Stand-in for Ollama's ``/api/generate`` with a controllable latency profile."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Body, FastAPI
+from fastapi.responses import StreamingResponse
+
+
+@dataclass(frozen=True)
+class FakeOllamaConfig:
+    prompt_latency_seconds: float = 0.05
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 40
+
+
+def _final_message(config: FakeOllamaConfig, prompt: str, text: str) -> dict[str, Any]:
+    return {
+        "response": text,
+        "done": True,
+        "prompt_eval_count": max(1, len(prompt) // 4),
+        "prompt_eval_duration": int(config.prompt_latency_seconds * 1e9),
+        "eval_count": config.answer_tokens,
+        "eval_duration": int(config.answer_tokens / config.tokens_per_second * 1e9),
+    }
+
+
+def create_app(config: FakeOllamaConfig) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+    async def _tokens(prompt: str) -> AsyncIterator[bytes]:
+        await asyncio.sleep(config.prompt_latency_seconds)
+        for index in range(config.answer_tokens):
+            await asyncio.sleep(token_delay)
+            yield (json.dumps({"response": f"tok{index} ", "done": False}) + "\n").encode()
+        yield (json.dumps(_final_message(config, prompt, "")) + "\n").encode()
+
+    @app.post("/api/generate")
+    async def generate(payload: dict[str, Any] = Body(...)) -> Any:
+        prompt = str(payload.get("prompt") or "")
+        if not prompt:
+            # Preload request: Ollama just loads the model.
+            return {"done": True}
+        if payload.get("stream", True):
+            return StreamingResponse(_tokens(prompt), media_type="application/x-ndjson")
+
+        await asyncio.sleep(config.prompt_latency_seconds + config.answer_tokens * token_delay)
+        text = " ".join(f"tok{index}" for index in range(config.answer_tokens))
+        return _final_message(config, prompt, text)
+
+    return app
@@ -0,0 +1,326 @@
+"""End-to-end throughput and latency benchmark for the RAG Lab API.
+
+Runs the real app under uvicorn against a fake Ollama server and, optionally, the
+deterministic ``hash`` embedder, on a seeded synthetic corpus in a throwaway data
+directory. Results are written as JSON so runs can be compared across commits::
+
+    python -m benchmarks.run --documents 200 --chat-requests 300 --concurrency 16 \\
+        --fake-embeddings --output bench-results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+
+from benchmarks.corpus import SyntheticDocument, generate_corpus, generate_questions
+from benchmarks.fake_ollama import FakeOllamaConfig, create_app
+
+_COLD_START_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from rag_lab.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    while client.get("/health/ready").status_code != 200:
+        time.sleep(0.01)
+ready = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "ready_seconds": ready - started}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+class _ServerThread:
+    """Run an ASGI app under uvicorn on a background thread."""
+
+    def __init__(self, app: Any, port: int) -> None:
+        self.url = f"http://127.0.0.1:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> _ServerThread:
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+class _ApiProcess:
+    """Run the RAG Lab API under uvicorn in a child process so its peak RSS can be read on exit."""
+
+    def __init__(self, port: int) -> None:
+        self.url = f"http://127.0.0.1:{port}"
+        self.peak_rss_mb: float | None = None
+        self._command = [sys.executable, "-m", "uvicorn", "rag_lab.main:app", "--host", "127.0.0.1"]
+        self._command += ["--port", str(port), "--log-level", "warning"]
+        self._process: subprocess.Popen[bytes] | None = None
+
+    def __enter__(self) -> _ApiProcess:
+        self._process = subprocess.Popen(self._command, env=os.environ.copy())
+        while True:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"API process exited with status {self._process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health/ready").status_code == 200:
+                    return self
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+
+    def __exit__(self, *exc_info: object) -> None:
+        assert self._process is not None
+        self._process.terminate()
+        # wait4 reports this child's own rusage, unlike RUSAGE_CHILDREN which also covers the cold-start run.
+        _, status, usage = os.wait4(self._process.pid, 0)
+        self._process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is KiB on Linux and bytes on macOS.
+        self.peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+
+
+def _parse_server_timing(header: str) -> dict[str, float]:
+    stages: dict[str, float] = {}
+    for item in filter(None, (part.strip() for part in header.split(","))):
+        name, _, duration = item.partition(";dur=")
+        if duration:
+            stages[name] = float(duration)
+    return stages
+
+
+def _configure_environment(args: argparse.Namespace, workdir: Path, ollama_url: str) -> None:
+    # Inherited by the API and cold-start processes, which read settings once at import time.
+    os.environ.update(
+        {
+            "RAG_LAB_DATA_DIR": str(workdir),
+            "RAG_LAB_UPLOADS_DIR": str(workdir / "uploads"),
+            "RAG_LAB_VECTOR_STORE_DIR": str(workdir / "vector_store"),
+            "RAG_LAB_VECTOR_BACKEND": args.vector_backend,
+            "RAG_LAB_OLLAMA_URL": f"{ollama_url}/api/generate",
+            "RAG_LAB_OLLAMA_MAX_CONCURRENT_GENERATIONS": str(args.concurrency),
+            "RAG_LAB_OLLAMA_MAX_QUEUED_GENERATIONS": str(args.concurrency * 4),
+            "RAG_LAB_ANSWER_CACHE_SIZE": "0",
+        }
+    )
+    if args.fake_embeddings:
+        os.environ["RAG_LAB_EMBEDDING_BACKEND"] = "hash"
+    # Hash-embedding cosines are low; without an override most questions would
+    # short-circuit to the no-context answer and never reach the generator.
+    threshold = args.score_threshold if args.score_threshold is not None else (0.0 if args.fake_embeddings else None)
+    if threshold is not None:
+        os.environ["RAG_LAB_RETRIEVAL_SCORE_THRESHOLD"] = str(threshold)
+
+
+def _measure_cold_start() -> dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-c", _COLD_START_SCRIPT], capture_output=True, text=True, check=True, env=os.environ.copy()
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+async def _bench_ingestion(base_url: str, args: argparse.Namespace) -> dict[str, Any]:
+    corpus = generate_corpus(args.documents, args.paragraphs, seed=args.seed)
+    semaphore = asyncio.Semaphore(args.ingest_concurrency)
+    chunks = errors = 0
+
+    async def _upload(client: httpx.AsyncClient, documents: list[SyntheticDocument]) -> None:
+        nonlocal chunks, errors
+        files = [("files", (doc.file_name, doc.text.encode(), "text/markdown")) for doc in documents]
+        async with semaphore:
+            response = await client.post("/api/v1/ingestion/upload", files=files)
+        if response.status_code != 200:
+            errors += len(documents)
+            return
+        results = response.json()["files"]
+        errors += sum(item["status"] == "failed" for item in results)
+        chunks += sum(item["chunks_count"] for item in results)
+
+    per_request = max(1, args.files_per_upload)
+    groups = [corpus[start : start + per_request] for start in range(0, len(corpus), per_request)]
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        await asyncio.gather(*(_upload(client, group) for group in groups))
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": len(corpus),
+        "bytes": sum(len(doc.text.encode()) for doc in corpus),
+        "chunks": chunks,
+        "errors": errors,
+        "seconds": elapsed,
+        "docs_per_second": len(corpus) / elapsed if elapsed else 0.0,
+        "chunks_per_second": chunks / elapsed if elapsed else 0.0,
+    }
+
+
+async def _bench_chat(base_url: str, args: argparse.Namespace, *, stream: bool) -> dict[str, Any]:
+    questions = generate_questions(args.chat_requests, seed=args.seed + (1 if stream else 0))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    first_token: list[float] = []
+    stage_totals: dict[str, list[float]] = {}
+    statuses: dict[str, int] = {}
+    path = "/api/v1/ollama/chat/chat/stream" if stream else "/api/v1/ollama/chat/chat"
+
+    async def _ask(client: httpx.AsyncClient, question: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            seen_token = False
+            async with client.stream("POST", path, json={"message": question}) as response:
+                async for line in response.aiter_lines():
+                    if stream and not seen_token and line.startswith("event: token"):
+                        first_token.append(time.perf_counter() - started)
+                        seen_token = True
+            latencies.append(time.perf_counter() - started)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        for name, duration in _parse_server_timing(response.headers.get("Server-Timing", "")).items():
+            stage_totals.setdefault(name, []).append(duration)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        await asyncio.gather(*(_ask(client, question) for question in questions))
+    elapsed = time.perf_counter() - started
+
+    result: dict[str, Any] = {
+        "requests": len(questions),
+        "concurrency": args.concurrency,
+        "statuses": statuses,
+        "seconds": elapsed,
+        "requests_per_second": len(questions) / elapsed if elapsed else 0.0,
+        "latency": _latency_summary(latencies),
+        "server_timing_mean_ms": {
+            name: sum(values) / len(values) for name, values in sorted(stage_totals.items())
+        },
+    }
+    if stream:
+        result["time_to_first_token"] = _latency_summary(first_token)
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        output = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    fake_config = FakeOllamaConfig(
+        prompt_latency_seconds=args.ollama_latency,
+        tokens_per_second=args.ollama_tokens_per_second,
+        answer_tokens=args.ollama_answer_tokens,
+    )
+    with tempfile.TemporaryDirectory(prefix="rag-lab-bench-") as tmp, _ServerThread(
+        create_app(fake_config), _free_port()
+    ) as ollama:
+        _configure_environment(args, Path(args.workdir or tmp), ollama.url)
+        cold_start = _measure_cold_start() if args.cold_start else None
+
+        with _ApiProcess(_free_port()) as api:
+            ingestion = asyncio.run(_bench_ingestion(api.url, args))
+            chat = asyncio.run(_bench_chat(api.url, args, stream=False))
+            chat_stream = asyncio.run(_bench_chat(api.url, args, stream=True)) if args.stream else None
+
+    return {
+        "benchmark": "rag-lab",
+        "created_at": datetime.now(UTC).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": {
+            "cold_start": cold_start,
+            "ingestion": ingestion,
+            "chat": chat,
+            "chat_stream": chat_stream,
+            "peak_rss_mb": api.peak_rss_mb,
+        },
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs per synthetic document")
+    parser.add_argument("--ingest-concurrency", type=int, default=4)
+    parser.add_argument("--files-per-upload", type=int, default=1, help="Files sent in each upload request")
+    parser.add_argument("--chat-requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vector-backend", choices=["chroma", "numpy"], default="numpy")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Use the deterministic hash embedder")
+    parser.add_argument(
+        "--score-threshold", type=float, help="Retrieval score threshold (default: 0 with --fake-embeddings)"
+    )
+    parser.add_argument("--ollama-latency", type=float, default=0.05, help="Fake prompt-eval latency (s)")
+    parser.add_argument("--ollama-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--ollama-answer-tokens", type=int, default=40)
+    parser.add_argument("--stream", action="store_true", help="Also benchmark the SSE endpoint (time to first token)")
+    parser.add_argument("--no-cold-start", dest="cold_start", action="store_false")
+    parser.add_argument("--workdir", help="Data directory to use instead of a temporary one")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run(args)
+    payload = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+        chat = results["results"]["chat"]
+        print(
+            f"ingestion {results['results']['ingestion']['docs_per_second']:.1f} docs/s, "
+            f"chat p50 {chat['latency']['p50_ms']:.0f} ms p95 {chat['latency']['p95_ms']:.0f} ms "
+            f"p99 {chat['latency']['p99_ms']:.0f} ms -> {args.output}"
+        )
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
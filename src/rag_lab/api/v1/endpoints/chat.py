@@ -1,16 +1,95 @@
-from fastapi import APIRouter, HTTPException
+import json
+from collections.abc import AsyncIterator
+from typing import Any
 
-from rag_lab.schemas.rag_chat import RAGChatRequest, RAGChatResponse
-from rag_lab.services.rag_service import RAGServiceError, answer_with_rag
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from rag_lab.schemas.rag_chat import ChatCapacityResponse, RAGChatRequest, RAGChatResponse
+from rag_lab.services.chat_service import get_generation_admission
+from rag_lab.services.rag_service import (
+    RAGServiceError,
+    RAGStream,
+    answer_with_rag,
+    stream_answer_with_rag,
+)
+from rag_lab.services.retrieval_filter import RetrievalFilter
 
 router = APIRouter(prefix="/ollama/chat", tags=["chat"])
 
 
+def _http_error(exc: RAGServiceError) -> HTTPException:
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after is not None else None
+    return HTTPException(status_code=exc.status_code, detail=exc.detail, headers=headers)
+
+
+def _filters(req: RAGChatRequest) -> RetrievalFilter | None:
+    return RetrievalFilter.create(**req.filters.model_dump()) if req.filters is not None else None
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_events(stream: RAGStream, request: Request) -> AsyncIterator[str]:
+    yield _sse(
+        "sources",
+        {
+            "used_context": stream.used_context,
+            "sources": [source.model_dump() for source in stream.sources],
+            "context": stream.context.model_dump() if stream.context is not None else None,
+        },
+    )
+
+    tokens = stream.tokens
+    try:
+        async for token in tokens:
+            if await request.is_disconnected():
+                return
+            yield _sse("token", {"token": token})
+    except RAGServiceError as exc:
+        yield _sse("error", {"status_code": exc.status_code, "detail": exc.detail})
+        return
+    finally:
+        await tokens.aclose()
+
+    yield _sse("done", {})
+
+
 @router.post("/chat", response_model=RAGChatResponse)
 async def chat(req: RAGChatRequest) -> RAGChatResponse:
     try:
-        rag_result = await answer_with_rag(req.message)
+        rag_result = await answer_with_rag(req.message, _filters(req))
     except RAGServiceError as exc:
-        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+        raise _http_error(exc) from exc
 
     return rag_result
+
+
+@router.post(
+    "/chat/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def chat_stream(req: RAGChatRequest, request: Request) -> StreamingResponse:
+    try:
+        stream = await stream_answer_with_rag(req.message, _filters(req))
+    except RAGServiceError as exc:
+        raise _http_error(exc) from exc
+
+    return StreamingResponse(
+        _sse_events(stream, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/capacity", response_model=ChatCapacityResponse)
+async def capacity() -> ChatCapacityResponse:
+    admission = get_generation_admission()
+    return ChatCapacityResponse(
+        in_flight=admission.in_flight,
+        queued=admission.queued,
+        max_concurrent=admission.max_concurrent,
+        max_queued=admission.max_queued,
+    )
@@ -0,0 +1,89 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+
+from rag_lab.schemas.documents import (
+    BulkDeleteRequest,
+    CompactionResponse,
+    DeletedDocument,
+    DeleteDocumentsResponse,
+    DocumentListResponse,
+    DocumentResponse,
+)
+from rag_lab.services.document_service import (
+    DeletionReport,
+    compact_storage,
+    delete_documents,
+    list_documents,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/documents", tags=["documents"])
+
+
+def _deletion_response(report: DeletionReport) -> DeleteDocumentsResponse:
+    return DeleteDocumentsResponse(
+        deleted=[
+            DeletedDocument(
+                doc_id=stored_file.doc_id,
+                original_filename=stored_file.original_filename,
+                size_bytes=stored_file.size_bytes,
+            )
+            for stored_file in report.deleted
+        ],
+        not_found=report.not_found,
+    )
+
+
+async def _delete(doc_ids: list[str]) -> DeletionReport:
+    try:
+        return await delete_documents(doc_ids)
+    except Exception as exc:
+        logger.exception("Document deletion failed")
+        raise HTTPException(status_code=503, detail="Vector store is unavailable") from exc
+
+
+@router.get("", response_model=DocumentListResponse)
+async def list_all(
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=500),
+) -> DocumentListResponse:
+    page = list_documents(offset=offset, limit=limit)
+    return DocumentListResponse(
+        documents=[DocumentResponse(**row) for row in page.documents],
+        total=page.total,
+        offset=page.offset,
+        limit=page.limit,
+    )
+
+
+@router.delete("/{doc_id}", response_model=DeleteDocumentsResponse)
+async def delete_one(doc_id: str) -> DeleteDocumentsResponse:
+    report = await _delete([doc_id])
+    if not report.deleted:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return _deletion_response(report)
+
+
+@router.post("/delete:batch", response_model=DeleteDocumentsResponse)
+async def delete_many(req: BulkDeleteRequest) -> DeleteDocumentsResponse:
+    return _deletion_response(await _delete(req.doc_ids))
+
+
+@router.post("/compact", response_model=CompactionResponse)
+async def compact() -> CompactionResponse:
+    try:
+        summary = await compact_storage()
+    except Exception as exc:
+        logger.exception("Compaction failed")
+        raise HTTPException(status_code=503, detail="Vector store is unavailable") from exc
+
+    return CompactionResponse(
+        bytes_reclaimed=summary.bytes_reclaimed,
+        vectors_compacted=summary.vectors_compacted,
+        vector_bytes_reclaimed=summary.vector_bytes_reclaimed,
+        sidecar_bytes_reclaimed=summary.sidecar_bytes_reclaimed,
+        upload_bytes_reclaimed=summary.upload_bytes_reclaimed,
+        elapsed_seconds=summary.elapsed_seconds,
+    )
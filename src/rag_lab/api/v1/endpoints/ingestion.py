@@ -2,73 +2,146 @@ import logging
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
 
-from rag_lab.schemas.ingestion import IngestionFileResult, IngestionUploadResponse
-from rag_lab.services.ingestion_service import IngestionError, ingest_upload
+from rag_lab.schemas.ingestion import (
+    IngestionFileResult,
+    IngestionJobResponse,
+    IngestionJobsResponse,
+    IngestionJobStage,
+    IngestionUploadResponse,
+)
+from rag_lab.services.ingestion_job_service import IngestionJob, get_ingestion_job_manager
+from rag_lab.services.ingestion_service import IngestionError, ingest_upload, ingest_uploads
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ingestion", tags=["ingestion"])
 
+_FILES_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        }
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+def _job_response(job: IngestionJob) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        stage=job.stage,
+        stages=[IngestionJobStage(name=name, **state) for name, state in job.stages.items()],
+        original_filename=job.stored_file.original_filename,
+        doc_id=job.stored_file.doc_id,
+        file_hash=job.stored_file.file_hash,
+        size_bytes=job.stored_file.size_bytes,
+        chunks_count=job.chunks_count,
+        detail=job.detail,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
 
 @router.post(
     "/upload",
     response_model=IngestionUploadResponse,
-    openapi_extra={
-        "requestBody": {
-            "required": True,
-            "content": {
-                "multipart/form-data": {
-                    "schema": {
-                        "type": "object",
-                        "required": ["files"],
-                        "properties": {
-                            "files": {
-                                "type": "array",
-                                "items": {"type": "string", "format": "binary"},
-                            }
-                        },
-                    }
-                }
-            },
-        }
-    },
+    openapi_extra=_FILES_REQUEST_BODY,
 )
 async def upload(files: list[UploadFile] = File(...)) -> IngestionUploadResponse:
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
-    results: list[IngestionFileResult] = []
-    for file in files:
+    if len(files) == 1:
         try:
-            result = await ingest_upload(file)
-            results.append(result)
+            return IngestionUploadResponse(files=[await ingest_upload(files[0])])
         except IngestionError as exc:
-            if len(files) == 1:
-                raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Unexpected ingestion failure for '%s'", files[0].filename)
+            raise HTTPException(status_code=500, detail="Unexpected ingestion failure") from exc
+        finally:
+            await files[0].close()
+
+    try:
+        outcomes = await ingest_uploads(files)
+    finally:
+        for file in files:
+            await file.close()
+
+    results: list[IngestionFileResult] = []
+    for file, outcome in zip(files, outcomes, strict=True):
+        if isinstance(outcome, IngestionFileResult):
+            results.append(outcome)
+            continue
+        if isinstance(outcome, IngestionError):
             logger.warning(
                 "Failed to index '%s': %s",
                 file.filename,
-                exc.detail,
+                outcome.detail,
             )
-            results.append(
-                IngestionFileResult(
-                    status="failed",
-                    original_filename=file.filename or "",
-                    detail=exc.detail,
-                )
+            detail = outcome.detail
+        else:
+            logger.error("Unexpected ingestion failure for '%s'", file.filename, exc_info=outcome)
+            detail = "Unexpected ingestion failure"
+        results.append(
+            IngestionFileResult(
+                status="failed",
+                original_filename=file.filename or "",
+                detail=detail,
             )
-        except Exception as exc:  # noqa: BLE001
-            logger.exception("Unexpected ingestion failure for '%s'", file.filename)
+        )
+
+    return IngestionUploadResponse(files=results)
+
+
+@router.post(
+    "/jobs",
+    response_model=IngestionJobsResponse,
+    status_code=202,
+    openapi_extra=_FILES_REQUEST_BODY,
+)
+async def submit_jobs(files: list[UploadFile] = File(...)) -> IngestionJobsResponse:
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    manager = get_ingestion_job_manager()
+    jobs: list[IngestionJobResponse] = []
+    rejected: list[IngestionFileResult] = []
+    for file in files:
+        try:
+            job = await manager.submit(file)
+            jobs.append(_job_response(job))
+        except IngestionError as exc:
             if len(files) == 1:
-                raise HTTPException(status_code=500, detail="Unexpected ingestion failure") from exc
-            results.append(
+                raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+            rejected.append(
                 IngestionFileResult(
                     status="failed",
                     original_filename=file.filename or "",
-                    detail="Unexpected ingestion failure",
+                    detail=exc.detail,
                 )
             )
         finally:
             await file.close()
 
-    return IngestionUploadResponse(files=results)
+    return IngestionJobsResponse(jobs=jobs, rejected=rejected)
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_job(job_id: str) -> IngestionJobResponse:
+    job = get_ingestion_job_manager().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return _job_response(job)
@@ -0,0 +1,71 @@
+import logging
+from dataclasses import asdict
+
+from fastapi import APIRouter, HTTPException
+
+from rag_lab.core.config import settings
+from rag_lab.schemas.retrieval import (
+    BatchSearchRequest,
+    BatchSearchResponse,
+    CacheStatsResponse,
+    QueryResults,
+    RetrievalCacheStatsResponse,
+    RetrievedChunkResponse,
+)
+from rag_lab.services.index_generation import get_index_generation
+from rag_lab.services.retrieval_cache import (
+    get_filter_scope_cache,
+    get_query_embedding_cache,
+    get_retrieval_result_cache,
+)
+from rag_lab.services.retrieval_filter import RetrievalFilter
+from rag_lab.services.vector_store_service import get_async_vector_store_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/retrieval", tags=["retrieval"])
+
+
+@router.post("/search:batch", response_model=BatchSearchResponse)
+async def search_batch(req: BatchSearchRequest) -> BatchSearchResponse:
+    if len(req.queries) > settings.retrieval_batch_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries (max {settings.retrieval_batch_max_queries})",
+        )
+    if any(not query.strip() for query in req.queries):
+        raise HTTPException(status_code=400, detail="Queries must not be empty")
+
+    filters = RetrievalFilter.create(**req.filters.model_dump()) if req.filters is not None else None
+    try:
+        batches = await get_async_vector_store_service().search_batch(
+            queries=req.queries,
+            top_k=req.top_k or settings.retrieval_top_k,
+            score_threshold=(
+                req.score_threshold if req.score_threshold is not None else settings.retrieval_score_threshold
+            ),
+            filters=filters,
+        )
+    except Exception as exc:
+        logger.exception("Batch retrieval failed")
+        raise HTTPException(status_code=503, detail="Vector store is unavailable") from exc
+
+    return BatchSearchResponse(
+        results=[
+            QueryResults(query=query, chunks=[RetrievedChunkResponse(**asdict(chunk)) for chunk in chunks])
+            for query, chunks in zip(req.queries, batches, strict=True)
+        ]
+    )
+
+
+@router.get("/cache", response_model=RetrievalCacheStatsResponse)
+async def cache_stats() -> RetrievalCacheStatsResponse:
+    caches = {
+        "query_embeddings": get_query_embedding_cache(),
+        "retrieval_results": get_retrieval_result_cache(),
+        "filter_scopes": get_filter_scope_cache(),
+    }
+    return RetrievalCacheStatsResponse(
+        index_generation=get_index_generation().current(),
+        caches=[CacheStatsResponse(name=name, **asdict(cache.stats())) for name, cache in caches.items()],
+    )
@@ -1,9 +1,13 @@
 from fastapi import APIRouter
 
 from rag_lab.api.v1.endpoints.chat import router as chat_router
+from rag_lab.api.v1.endpoints.documents import router as documents_router
 from rag_lab.api.v1.endpoints.ingestion import router as ingestion_router
+from rag_lab.api.v1.endpoints.retrieval import router as retrieval_router
 
 router = APIRouter(prefix="/v1")
 
 router.include_router(chat_router)
+router.include_router(documents_router)
 router.include_router(ingestion_router)
+router.include_router(retrieval_router)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from collections.abc import Sequence
+
+from rag_lab.core.config import settings
+
+
+def _migrate_index(args: argparse.Namespace) -> int:
+    from rag_lab.services.index_generation import get_index_generation
+    from rag_lab.services.index_stamp import current_stamp
+    from rag_lab.services.vector_backends import create_vector_backend, migrate_vectors
+
+    if args.source == args.target:
+        print("Source and target backends must differ", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    collection = current_stamp().collection
+    source = create_vector_backend(args.source, collection)
+    target = create_vector_backend(args.target, collection)
+    try:
+        copied = migrate_vectors(source, target, batch_size=args.batch_size)
+    finally:
+        source.close()
+        target.close()
+    get_index_generation().bump([])
+
+    elapsed = time.perf_counter() - started
+    print(f"Copied {copied} vectors of '{collection}' from {args.source} to {args.target} in {elapsed:.1f}s")
+    if args.target != settings.vector_backend:
+        print(f"Set RAG_LAB_VECTOR_BACKEND={args.target} to serve from the new backend")
+    return 0
+
+
+def _reindex(args: argparse.Namespace) -> int:
+    from rag_lab.services.index_stamp import ensure_stamp, target_stamp
+    from rag_lab.services.reindex_service import Reindexer, ReindexError
+
+    active, target = ensure_stamp(), target_stamp()
+    print(f"Active collection '{active.collection}' (fingerprint {active.fingerprint})")
+    if active.fingerprint == target.fingerprint:
+        print("Index matches the current settings; nothing to do")
+        return 0
+
+    def _progress(position: int, total: int, file_name: str) -> None:
+        print(f"[{position}/{total}] {file_name}")
+
+    try:
+        report = Reindexer(cpu_fraction=args.cpu_fraction, on_progress=_progress).run()
+    except ReindexError as exc:
+        print(exc.detail, file=sys.stderr)
+        return 1
+
+    print(
+        f"Re-indexed {report.indexed} documents ({report.failed} failed, {report.resumed} from checkpoint) "
+        f"into '{report.collection}' in {report.elapsed_seconds:.1f}s"
+    )
+    if not report.swapped:
+        print("Stopped before the swap; run again to resume")
+        return 1
+    return 0
+
+
+def _ingest(args: argparse.Namespace) -> int:
+    from pathlib import Path
+
+    from rag_lab.services.bulk_ingestion_service import BulkIngestor, BulkIngestStats
+    from rag_lab.services.ingestion_service import IngestionError
+
+    last_report = time.perf_counter()
+
+    def _progress(stats: BulkIngestStats) -> None:
+        nonlocal last_report
+        if time.perf_counter() - last_report >= args.progress_seconds:
+            last_report = time.perf_counter()
+            print(f"[{stats.files_seen} files] {stats.summary()}")
+
+    ingestor = BulkIngestor(
+        workers=args.workers,
+        batch_chunks=args.batch_chunks,
+        max_file_bytes=args.max_file_bytes,
+        on_progress=_progress,
+    )
+    try:
+        stats = ingestor.run(Path(args.directory), restart=args.restart)
+    except IngestionError as exc:
+        print(exc.detail, file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume", file=sys.stderr)
+        return 130
+
+    print(f"Done: {stats.files_seen} files seen, {stats.summary()}")
+    return 1 if stats.failed else 0
+
+
+def _delete_documents(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from rag_lab.services.document_service import delete_documents
+
+    report = asyncio.run(delete_documents(args.doc_ids))
+    for stored_file in report.deleted:
+        print(f"Deleted {stored_file.doc_id} ({stored_file.original_filename})")
+    for doc_id in report.not_found:
+        print(f"Not found: {doc_id}", file=sys.stderr)
+    return 1 if report.not_found else 0
+
+
+def _compact(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from rag_lab.services.document_service import compact_storage
+
+    summary = asyncio.run(compact_storage(upload_min_age_seconds=args.upload_min_age_seconds))
+    print(
+        f"Reclaimed {summary.bytes_reclaimed} bytes in {summary.elapsed_seconds:.1f}s "
+        f"(vectors {summary.vector_bytes_reclaimed}, sidecar indexes {summary.sidecar_bytes_reclaimed}, "
+        f"uploads {summary.upload_bytes_reclaimed})"
+    )
+    if not summary.vectors_compacted:
+        print(f"The {settings.vector_backend} vector backend does not support compaction; vectors were left as is")
+    return 0
+
+
+_SAMPLE_TEXTS = [
+    "How do I configure the retrieval score threshold?",
+    "Error ERR-4012 means the upstream service timed out.",
+    "Uploads larger than the configured limit are rejected with HTTP 413.",
+    "Ollama runs llama3.1:8b locally and streams tokens back to the API.",
+    "Chunks overlap by 120 characters so sentences are not cut in half.",
+]
+
+
+def _embedding_agreement(args: argparse.Namespace) -> int:
+    from rag_lab.services.embedding_backends import cosine_agreement, create_embeddings
+
+    texts = _SAMPLE_TEXTS
+    if args.texts_file:
+        with open(args.texts_file, encoding="utf-8") as file_handle:
+            texts = [line.strip() for line in file_handle if line.strip()]
+
+    report = cosine_agreement(create_embeddings("huggingface"), create_embeddings(args.backend), texts)
+    print(
+        f"{args.backend} vs huggingface on {report.samples} texts: "
+        f"mean cosine {report.mean_cosine:.4f}, min cosine {report.min_cosine:.4f}"
+    )
+    return 0 if report.min_cosine >= args.min_cosine else 1
+
+
+def _embedding_server(args: argparse.Namespace) -> int:
+    from pathlib import Path
+
+    from rag_lab.services.embedding_server import default_socket_path, run_embedding_server
+
+    socket_path = Path(args.socket) if args.socket else default_socket_path()
+    print(f"Serving {settings.embedding_backend} embeddings on {socket_path}")
+    print(f"Set RAG_LAB_EMBEDDING_SERVER_SOCKET={socket_path} for the API workers to use it")
+    try:
+        run_embedding_server(socket_path, preload=not args.lazy)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="rag-lab", description="RAG Lab maintenance commands")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subcommands.add_parser("migrate-index", help="Copy all vectors between vector backends")
+    migrate.add_argument("--from", dest="source", choices=["chroma", "numpy"], required=True)
+    migrate.add_argument("--to", dest="target", choices=["chroma", "numpy"], required=True)
+    migrate.add_argument("--batch-size", type=int, default=1000)
+    migrate.set_defaults(handler=_migrate_index)
+
+    reindex = subcommands.add_parser(
+        "reindex", help="Rebuild the index with the current chunking/embedding settings and swap it in"
+    )
+    reindex.add_argument(
+        "--cpu-fraction", type=float, default=None, help="Share of wall time spent indexing (default from settings)"
+    )
+    reindex.set_defaults(handler=_reindex)
+
+    ingest = subcommands.add_parser(
+        "ingest", help="Index every supported file under a directory, resuming an interrupted run"
+    )
+    ingest.add_argument("directory")
+    ingest.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    ingest.add_argument("--batch-chunks", type=int, default=None, help="Chunks embedded and written per batch")
+    ingest.add_argument("--max-file-bytes", type=int, default=None, help="Skip files larger than this")
+    ingest.add_argument("--restart", action="store_true", help="Ignore the checkpoint of a previous run")
+    ingest.add_argument("--progress-seconds", type=float, default=5.0)
+    ingest.set_defaults(handler=_ingest)
+
+    delete = subcommands.add_parser(
+        "delete-documents", help="Delete documents' stored files, sidecars, metadata and vectors"
+    )
+    delete.add_argument("doc_ids", nargs="+")
+    delete.set_defaults(handler=_delete_documents)
+
+    compact = subcommands.add_parser(
+        "compact", help="Reclaim disk space left by deleted vectors and orphaned uploads"
+    )
+    compact.add_argument(
+        "--upload-min-age-seconds",
+        type=float,
+        default=3600.0,
+        help="Only sweep orphaned upload files older than this",
+    )
+    compact.set_defaults(handler=_compact)
+
+    agreement = subcommands.add_parser(
+        "embedding-agreement", help="Report cosine agreement of an embedding backend with the reference model"
+    )
+    agreement.add_argument("--backend", choices=["onnx"], default="onnx")
+    agreement.add_argument("--texts-file", help="File with one sample text per line")
+    agreement.add_argument("--min-cosine", type=float, default=0.98, help="Exit non-zero below this cosine")
+    agreement.set_defaults(handler=_embedding_agreement)
+
+    embedding_server = subcommands.add_parser(
+        "embedding-server", help="Serve embeddings to all API workers from one shared model process"
+    )
+    embedding_server.add_argument(
+        "--socket", help="Unix socket path (default from settings, else <data_dir>/embedding.sock)"
+    )
+    embedding_server.add_argument("--lazy", action="store_true", help="Load the model on the first request")
+    embedding_server.set_defaults(handler=_embedding_server)
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    args = build_parser().parse_args(argv)
+    return int(args.handler(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
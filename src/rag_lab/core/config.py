@@ -1,5 +1,9 @@
+import hashlib
+import json
 from pathlib import Path
+from typing import Literal
 
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,16 +14,68 @@ class Settings(BaseSettings):
     uploads_dir: Path = Path("data/uploads")
     vector_store_dir: Path = Path("data/vector_store")
 
+    vector_backend: Literal["chroma", "numpy"] = "chroma"
+    vector_index_dtype: Literal["float32", "float16", "int8"] = "float32"
+    vector_index_ann_threshold: int = 50_000
+
     embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: Literal["huggingface", "onnx", "hash"] = "huggingface"
+    embedding_batch_tokens: int = 8192
+    embedding_max_seq_length: int = 256
+    onnx_quantize: bool = True
+    onnx_intra_op_threads: int = 0
+    embedding_server_socket: Path | None = None
+    embedding_server_batch_window_ms: float = 5.0
+    embedding_server_max_batch_texts: int = 256
+    embedding_server_timeout_seconds: float = 60.0
     chunk_size: int = 800
     chunk_overlap: int = 120
     retrieval_top_k: int = 4
     retrieval_score_threshold: float = 0.2
+    retrieval_batch_max_queries: int = 256
+    retrieval_mode: Literal["vector", "hybrid"] = "vector"
+    hybrid_candidates: int = 20
+    hybrid_rrf_k: int = 60
+    prompt_context_max_tokens: int = 1500
+    prompt_chars_per_token: float = 3.0
+    query_embedding_cache_size: int = 4096
+    query_embedding_cache_max_bytes: int = 64_000_000
+    retrieval_cache_size: int = 2048
+    retrieval_cache_max_bytes: int = 64_000_000
+    retrieval_filter_cache_size: int = 256
+    retrieval_filter_cache_max_bytes: int = 32_000_000
+    answer_cache_size: int = 1024
+    answer_cache_ttl_seconds: float = 600.0
     max_upload_size_bytes: int = 10_000_000
+    # At least one thread stays free of writes for searches.
+    vector_store_workers: int = Field(default=4, ge=2)
+    vector_store_max_pending: int = 64
+    ingestion_job_workers: int = 2
+    ingestion_job_lease_seconds: float = 60.0
+    ingestion_max_concurrent_files: int = 4
+    ingestion_batch_max_chunks: int = 512
+    pdf_extraction_workers: int = 2
+    pdf_pages_per_task: int = 25
+    pdf_page_timeout_seconds: float = 30.0
+    bulk_ingest_workers: int = 0
+    bulk_ingest_batch_chunks: int = 2048
+    reindex_on_startup: bool = False
+    reindex_cpu_fraction: float = 0.5
 
     ollama_url: str = "http://localhost:11434/api/generate"
     ollama_model: str = "llama3.1:8b"
     ollama_timeout_seconds: float = 120.0
+    ollama_keep_alive: str = "30m"
+    ollama_max_connections: int = 8
+    ollama_max_keepalive_connections: int = 4
+    ollama_max_concurrent_generations: int = 4
+    ollama_max_queued_generations: int = 16
+    ollama_retry_after_seconds: int = 5
+
+    server_timing_enabled: bool = True
+
+    warmup_enabled: bool = True
+    warmup_ollama: bool = False
 
 
 settings = Settings()
@@ -29,3 +85,16 @@ def ensure_runtime_directories() -> None:
     settings.data_dir.mkdir(parents=True, exist_ok=True)
     settings.uploads_dir.mkdir(parents=True, exist_ok=True)
     settings.vector_store_dir.mkdir(parents=True, exist_ok=True)
+
+
+def index_fingerprint() -> str:
+    """Identify the chunking/embedding configuration that produced the indexed vectors."""
+    config: dict[str, object] = {
+        "embedding_model_name": settings.embedding_model_name,
+        "embedding_backend": settings.embedding_backend,
+        "chunk_size": settings.chunk_size,
+        "chunk_overlap": settings.chunk_overlap,
+    }
+    if settings.embedding_backend == "onnx":
+        config["onnx_quantize"] = settings.onnx_quantize
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
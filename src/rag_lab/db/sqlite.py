@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open a WAL-mode SQLite connection; callers serialize access to it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA foreign_keys=ON")
+    return connection
+
+
+def database_size(path: Path) -> int:
+    """Bytes a WAL-mode database occupies on disk, including its write-ahead log."""
+    wal_path = path.with_name(path.name + "-wal")
+    return sum(candidate.stat().st_size for candidate in (path, wal_path) if candidate.exists())
+
+
+def vacuum(connection: sqlite3.Connection, path: Path) -> int:
+    """Rebuild a database without free pages and truncate its WAL; call with no transaction open."""
+    before = database_size(path)
+    connection.execute("VACUUM")
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return max(0, before - database_size(path))
@@ -1,11 +1,77 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from rag_lab.api.routers import router as api_router
+from rag_lab.core.config import settings
+from rag_lab.core.metrics import registry, server_timing_header, start_server_timing
+from rag_lab.services.chat_service import close_ollama_client, get_ollama_client
+from rag_lab.services.ingestion_job_service import (
+    get_ingestion_job_manager,
+    shutdown_ingestion_job_manager,
+)
+from rag_lab.services.pdf_extraction_service import shutdown_pdf_extraction_pool
+from rag_lab.services.reindex_service import Reindexer, run_background_reindex
+from rag_lab.services.warmup_service import get_warmup_state, mark_ready, run_warmup
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    get_ollama_client()
+    warmup_task = asyncio.create_task(run_warmup()) if settings.warmup_enabled else None
+    if warmup_task is None:
+        mark_ready()
+    get_ingestion_job_manager().start()
+    reindexer = Reindexer()
+    reindex_task = asyncio.create_task(run_background_reindex(reindexer)) if settings.reindex_on_startup else None
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+        if reindex_task is not None:
+            reindexer.stop()
+            reindex_task.cancel()
+        await shutdown_ingestion_job_manager()
+        shutdown_pdf_extraction_pool()
+        await close_ollama_client()
 
-app = FastAPI(title="RAG Lab", version="0.1.0")
+
+app = FastAPI(title="RAG Lab", version="0.1.0", lifespan=lifespan)
 
 app.include_router(api_router)
 
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+    if not settings.server_timing_enabled:
+        return await call_next(request)
+
+    timings = start_server_timing()
+    started = time.perf_counter()
+    response = await call_next(request)
+    timings.append(("total", time.perf_counter() - started))
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/ready")
+def readiness():
+    state = get_warmup_state()
+    if not state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "error": state.error})
+    return {"status": "ready", "warmup_seconds": state.durations}
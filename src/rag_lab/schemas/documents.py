@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+
+
+class DocumentResponse(BaseModel):
+    doc_id: str
+    original_filename: str
+    content_type: str
+    size_bytes: int
+    uploaded_at: str
+    chunks_count: int
+    indexed_at: str | None = None
+
+
+class DocumentListResponse(BaseModel):
+    documents: list[DocumentResponse]
+    total: int
+    offset: int
+    limit: int
+
+
+class BulkDeleteRequest(BaseModel):
+    doc_ids: list[str] = Field(min_length=1, max_length=1000)
+
+
+class DeletedDocument(BaseModel):
+    doc_id: str
+    original_filename: str
+    size_bytes: int
+
+
+class DeleteDocumentsResponse(BaseModel):
+    deleted: list[DeletedDocument]
+    not_found: list[str]
+
+
+class CompactionResponse(BaseModel):
+    bytes_reclaimed: int
+    vectors_compacted: bool
+    vector_bytes_reclaimed: int
+    sidecar_bytes_reclaimed: int
+    upload_bytes_reclaimed: int
+    elapsed_seconds: float
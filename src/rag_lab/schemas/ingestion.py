@@ -17,3 +17,30 @@ class IngestionFileResult(BaseModel):
 
 class IngestionUploadResponse(BaseModel):
     files: list[IngestionFileResult]
+
+
+class IngestionJobStage(BaseModel):
+    name: str
+    status: Literal["pending", "running", "completed", "failed"]
+    started_at: str | None = None
+    finished_at: str | None = None
+
+
+class IngestionJobResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    stage: str
+    stages: list[IngestionJobStage]
+    original_filename: str
+    doc_id: str
+    file_hash: str
+    size_bytes: int
+    chunks_count: int = 0
+    detail: str | None = None
+    created_at: str
+    updated_at: str
+
+
+class IngestionJobsResponse(BaseModel):
+    jobs: list[IngestionJobResponse]
+    rejected: list[IngestionFileResult] = []
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from rag_lab.schemas.retrieval import RetrievalFilters
+
 
 class RAGSource(BaseModel):
     doc_id: str
@@ -11,9 +13,26 @@ class RAGSource(BaseModel):
 
 class RAGChatRequest(BaseModel):
     message: str
+    filters: RetrievalFilters | None = None
+
+
+class ContextUsage(BaseModel):
+    budget_tokens: int
+    tokens_used: int
+    tokens_dropped: int
+    chunks_used: int
+    chunks_dropped: int
 
 
 class RAGChatResponse(BaseModel):
     answer: str
     used_context: bool
     sources: list[RAGSource]
+    context: ContextUsage | None = None
+
+
+class ChatCapacityResponse(BaseModel):
+    in_flight: int
+    queued: int
+    max_concurrent: int
+    max_queued: int
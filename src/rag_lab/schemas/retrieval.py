@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class CacheStatsResponse(BaseModel):
+    name: str
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_entries: int
+    max_bytes: int
+
+
+class RetrievalCacheStatsResponse(BaseModel):
+    index_generation: str
+    caches: list[CacheStatsResponse]
+
+
+class RetrievedChunkResponse(BaseModel):
+    doc_id: str
+    file_name: str
+    chunk_id: str
+    score: float
+    text: str
+
+
+class RetrievalFilters(BaseModel):
+    doc_ids: list[str] | None = Field(default=None, max_length=10_000)
+    file_name_pattern: str | None = Field(default=None, description="Shell-style glob on the original file name")
+    uploaded_after: datetime | None = None
+    uploaded_before: datetime | None = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(min_length=1)
+    top_k: int | None = Field(default=None, ge=1)
+    score_threshold: float | None = None
+    filters: RetrievalFilters | None = None
+
+
+class QueryResults(BaseModel):
+    query: str
+    chunks: list[RetrievedChunkResponse]
+
+
+class BatchSearchResponse(BaseModel):
+    results: list[QueryResults]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass
+
+from rag_lab.core.config import settings
+from rag_lab.core.metrics import count_cache_lookup
+from rag_lab.services.index_generation import get_index_generation
+from rag_lab.services.retrieval_cache import normalize_query
+
+
+@dataclass(frozen=True)
+class _Entry:
+    answer: str
+    expires_at: float
+    doc_ids: frozenset[str]
+
+
+def answer_cache_key(question: str, chunk_ids: Iterable[str], model: str) -> Hashable:
+    return (normalize_query(question).casefold(), frozenset(chunk_ids), model)
+
+
+class AnswerCache:
+    """TTL + LRU cache of answers; concurrent callers for one key share a shielded generation."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max(0, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._keys_by_doc: dict[str, set[Hashable]] = {}
+        self._inflight: dict[Hashable, asyncio.Task[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.answer
+
+    def put(self, key: Hashable, answer: str, doc_ids: Iterable[str]) -> None:
+        if self._max_entries == 0 or self._ttl_seconds <= 0:
+            return
+
+        entry = _Entry(answer=answer, expires_at=time.monotonic() + self._ttl_seconds, doc_ids=frozenset(doc_ids))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            for doc_id in entry.doc_ids:
+                self._keys_by_doc.setdefault(doc_id, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def evict_documents(self, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                for key in list(self._keys_by_doc.get(doc_id, ())):
+                    self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for doc_id in entry.doc_ids:
+            keys = self._keys_by_doc.get(doc_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_doc[doc_id]
+
+    async def get_or_generate(
+        self, key: Hashable, doc_ids: Iterable[str], generate: Callable[[], Awaitable[str]]
+    ) -> str:
+        cached = self.get(key)
+        count_cache_lookup("answer", cached is not None)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            contributing = frozenset(doc_ids)
+
+            async def _generate() -> str:
+                answer = await generate()
+                self.put(key, answer, contributing)
+                return answer
+
+            task = asyncio.ensure_future(_generate())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task[str]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter has gone away.
+            task.exception()
+
+
+_answer_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        cache = AnswerCache(
+            max_entries=settings.answer_cache_size,
+            ttl_seconds=settings.answer_cache_ttl_seconds,
+        )
+        get_index_generation().subscribe(cache.evict_documents)
+        _answer_cache = cache
+    return _answer_cache
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+from rag_lab.core.config import index_fingerprint, settings
+from rag_lab.db.sqlite import connect
+from rag_lab.services.file_storage_service import (
+    SUPPORTED_EXTENSIONS,
+    FileStorageError,
+    StoredFile,
+    get_index_state,
+    mark_indexed,
+    save_local_file,
+)
+from rag_lab.services.ingestion_service import IngestionError, chunk_text, extract_text
+from rag_lab.services.vector_store_service import DocumentChunks, VectorStoreService, get_vector_store_writer
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE_NAME = "bulk_ingest_checkpoint.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_files (
+    source_path TEXT PRIMARY KEY,
+    size_bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    doc_id TEXT,
+    chunks_count INTEGER NOT NULL,
+    error TEXT,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class BulkIngestStats:
+    files_seen: int = 0
+    indexed: int = 0
+    skipped: int = 0
+    resumed: int = 0
+    failed: int = 0
+    chunks: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed_seconds, 1e-9)
+        return (
+            f"{self.indexed} indexed, {self.skipped} already indexed, {self.resumed} from checkpoint, "
+            f"{self.failed} failed; {self.chunks} chunks in {elapsed:.1f}s "
+            f"({self.indexed / elapsed:.1f} files/s, {self.chunks / elapsed:.1f} chunks/s, "
+            f"{self.bytes / elapsed / 1_000_000:.2f} MB/s)"
+        )
+
+
+ProgressCallback = Callable[[BulkIngestStats], None]
+# (source, stat, doc_id, chunks_count, error) rows for the checkpoint.
+CheckpointEntry = tuple[Path, os.stat_result, str | None, int, str | None]
+
+
+class BulkIngestCheckpoint:
+    """Which source files a bulk ingest has finished, keyed by path, size and mtime."""
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def is_done(self, source: Path, stat: os.stat_result, fingerprint: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size_bytes, mtime_ns, fingerprint, error FROM ingested_files WHERE source_path = ?",
+                (str(source),),
+            ).fetchone()
+        return (
+            row is not None
+            and row["error"] is None
+            and row["size_bytes"] == stat.st_size
+            and row["mtime_ns"] == stat.st_mtime_ns
+            and row["fingerprint"] == fingerprint
+        )
+
+    def record(self, entries: list[CheckpointEntry], fingerprint: str) -> None:
+        """Record entries in one transaction; files with an error are retried next run."""
+        now = datetime.now(UTC).isoformat()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO ingested_files "
+                "(source_path, size_bytes, mtime_ns, fingerprint, doc_id, chunks_count, error, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (str(source), stat.st_size, stat.st_mtime_ns, fingerprint, doc_id, chunks, error, now)
+                    for source, stat, doc_id, chunks, error in entries
+                ],
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM ingested_files")
+
+
+def _extract_chunks(path: str) -> list[str]:
+    text = extract_text(Path(path))
+    if not text:
+        raise IngestionError(400, "No extractable text found in the file")
+    chunks = chunk_text(text)
+    if not chunks:
+        raise IngestionError(400, "Chunking produced zero chunks")
+    return chunks
+
+
+def iter_source_files(root: Path) -> Iterator[Path]:
+    """Supported files under ``root`` in a stable order, skipping hidden entries."""
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+        for name in sorted(files):
+            if not name.startswith(".") and Path(name).suffix.lower() in SUPPORTED_EXTENSIONS:
+                yield Path(directory) / name
+
+
+@dataclass(frozen=True)
+class _Pending:
+    source: Path
+    stat: os.stat_result
+    stored_file: StoredFile
+    # Other source files with the same content, settled together with this one.
+    copies: list[tuple[Path, os.stat_result]] = field(default_factory=list)
+
+    def sources(self) -> list[tuple[Path, os.stat_result]]:
+        return [(self.source, self.stat), *self.copies]
+
+
+class BulkIngestor:
+    """Index a directory tree in checkpointed batches, each under the collection's cross-process write lock."""
+
+    def __init__(
+        self,
+        *,
+        workers: int | None = None,
+        batch_chunks: int | None = None,
+        max_file_bytes: int | None = None,
+        checkpoint_path: Path | None = None,
+        on_progress: ProgressCallback | None = None,
+        service: VectorStoreService | None = None,
+    ) -> None:
+        self._workers = max(1, workers or settings.bulk_ingest_workers or os.cpu_count() or 1)
+        self._batch_chunks = max(1, batch_chunks or settings.bulk_ingest_batch_chunks)
+        self._max_file_bytes = max_file_bytes
+        self._checkpoint_path = checkpoint_path or settings.data_dir / CHECKPOINT_FILE_NAME
+        self._on_progress = on_progress
+        self._service = service
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop after the current batch; committed progress is kept."""
+        self._stop.set()
+
+    def run(self, root: Path, *, restart: bool = False) -> BulkIngestStats:
+        if not root.is_dir():
+            raise IngestionError(400, f"Not a directory: {root}")
+
+        self._checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        checkpoint = BulkIngestCheckpoint(self._checkpoint_path)
+        if restart:
+            checkpoint.clear()
+        service = self._service or get_vector_store_writer()
+        fingerprint = index_fingerprint()
+        stats = BulkIngestStats()
+        in_flight: dict[Future[list[str]], _Pending] = {}
+        ready: list[tuple[_Pending, list[str]]] = []
+        settled: list[CheckpointEntry] = []
+        queued: dict[str, _Pending] = {}
+
+        def _collect(block: bool) -> None:
+            done, _ = wait(list(in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending = in_flight.pop(future)
+                try:
+                    ready.append((pending, future.result()))
+                except Exception as exc:  # noqa: BLE001
+                    queued.pop(pending.stored_file.doc_id, None)
+                    self._fail_pending(stats, settled, pending, exc)
+
+        def _flush() -> None:
+            if ready:
+                self._index(service, checkpoint, fingerprint, stats, ready)
+                for pending, _ in ready:
+                    queued.pop(pending.stored_file.doc_id, None)
+                ready.clear()
+            if settled:
+                checkpoint.record(settled, fingerprint)
+                settled.clear()
+            if self._on_progress is not None:
+                self._on_progress(stats)
+
+        pool = ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            for source in iter_source_files(root):
+                if self._stop.is_set():
+                    break
+                stats.files_seen += 1
+                stat = source.stat()
+                if checkpoint.is_done(source, stat, fingerprint):
+                    stats.resumed += 1
+                    continue
+
+                pending = self._store(source, stat, fingerprint, service, stats, settled)
+                if pending is not None:
+                    original = queued.get(pending.stored_file.doc_id)
+                    if original is not None:
+                        # Same content as a file this run has not committed yet.
+                        original.copies.append((source, stat))
+                    else:
+                        queued[pending.stored_file.doc_id] = pending
+                        in_flight[pool.submit(_extract_chunks, str(pending.stored_file.stored_path))] = pending
+
+                # Keep the pool busy but bound the extracted text held in memory.
+                while len(in_flight) >= self._workers * 2:
+                    _collect(block=True)
+                _collect(block=False)
+                if sum(len(chunks) for _, chunks in ready) >= self._batch_chunks:
+                    _flush()
+
+            while in_flight and not self._stop.is_set():
+                _collect(block=True)
+                if sum(len(chunks) for _, chunks in ready) >= self._batch_chunks:
+                    _flush()
+            if not self._stop.is_set():
+                _flush()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            checkpoint.close()
+        return stats
+
+    def _fail(
+        self,
+        stats: BulkIngestStats,
+        settled: list[CheckpointEntry],
+        source: Path,
+        stat: os.stat_result,
+        exc: Exception,
+        doc_id: str | None,
+    ) -> None:
+        detail = getattr(exc, "detail", None) or f"{type(exc).__name__}: {exc}"
+        logger.warning("Failed to ingest '%s': %s", source, detail)
+        stats.failed += 1
+        settled.append((source, stat, doc_id, -1, detail))
+
+    def _fail_pending(
+        self, stats: BulkIngestStats, settled: list[CheckpointEntry], pending: _Pending, exc: Exception
+    ) -> None:
+        for source, stat in pending.sources():
+            self._fail(stats, settled, source, stat, exc, pending.stored_file.doc_id)
+
+    def _store(
+        self,
+        source: Path,
+        stat: os.stat_result,
+        fingerprint: str,
+        service: VectorStoreService,
+        stats: BulkIngestStats,
+        settled: list[CheckpointEntry],
+    ) -> _Pending | None:
+        try:
+            stored_file = save_local_file(source, max_size_bytes=self._max_file_bytes)
+        except (FileStorageError, OSError) as exc:
+            self._fail(stats, settled, source, stat, exc, None)
+            return None
+
+        state = get_index_state(stored_file.doc_id)
+        if (
+            stored_file.is_duplicate
+            and state is not None
+            and state.fingerprint == fingerprint
+            and state.chunks_count > 0
+            and service.count_document_chunks(stored_file.doc_id) == state.chunks_count
+        ):
+            stats.skipped += 1
+            settled.append((source, stat, stored_file.doc_id, state.chunks_count, None))
+            return None
+        return _Pending(source=source, stat=stat, stored_file=stored_file)
+
+    def _index(
+        self,
+        service: VectorStoreService,
+        checkpoint: BulkIngestCheckpoint,
+        fingerprint: str,
+        stats: BulkIngestStats,
+        ready: list[tuple[_Pending, list[str]]],
+    ) -> None:
+        documents = [
+            DocumentChunks(
+                doc_id=pending.stored_file.doc_id,
+                file_name=pending.stored_file.original_filename,
+                stored_path=pending.stored_file.stored_path,
+                chunks=chunks,
+            )
+            for pending, chunks in ready
+        ]
+        try:
+            counts = service.upsert_documents(documents)
+        except Exception as exc:  # noqa: BLE001
+            if len(ready) == 1:
+                settled: list[CheckpointEntry] = []
+                self._fail_pending(stats, settled, ready[0][0], exc)
+                checkpoint.record(settled, fingerprint)
+                return
+            logger.warning("Batch of %d files failed; indexing them one by one", len(ready), exc_info=True)
+            for item in ready:
+                self._index(service, checkpoint, fingerprint, stats, [item])
+            return
+
+        for (pending, _), count in zip(ready, counts, strict=True):
+            mark_indexed(pending.stored_file.doc_id, fingerprint, count)
+            stats.indexed += 1
+            stats.chunks += count
+            stats.bytes += pending.stored_file.size_bytes
+            stats.skipped += len(pending.copies)
+        checkpoint.record(
+            [
+                (source, stat, pending.stored_file.doc_id, count, None)
+                for (pending, _), count in zip(ready, counts, strict=True)
+                for source, stat in pending.sources()
+            ],
+            fingerprint,
+        )
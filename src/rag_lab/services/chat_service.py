@@ -1,26 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+
 import httpx
 
 from rag_lab.core.config import settings
+from rag_lab.core.metrics import OLLAMA_SECONDS, OLLAMA_TOKENS, record_stage, timed
 
 
 class ChatServiceError(Exception):
-    def __init__(self, status_code: int, detail: str) -> None:
+    def __init__(self, status_code: int, detail: str, retry_after: int | None = None) -> None:
         self.status_code = status_code
         self.detail = detail
+        self.retry_after = retry_after
         super().__init__(detail)
 
 
-async def generate_answer(message: str) -> str:
-    payload = {
-        "model": settings.ollama_model,
-        "prompt": message,
-        "stream": False,
-    }
+class GenerationAdmission:
+    """Caps concurrent Ollama generations; callers beyond ``max_queued`` waiting get a 503 at once."""
+
+    def __init__(self, max_concurrent: int, max_queued: int) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    def ensure_capacity(self) -> None:
+        if self.in_flight >= self.max_concurrent and self.queued >= self.max_queued:
+            raise ChatServiceError(
+                503,
+                "Ollama generation queue is full, retry later",
+                retry_after=settings.ollama_retry_after_seconds,
+            )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        self.ensure_capacity()
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+            record_stage("chat", "ollama_queue", time.perf_counter() - started)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+_client: httpx.AsyncClient | None = None
+_admission: GenerationAdmission | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.ollama_timeout_seconds,
+        limits=httpx.Limits(
+            max_connections=settings.ollama_max_connections,
+            max_keepalive_connections=settings.ollama_max_keepalive_connections,
+        ),
+    )
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_ollama_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_generation_admission() -> GenerationAdmission:
+    global _admission
+    if _admission is None:
+        _admission = GenerationAdmission(
+            max_concurrent=settings.ollama_max_concurrent_generations,
+            max_queued=settings.ollama_max_queued_generations,
+        )
+    return _admission
 
+
+@contextmanager
+def _translate_ollama_errors() -> Iterator[None]:
     try:
-        async with httpx.AsyncClient(timeout=settings.ollama_timeout_seconds) as client:
-            response = await client.post(settings.ollama_url, json=payload)
-            response.raise_for_status()
+        yield
     except httpx.TimeoutException as exc:
         raise ChatServiceError(504, "Ollama request timed out") from exc
     except httpx.HTTPStatusError as exc:
@@ -31,9 +109,76 @@ async def generate_answer(message: str) -> str:
     except httpx.RequestError as exc:
         raise ChatServiceError(503, "Failed to reach Ollama service") from exc
 
+
+def _record_ollama_stats(data: Mapping[str, object]) -> None:
+    """Record the token counts and durations (nanoseconds) Ollama reports on its final message."""
+    for phase, count_field, duration_field in (
+        ("prompt", "prompt_eval_count", "prompt_eval_duration"),
+        ("eval", "eval_count", "eval_duration"),
+    ):
+        count = data.get(count_field)
+        duration = data.get(duration_field)
+        if isinstance(count, int):
+            OLLAMA_TOKENS.inc(count, phase=phase)
+        if isinstance(duration, int):
+            OLLAMA_SECONDS.observe(duration / 1e9, phase=phase)
+
+
+async def generate_answer(message: str) -> str:
+    payload = {
+        "model": settings.ollama_model,
+        "prompt": message,
+        "stream": False,
+        "keep_alive": settings.ollama_keep_alive,
+    }
+
+    with _translate_ollama_errors():
+        async with get_generation_admission().slot():
+            with timed("chat", "ollama_generate"):
+                response = await get_ollama_client().post(settings.ollama_url, json=payload)
+                response.raise_for_status()
+
     data = response.json()
+    _record_ollama_stats(data)
     answer = data.get("response")
     if not isinstance(answer, str):
         raise ChatServiceError(502, "Invalid response from Ollama service")
 
     return answer
+
+
+async def stream_answer(message: str) -> AsyncIterator[str]:
+    """Yield answer tokens; closing the generator early makes Ollama abort the generation."""
+    payload = {
+        "model": settings.ollama_model,
+        "prompt": message,
+        "stream": True,
+        "keep_alive": settings.ollama_keep_alive,
+    }
+
+    with _translate_ollama_errors():
+        async with get_generation_admission().slot():
+            with timed("chat", "ollama_generate"):
+                async with get_ollama_client().stream("POST", settings.ollama_url, json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        try:
+                            data = json.loads(line)
+                        except json.JSONDecodeError as exc:
+                            raise ChatServiceError(502, "Invalid response from Ollama service") from exc
+
+                        token = data.get("response")
+                        if isinstance(token, str) and token:
+                            yield token
+                        if data.get("done"):
+                            _record_ollama_stats(data)
+                            return
+
+
+async def preload_model() -> None:
+    payload = {"model": settings.ollama_model, "keep_alive": settings.ollama_keep_alive}
+    with _translate_ollama_errors():
+        response = await get_ollama_client().post(settings.ollama_url, json=payload)
+        response.raise_for_status()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from rag_lab.db.sqlite import connect, vacuum
+
+CHUNK_REGISTRY_NAME = "chunk_registry.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_refs (
+    doc_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    stored_path TEXT NOT NULL,
+    PRIMARY KEY (doc_id, chunk_index)
+);
+CREATE INDEX IF NOT EXISTS ix_chunk_refs_content_hash ON chunk_refs (content_hash);
+"""
+
+
+def content_hash(text: str) -> str:
+    """Key a chunk by its whitespace-normalized content."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class ChunkRef:
+    doc_id: str
+    chunk_index: int
+    file_name: str
+
+    @property
+    def chunk_id(self) -> str:
+        return f"{self.doc_id}:{self.chunk_index}"
+
+
+@dataclass(frozen=True)
+class RegisteredDocument:
+    doc_id: str
+    file_name: str
+    stored_path: str
+    hashes: Sequence[str]
+
+
+class ChunkRegistry:
+    """Reference counts of content-addressed chunk vectors by ``(doc_id, chunk_index)``."""
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._path = path
+        self._connection = connect(path)
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _referenced(self, hashes: Iterable[str]) -> set[str]:
+        unique = list(set(hashes))
+        found: set[str] = set()
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(unique), 500):
+            batch = unique[start : start + 500]
+            rows = self._connection.execute(
+                f"SELECT DISTINCT content_hash FROM chunk_refs WHERE content_hash IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            found.update(row[0] for row in rows)
+        return found
+
+    def missing(self, hashes: Iterable[str]) -> set[str]:
+        """Hashes that no document references yet, i.e. that still need a vector."""
+        wanted = set(hashes)
+        with self._lock:
+            return wanted - self._referenced(wanted)
+
+    def _document_hashes(self, doc_id: str) -> set[str]:
+        rows = self._connection.execute("SELECT content_hash FROM chunk_refs WHERE doc_id = ?", (doc_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def replace_documents(self, documents: Sequence[RegisteredDocument]) -> set[str]:
+        """Replace several documents in one transaction; returns hashes orphaned once all are written."""
+        with self._lock, self._connection:
+            candidates: set[str] = set()
+            for document in documents:
+                candidates |= self._document_hashes(document.doc_id)
+                self._connection.execute("DELETE FROM chunk_refs WHERE doc_id = ?", (document.doc_id,))
+                self._connection.executemany(
+                    "INSERT INTO chunk_refs (doc_id, chunk_index, content_hash, file_name, stored_path) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (document.doc_id, index, value, document.file_name, document.stored_path)
+                        for index, value in enumerate(document.hashes)
+                    ],
+                )
+            candidates -= {value for document in documents for value in document.hashes}
+            return candidates - self._referenced(candidates)
+
+    def delete_documents(self, doc_ids: Sequence[str]) -> set[str]:
+        """Drop every reference held by ``doc_ids`` in one transaction and return hashes left orphaned."""
+        with self._lock, self._connection:
+            previous: set[str] = set()
+            for doc_id in doc_ids:
+                previous |= self._document_hashes(doc_id)
+                self._connection.execute("DELETE FROM chunk_refs WHERE doc_id = ?", (doc_id,))
+            return previous - self._referenced(previous)
+
+    def vacuum(self) -> int:
+        """Reclaim the space of deleted references; returns bytes reclaimed."""
+        with self._lock:
+            return vacuum(self._connection, self._path)
+
+    def count_document(self, doc_id: str) -> int:
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM chunk_refs WHERE doc_id = ?", (doc_id,)).fetchone()
+        return int(row[0])
+
+    def document_hashes(self, doc_ids: Iterable[str]) -> set[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT content_hash FROM chunk_refs WHERE doc_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(set(doc_ids))),),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def resolve(self, hashes: Iterable[str], doc_ids: Iterable[str] | None = None) -> dict[str, ChunkRef]:
+        """Map each hash to its earliest-registered chunk, among ``doc_ids`` when given."""
+        unique = list(set(hashes))
+        scope = ""
+        scope_params: list[str] = []
+        if doc_ids is not None:
+            scope = " AND doc_id IN (SELECT value FROM json_each(?))"
+            scope_params = [json.dumps(sorted(set(doc_ids)))]
+        resolved: dict[str, ChunkRef] = {}
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                rows = self._connection.execute(
+                    "SELECT content_hash, doc_id, chunk_index, file_name FROM chunk_refs "
+                    f"WHERE content_hash IN ({','.join('?' * len(batch))}){scope} ORDER BY rowid",
+                    [*batch, *scope_params],
+                ).fetchall()
+                for row in rows:
+                    resolved.setdefault(
+                        row["content_hash"],
+                        ChunkRef(doc_id=row["doc_id"], chunk_index=row["chunk_index"], file_name=row["file_name"]),
+                    )
+        return resolved
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+from rag_lab.services.vector_store_service import RetrievedChunk
+
+# Shortest suffix/prefix match treated as splitter overlap rather than coincidence.
+MIN_OVERLAP_CHARS = 16
+# Do not bother appending a truncated block with less room than this.
+MIN_TRUNCATED_TOKENS = 32
+
+
+@dataclass(frozen=True)
+class ContextBlock:
+    """One or more adjacent chunks of a document, merged into a single passage."""
+
+    doc_id: str
+    file_name: str
+    chunk_ids: tuple[str, ...]
+    score: float
+    text: str
+    truncated: bool = False
+
+    def header(self) -> str:
+        return f"[{', '.join(self.chunk_ids)}] file={self.file_name} score={self.score:.3f}"
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    blocks: list[ContextBlock]
+    budget_tokens: int
+    tokens_used: int
+    tokens_dropped: int
+    chunks_used: int
+    chunks_dropped: int
+
+    @property
+    def chunk_ids(self) -> list[str]:
+        return [chunk_id for block in self.blocks for chunk_id in block.chunk_ids]
+
+    def render(self) -> str:
+        return "\n\n".join(f"{block.header()}\n{block.text}" for block in self.blocks)
+
+
+def estimate_tokens(text: str, chars_per_token: float) -> int:
+    """Cheap token estimate; the generation model's tokenizer is not available here."""
+    return math.ceil(len(text) / max(chars_per_token, 0.5)) if text else 0
+
+
+def strip_overlap(left: str, right: str, max_overlap: int) -> str:
+    """Return ``right`` without the prefix it repeats from the end of ``left``."""
+    longest = min(len(left), len(right), max_overlap)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return right[size:]
+    return right
+
+
+def _merge_neighbours(chunks: list[RetrievedChunk], max_overlap: int) -> list[ContextBlock]:
+    """Group chunks into runs of consecutive ``chunk_index`` per document."""
+    runs: list[list[RetrievedChunk]] = []
+    by_position = sorted(
+        (chunk for chunk in chunks if chunk.chunk_index is not None),
+        key=lambda chunk: (chunk.doc_id, chunk.chunk_index),
+    )
+    for chunk in by_position:
+        previous = runs[-1][-1] if runs else None
+        if (
+            previous is not None
+            and previous.doc_id == chunk.doc_id
+            and previous.chunk_index is not None
+            and chunk.chunk_index == previous.chunk_index + 1
+        ):
+            runs[-1].append(chunk)
+        else:
+            runs.append([chunk])
+    runs.extend([chunk] for chunk in chunks if chunk.chunk_index is None)
+
+    blocks: list[ContextBlock] = []
+    for run in runs:
+        text = run[0].text
+        for left, right in zip(run, run[1:]):
+            text += strip_overlap(left.text, right.text, max_overlap)
+        blocks.append(
+            ContextBlock(
+                doc_id=run[0].doc_id,
+                file_name=run[0].file_name,
+                chunk_ids=tuple(chunk.chunk_id for chunk in run),
+                score=max(chunk.score for chunk in run),
+                text=text,
+            )
+        )
+    return blocks
+
+
+def pack_context(
+    chunks: list[RetrievedChunk],
+    *,
+    budget_tokens: int,
+    chars_per_token: float,
+    max_overlap: int,
+) -> PackedContext:
+    """Merge adjacent chunks and fit blocks into ``budget_tokens`` best score first, reporting what was dropped."""
+    blocks = sorted(_merge_neighbours(chunks, max_overlap), key=lambda block: block.score, reverse=True)
+    packed: list[ContextBlock] = []
+    used = dropped = chunks_dropped = 0
+    for block in blocks:
+        cost = estimate_tokens(f"{block.header()}\n{block.text}\n\n", chars_per_token)
+        remaining = budget_tokens - used
+        if cost <= remaining:
+            packed.append(block)
+            used += cost
+            continue
+
+        header_cost = estimate_tokens(f"{block.header()}\n\n\n", chars_per_token)
+        room = remaining - header_cost
+        if not packed or room >= MIN_TRUNCATED_TOKENS:
+            # Always keep at least part of the best block, even under a tiny budget.
+            keep_chars = max(int(max(room, MIN_TRUNCATED_TOKENS) * chars_per_token), 0)
+            truncated = ContextBlock(
+                doc_id=block.doc_id,
+                file_name=block.file_name,
+                chunk_ids=block.chunk_ids,
+                score=block.score,
+                text=block.text[:keep_chars].rstrip() + " …",
+                truncated=True,
+            )
+            truncated_cost = estimate_tokens(f"{truncated.header()}\n{truncated.text}\n\n", chars_per_token)
+            packed.append(truncated)
+            used += truncated_cost
+            dropped += max(cost - truncated_cost, 0)
+            continue
+
+        dropped += cost
+        chunks_dropped += len(block.chunk_ids)
+
+    return PackedContext(
+        blocks=packed,
+        budget_tokens=budget_tokens,
+        tokens_used=used,
+        tokens_dropped=dropped,
+        chunks_used=sum(len(block.chunk_ids) for block in packed),
+        chunks_dropped=chunks_dropped,
+    )
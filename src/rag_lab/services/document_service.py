@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from rag_lab.services.file_storage_service import (
+    StoredFile,
+    delete_stored_files,
+    get_metadata_store,
+    sweep_orphaned_uploads,
+)
+from rag_lab.services.vector_store_service import get_async_vector_store_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DocumentPage:
+    documents: list[dict[str, Any]]
+    total: int
+    offset: int
+    limit: int
+
+
+@dataclass(frozen=True)
+class DeletionReport:
+    deleted: list[StoredFile]
+    not_found: list[str]
+
+
+@dataclass(frozen=True)
+class CompactionSummary:
+    vectors_compacted: bool
+    vector_bytes_reclaimed: int
+    sidecar_bytes_reclaimed: int
+    upload_bytes_reclaimed: int
+    elapsed_seconds: float
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.vector_bytes_reclaimed + self.sidecar_bytes_reclaimed + self.upload_bytes_reclaimed
+
+
+def list_documents(*, offset: int, limit: int) -> DocumentPage:
+    store = get_metadata_store()
+    return DocumentPage(
+        documents=store.list_documents(offset=offset, limit=limit),
+        total=store.count(),
+        offset=offset,
+        limit=limit,
+    )
+
+
+async def delete_documents(doc_ids: list[str]) -> DeletionReport:
+    """Delete vectors first, then files and metadata, so a failed delete can be retried."""
+    requested = list(dict.fromkeys(doc_ids))
+    store = get_metadata_store()
+    known = [doc_id for doc_id in requested if store.get(doc_id) is not None]
+    if known:
+        await get_async_vector_store_service().delete_documents(known)
+    deleted = await asyncio.to_thread(delete_stored_files, known)
+    removed = {stored_file.doc_id for stored_file in deleted}
+    logger.info("Deleted %d documents (%d not found)", len(deleted), len(requested) - len(removed))
+    return DeletionReport(deleted=deleted, not_found=[doc_id for doc_id in requested if doc_id not in removed])
+
+
+async def compact_storage(*, upload_min_age_seconds: float = 3600.0) -> CompactionSummary:
+    started = time.perf_counter()
+    report = await get_async_vector_store_service().compact()
+    upload_bytes = await asyncio.to_thread(sweep_orphaned_uploads, upload_min_age_seconds)
+    summary = CompactionSummary(
+        vectors_compacted=report.vectors_compacted,
+        vector_bytes_reclaimed=report.vector_bytes_reclaimed,
+        sidecar_bytes_reclaimed=report.sidecar_bytes_reclaimed,
+        upload_bytes_reclaimed=upload_bytes,
+        elapsed_seconds=time.perf_counter() - started,
+    )
+    logger.info("Compaction reclaimed %d bytes in %.1fs", summary.bytes_reclaimed, summary.elapsed_seconds)
+    return summary
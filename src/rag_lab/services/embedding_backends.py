@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import re
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+from uuid import uuid4
+
+from rag_lab.core.config import settings
+from rag_lab.db.locks import exclusive_file_lock
+
+logger = logging.getLogger(__name__)
+
+ONNX_DIR_NAME = "onnx"
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model.int8.onnx"
+ONNX_EXPORT_LOCK_FILE = "export.lock"
+HASH_EMBEDDING_DIM = 384
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class Embeddings(Protocol):
+    def embed_documents(self, texts: list[str]) -> list[list[float]]: ...
+
+    def embed_query(self, text: str) -> list[float]: ...
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]: ...
+
+
+@dataclass(frozen=True)
+class AgreementReport:
+    samples: int
+    mean_cosine: float
+    min_cosine: float
+
+
+def plan_batches(lengths: Sequence[int], max_batch_tokens: int) -> list[list[int]]:
+    """Group text indices by length into batches whose padded size stays under ``max_batch_tokens``."""
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index])
+    batches: list[list[int]] = []
+    current: list[int] = []
+    longest = 0
+    for index in order:
+        candidate_longest = max(longest, lengths[index], 1)
+        if current and candidate_longest * (len(current) + 1) > max_batch_tokens:
+            batches.append(current)
+            current, candidate_longest = [], max(lengths[index], 1)
+        current.append(index)
+        longest = candidate_longest
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _normalize(vector: Sequence[float]) -> list[float]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def cosine_agreement(reference: Embeddings, candidate: Embeddings, texts: list[str]) -> AgreementReport:
+    """Compare two embedding backends on the same texts (1.0 means identical directions)."""
+    expected = reference.embed_documents(texts)
+    actual = candidate.embed_documents(texts)
+    cosines = [
+        sum(a * b for a, b in zip(_normalize(left), _normalize(right), strict=True))
+        for left, right in zip(expected, actual, strict=True)
+    ]
+    return AgreementReport(
+        samples=len(cosines),
+        mean_cosine=sum(cosines) / len(cosines) if cosines else 1.0,
+        min_cosine=min(cosines, default=1.0),
+    )
+
+
+@contextmanager
+def _replacing(path: Path) -> Iterator[Path]:
+    """Yield a temp path next to ``path`` and move it into place only if the block succeeds."""
+    temp_path = path.with_name(f".{uuid4().hex}.{path.name}")
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+class OnnxEmbeddings:
+    """Mean-pooled sentence embeddings on ONNX Runtime, exported (and optionally int8-quantized) once."""
+
+    def __init__(
+        self,
+        model_name: str,
+        *,
+        cache_dir: Path,
+        quantize: bool,
+        intra_op_threads: int,
+        max_batch_tokens: int,
+        max_seq_length: int,
+    ) -> None:
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ModuleNotFoundError as exc:
+            raise RuntimeError("The ONNX embedding backend requires the rag-lab[onnx] extra") from exc
+
+        self._np = np
+        self._max_batch_tokens = max_batch_tokens
+        self._max_seq_length = max_seq_length
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        model_path = self._ensure_model(model_name, cache_dir, quantize)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self._session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {item.name for item in self._session.get_inputs()}
+
+    def _ensure_model(self, model_name: str, cache_dir: Path, quantize: bool) -> Path:
+        model_dir = cache_dir / model_name.replace("/", "__")
+        fp32_path = model_dir / ONNX_MODEL_FILE
+        int8_path = model_dir / ONNX_QUANTIZED_MODEL_FILE
+        model_path = int8_path if quantize else fp32_path
+        if model_path.exists():
+            return model_path
+        # Workers starting together export once; the others wait and load the finished file.
+        with exclusive_file_lock(model_dir / ONNX_EXPORT_LOCK_FILE):
+            if not fp32_path.exists():
+                self._export(model_name, fp32_path)
+            if quantize and not int8_path.exists():
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                logger.info("Quantizing %s to int8", fp32_path)
+                with _replacing(int8_path) as temp_path:
+                    quantize_dynamic(str(fp32_path), str(temp_path), weight_type=QuantType.QInt8)
+        return model_path
+
+    def _export(self, model_name: str, path: Path) -> None:
+        try:
+            import torch
+            from transformers import AutoModel
+        except ModuleNotFoundError as exc:
+            raise RuntimeError("Exporting the ONNX model requires torch and transformers") from exc
+
+        logger.info("Exporting %s to ONNX at %s", model_name, path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        model = AutoModel.from_pretrained(model_name).eval()
+        sample = self._tokenizer(["warm-up"], return_tensors="pt")
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad(), _replacing(path) as temp_path:
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in names),
+                str(temp_path),
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+            )
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        np = self._np
+        if not texts:
+            return []
+
+        lengths = [
+            min(len(ids), self._max_seq_length)
+            for ids in self._tokenizer(texts, add_special_tokens=True, truncation=False)["input_ids"]
+        ]
+        results: list[list[float]] = [[] for _ in texts]
+        for batch in plan_batches(lengths, self._max_batch_tokens):
+            encoded = self._tokenizer(
+                [texts[index] for index in batch],
+                padding=True,
+                truncation=True,
+                max_length=self._max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+            (hidden,) = self._session.run(["last_hidden_state"], feeds)
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for index, vector in zip(batch, pooled.tolist(), strict=True):
+                results[index] = vector
+        return results
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class HashEmbeddings:
+    """Deterministic bag-of-words feature hashing for benchmarks and tests; no model needed."""
+
+    def __init__(self, dim: int = HASH_EMBEDDING_DIM) -> None:
+        self._dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self._dim
+        for word in _WORD_PATTERN.findall(text.casefold()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self._dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(vector)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+
+class _LangChainEmbeddings:
+    """Adds batched query embedding to a LangChain ``Embeddings``."""
+
+    def __init__(self, embeddings: Any) -> None:
+        self._embeddings = embeddings
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embeddings.embed_query(text)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        # Without query-specific encode kwargs LangChain encodes a query exactly like a document.
+        if not getattr(self._embeddings, "query_encode_kwargs", None):
+            return self._embeddings.embed_documents(texts)
+        return [self._embeddings.embed_query(text) for text in texts]
+
+
+def create_huggingface_embeddings(model_name: str) -> Embeddings:
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ModuleNotFoundError as exc:
+        raise RuntimeError("LangChain vector store dependencies are not installed") from exc
+
+    return _LangChainEmbeddings(
+        HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True},
+        )
+    )
+
+
+def create_embeddings(kind: str | None = None, model_name: str | None = None) -> Embeddings:
+    """Build the embedder for ``kind``; without one, use the embedding server when it is configured."""
+    model_name = model_name or settings.embedding_model_name
+    if kind is None and settings.embedding_server_socket is not None:
+        from rag_lab.services.embedding_server import EmbeddingClient
+
+        return EmbeddingClient(
+            settings.embedding_server_socket,
+            model_name,
+            timeout_seconds=settings.embedding_server_timeout_seconds,
+        )
+    kind = kind or settings.embedding_backend
+    if kind == "huggingface":
+        return create_huggingface_embeddings(model_name)
+    if kind == "onnx":
+        return OnnxEmbeddings(
+            model_name,
+            cache_dir=settings.data_dir / ONNX_DIR_NAME,
+            quantize=settings.onnx_quantize,
+            intra_op_threads=settings.onnx_intra_op_threads,
+            max_batch_tokens=settings.embedding_batch_tokens,
+            max_seq_length=settings.embedding_max_seq_length,
+        )
+    if kind == "hash":
+        return HashEmbeddings()
+    raise ValueError(f"Unknown embedding backend '{kind}'")
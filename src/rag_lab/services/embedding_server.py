@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from rag_lab.core.config import settings
+from rag_lab.services.embedding_backends import Embeddings, create_embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_SOCKET_NAME = "embedding.sock"
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Frames are a 4-byte big-endian length followed by the payload. A request is one
+# JSON frame {"model", "texts", "queries"}; a reply is a JSON header {"count", "dim"} followed
+# by one frame of native float32 values, or a single {"error"} frame.
+_LENGTH = struct.Struct("!I")
+
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+
+def default_socket_path() -> Path:
+    return settings.embedding_server_socket or settings.data_dir / EMBEDDING_SOCKET_NAME
+
+
+def _frame(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _pack_vectors(vectors: list[list[float]]) -> tuple[dict[str, int], bytes]:
+    dim = len(vectors[0]) if vectors else 0
+    return {"count": len(vectors), "dim": dim}, array("f", (value for vector in vectors for value in vector)).tobytes()
+
+
+def _unpack_vectors(header: dict[str, Any], payload: bytes) -> list[list[float]]:
+    values = array("f")
+    values.frombytes(payload)
+    count, dim = int(header["count"]), int(header["dim"])
+    if len(values) != count * dim:
+        raise EmbeddingServerError(f"Embedding server sent {len(values)} values for {count}x{dim} vectors")
+    return [values[index * dim : (index + 1) * dim].tolist() for index in range(count)]
+
+
+@dataclass
+class _PendingRequest:
+    texts: list[str]
+    future: asyncio.Future[list[list[float]]] = field(repr=False)
+
+
+class MicroBatcher:
+    """Merge requests arriving within ``window_seconds`` into one model call."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        *,
+        window_seconds: float,
+        max_batch_texts: int,
+        executor: ThreadPoolExecutor,
+        queries: bool = False,
+    ) -> None:
+        self._embed = embeddings.embed_queries if queries else embeddings.embed_documents
+        self._window_seconds = window_seconds
+        self._max_batch_texts = max(max_batch_texts, 1)
+        self._executor = executor
+        self._queue: asyncio.Queue[_PendingRequest] = asyncio.Queue()
+        self._worker: asyncio.Task[None] | None = None
+        self.batches = 0
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        request = _PendingRequest(texts, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(request)
+        return await request.future
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+
+    async def _collect(self) -> list[_PendingRequest]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = loop.time() + self._window_seconds
+        while size < self._max_batch_texts:
+            remaining = deadline - loop.time()
+            try:
+                if remaining > 0:
+                    request = await asyncio.wait_for(self._queue.get(), remaining)
+                else:
+                    request = self._queue.get_nowait()
+            except (TimeoutError, asyncio.QueueEmpty):
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [request for request in await self._collect() if not request.future.done()]
+            if not batch:
+                continue
+            texts = [text for request in batch for text in request.texts]
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._embed, texts)
+            except Exception as exc:  # noqa: BLE001
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(exc)
+                continue
+            self.batches += 1
+            logger.debug(
+                "Embedded %d texts from %d requests in %.1f ms",
+                len(texts),
+                len(batch),
+                (time.perf_counter() - started) * 1000,
+            )
+            offset = 0
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(vectors[offset : offset + len(request.texts)])
+                offset += len(request.texts)
+
+
+class EmbeddingServer:
+    """Serve one embedding model per model name to every API worker over a Unix socket."""
+
+    def __init__(
+        self,
+        socket_path: Path,
+        *,
+        window_seconds: float,
+        max_batch_texts: int,
+        embeddings_factory: Callable[[str], Embeddings] | None = None,
+    ) -> None:
+        self.socket_path = socket_path
+        self._window_seconds = window_seconds
+        self._max_batch_texts = max_batch_texts
+        self._embeddings_factory = embeddings_factory or (
+            lambda model_name: create_embeddings(settings.embedding_backend, model_name)
+        )
+        # One inference thread: the model parallelizes internally.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-server")
+        self._models: dict[str, Embeddings] = {}
+        self._batchers: dict[tuple[str, bool], MicroBatcher] = {}
+        self._load_lock = asyncio.Lock()
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    async def preload(self, model_name: str) -> None:
+        await self._batcher(model_name, queries=False)
+
+    async def _batcher(self, model_name: str, *, queries: bool) -> MicroBatcher:
+        batcher = self._batchers.get((model_name, queries))
+        if batcher is not None:
+            return batcher
+        async with self._load_lock:
+            if model_name not in self._models:
+                logger.info("Loading embedding model %s", model_name)
+                self._models[model_name] = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._embeddings_factory, model_name
+                )
+            if (model_name, queries) not in self._batchers:
+                self._batchers[(model_name, queries)] = MicroBatcher(
+                    self._models[model_name],
+                    window_seconds=self._window_seconds,
+                    max_batch_texts=self._max_batch_texts,
+                    executor=self._executor,
+                    queries=queries,
+                )
+            return self._batchers[(model_name, queries)]
+
+    async def _reply(self, request: dict[str, Any]) -> list[bytes]:
+        try:
+            model_name = str(request["model"])
+            texts = [str(text) for text in request["texts"]]
+            batcher = await self._batcher(model_name, queries=bool(request.get("queries", False)))
+            vectors = await batcher.embed(texts)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Embedding request failed")
+            return [_frame(json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode())]
+        header, payload = _pack_vectors(vectors)
+        return [_frame(json.dumps(header).encode()), _frame(payload)]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                except asyncio.IncompleteReadError:
+                    return
+                if length > MAX_FRAME_BYTES:
+                    logger.warning("Dropping client that sent a %d byte frame", length)
+                    return
+                request = json.loads(await reader.readexactly(length))
+                writer.writelines(await self._reply(request))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    def _clear_stale_socket(self) -> None:
+        if not self.socket_path.exists():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self.socket_path))
+            except OSError:
+                self.socket_path.unlink()
+                return
+        raise RuntimeError(f"An embedding server is already listening on {self.socket_path}")
+
+    async def start(self) -> None:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self._clear_stale_socket()
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Embedding server listening on %s", self.socket_path)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # API workers keep their connections open; wait_closed() would wait for them.
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        batchers, self._batchers, self._models = list(self._batchers.values()), {}, {}
+        for batcher in batchers:
+            await batcher.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.socket_path.unlink(missing_ok=True)
+
+
+def run_embedding_server(socket_path: Path | None = None, preload: bool = True) -> None:
+    server = EmbeddingServer(
+        socket_path or default_socket_path(),
+        window_seconds=settings.embedding_server_batch_window_ms / 1000,
+        max_batch_texts=settings.embedding_server_max_batch_texts,
+    )
+
+    async def _serve() -> None:
+        serving = asyncio.current_task()
+        assert serving is not None
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+        await server.start()
+        try:
+            if preload:
+                await server.preload(settings.embedding_model_name)
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            logger.info("Embedding server stopped")
+        finally:
+            await server.close()
+
+    asyncio.run(_serve())
+
+
+class EmbeddingClient:
+    """``Embeddings`` served by the shared embedding server, one connection per thread."""
+
+    def __init__(self, socket_path: Path, model_name: str, *, timeout_seconds: float) -> None:
+        self._socket_path = socket_path
+        self._model_name = model_name
+        self._timeout_seconds = timeout_seconds
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        connection: socket.socket | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self._timeout_seconds)
+            try:
+                connection.connect(str(self._socket_path))
+            except OSError as exc:
+                connection.close()
+                raise EmbeddingServerError(f"Embedding server is not reachable at {self._socket_path}") from exc
+            self._local.connection = connection
+        return connection
+
+    def _disconnect(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    @staticmethod
+    def _read_frame(connection: socket.socket) -> bytes:
+        header = connection.recv(_LENGTH.size, socket.MSG_WAITALL)
+        if len(header) < _LENGTH.size:
+            raise ConnectionResetError("Embedding server closed the connection")
+        (length,) = _LENGTH.unpack(header)
+        payload = connection.recv(length, socket.MSG_WAITALL) if length else b""
+        if len(payload) < length:
+            raise ConnectionResetError("Embedding server closed the connection")
+        return payload
+
+    def _exchange(self, request: bytes) -> list[list[float]]:
+        connection = self._connection()
+        connection.sendall(request)
+        header = json.loads(self._read_frame(connection))
+        if "error" in header:
+            raise EmbeddingServerError(f"Embedding server failed: {header['error']}")
+        return _unpack_vectors(header, self._read_frame(connection))
+
+    def _embed(self, texts: list[str], *, queries: bool) -> list[list[float]]:
+        if not texts:
+            return []
+        request = _frame(json.dumps({"model": self._model_name, "texts": texts, "queries": queries}).encode())
+        try:
+            return self._exchange(request)
+        except TimeoutError as exc:
+            # The reply may still arrive later; the connection can no longer be trusted.
+            self._disconnect()
+            raise EmbeddingServerError("Embedding server timed out") from exc
+        except (ConnectionError, OSError):
+            # Most likely a connection left over from before a server restart: retry once.
+            self._disconnect()
+        try:
+            return self._exchange(request)
+        except OSError as exc:
+            self._disconnect()
+            raise EmbeddingServerError(f"Embedding server request failed: {exc}") from exc
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, queries=False)
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, queries=True)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_queries([text])[0]
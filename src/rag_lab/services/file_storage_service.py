@@ -2,17 +2,34 @@ from __future__ import annotations
 
 import hashlib
 import json
+import logging
+import mimetypes
+import re
+import threading
+import time
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import Any
 from uuid import uuid4
 
 from fastapi import UploadFile
 
 from rag_lab.core.config import ensure_runtime_directories, settings
+from rag_lab.core.metrics import INGESTED_BYTES, timed
+from rag_lab.db.locks import exclusive_file_lock
+from rag_lab.db.sqlite import connect
+from rag_lab.services.retrieval_filter import RetrievalFilter
 
 SUPPORTED_EXTENSIONS = {".txt", ".md", ".pdf"}
 MANIFEST_PATH = "manifest.json"
+METADATA_DB_NAME = "documents.sqlite3"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+# Names this module gives stored uploads, their sidecars and in-progress temp files.
+_STORED_NAME = re.compile(r"^(?:[0-9a-f]{12}-[0-9a-f]{32}\.\w+(?:\.json)?|\.upload-[0-9a-f]{32}\.\w+\.part)$")
 
 
 class FileStorageError(Exception):
@@ -34,80 +51,256 @@ class StoredFile:
     is_duplicate: bool
 
 
-def _manifest_file_path() -> Path:
-    return settings.uploads_dir / MANIFEST_PATH
+@dataclass(frozen=True)
+class IndexState:
+    fingerprint: str
+    chunks_count: int
+    indexed_at: str
 
 
-def _read_manifest() -> dict[str, dict[str, str | int]]:
-    path = _manifest_file_path()
-    if not path.exists():
-        return {}
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    file_hash TEXT NOT NULL,
+    original_filename TEXT NOT NULL,
+    stored_path TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    index_fingerprint TEXT,
+    chunks_count INTEGER NOT NULL DEFAULT 0,
+    indexed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_documents_file_hash ON documents (file_hash);
+"""
 
-    try:
-        raw = path.read_text(encoding="utf-8")
-        data = json.loads(raw)
-    except (OSError, json.JSONDecodeError):
-        return {}
 
-    if isinstance(data, dict):
-        return data
+class DocumentMetadataStore:
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
 
-    return {}
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
 
+    def get(self, doc_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return dict(row) if row is not None else None
 
-def _write_manifest(manifest: dict[str, dict[str, str | int]]) -> None:
-    path = _manifest_file_path()
-    path.write_text(
-        json.dumps(manifest, ensure_ascii=True, indent=2, sort_keys=True),
-        encoding="utf-8",
-    )
+    def list_documents(self, *, offset: int = 0, limit: int | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM documents ORDER BY uploaded_at, doc_id LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
 
+    def count(self) -> int:
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()
+        return int(row[0])
 
-async def save_upload(upload_file: UploadFile) -> StoredFile:
+    def delete(self, doc_ids: list[str]) -> list[dict[str, Any]]:
+        """Delete several document rows in one transaction and return the rows removed."""
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "DELETE FROM documents WHERE doc_id IN (SELECT value FROM json_each(?)) RETURNING *",
+                (json.dumps(doc_ids),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def matching_doc_ids(self, scope: RetrievalFilter) -> set[str]:
+        clauses: list[str] = []
+        params: list[str] = []
+        if scope.doc_ids is not None:
+            clauses.append("doc_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sorted(scope.doc_ids)))
+        if scope.file_name_pattern is not None:
+            clauses.append("original_filename GLOB ?")
+            params.append(scope.file_name_pattern)
+        if scope.uploaded_after is not None:
+            clauses.append("uploaded_at >= ?")
+            params.append(scope.uploaded_after)
+        if scope.uploaded_before is not None:
+            clauses.append("uploaded_at < ?")
+            params.append(scope.uploaded_before)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connection.execute(f"SELECT doc_id FROM documents{where}", params).fetchall()
+        return {str(row[0]) for row in rows}
+
+    def insert(self, metadata: dict[str, Any]) -> bool:
+        """Insert a new document row; return False if ``doc_id`` is already present."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO documents (doc_id, file_hash, original_filename, stored_path, content_type, "
+                "size_bytes, uploaded_at) VALUES (:doc_id, :file_hash, :original_filename, :stored_path, "
+                ":content_type, :size_bytes, :uploaded_at) ON CONFLICT(doc_id) DO NOTHING",
+                metadata,
+            )
+        return cursor.rowcount == 1
+
+    def replace(self, metadata: dict[str, Any]) -> None:
+        """Overwrite a document row, clearing its index state."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, file_hash, original_filename, stored_path, "
+                "content_type, size_bytes, uploaded_at) VALUES (:doc_id, :file_hash, :original_filename, "
+                ":stored_path, :content_type, :size_bytes, :uploaded_at)",
+                metadata,
+            )
+
+    def mark_indexed(self, doc_id: str, fingerprint: str, chunks_count: int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE documents SET index_fingerprint = ?, chunks_count = ?, indexed_at = ? WHERE doc_id = ?",
+                (fingerprint, chunks_count, datetime.now(UTC).isoformat(), doc_id),
+            )
+
+    def migrate_manifest(self, manifest_path: Path) -> int:
+        """Import a legacy ``manifest.json`` once, then rename it out of the way."""
+        if not manifest_path.exists():
+            return 0
+        # Workers starting together would otherwise each import it and race to rename it.
+        with exclusive_file_lock(manifest_path.with_name(manifest_path.name + ".lock")):
+            if not manifest_path.exists():
+                return 0
+            return self._import_manifest(manifest_path)
+
+    def _import_manifest(self, manifest_path: Path) -> int:
+        try:
+            data = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            logger.exception("Could not read legacy manifest %s; leaving it in place", manifest_path)
+            return 0
+        if not isinstance(data, dict):
+            logger.error("Legacy manifest %s is not a JSON object; leaving it in place", manifest_path)
+            return 0
+
+        rows = []
+        for key, entry in data.items():
+            try:
+                rows.append(
+                    {
+                        "doc_id": str(entry["doc_id"]),
+                        "file_hash": str(entry["file_hash"]),
+                        "original_filename": str(entry["original_filename"]),
+                        "stored_path": str(entry["stored_path"]),
+                        "content_type": str(entry["content_type"]),
+                        "size_bytes": int(entry["size_bytes"]),
+                        "uploaded_at": str(entry["uploaded_at"]),
+                        "index_fingerprint": entry.get("index_fingerprint"),
+                        "chunks_count": int(entry.get("chunks_count", 0)),
+                        "indexed_at": entry.get("indexed_at"),
+                    }
+                )
+            except (KeyError, TypeError, ValueError, AttributeError):
+                logger.warning("Skipping malformed legacy manifest entry %r", key)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO documents (doc_id, file_hash, original_filename, stored_path, "
+                "content_type, size_bytes, uploaded_at, index_fingerprint, chunks_count, indexed_at) "
+                "VALUES (:doc_id, :file_hash, :original_filename, :stored_path, :content_type, :size_bytes, "
+                ":uploaded_at, :index_fingerprint, :chunks_count, :indexed_at)",
+                rows,
+            )
+        manifest_path.replace(manifest_path.with_suffix(manifest_path.suffix + ".migrated"))
+        return len(rows)
+
+
+_metadata_stores: dict[Path, DocumentMetadataStore] = {}
+_metadata_stores_lock = threading.Lock()
+
+
+def get_metadata_store() -> DocumentMetadataStore:
     ensure_runtime_directories()
+    path = settings.uploads_dir / METADATA_DB_NAME
+    with _metadata_stores_lock:
+        store = _metadata_stores.get(path)
+        if store is None:
+            store = DocumentMetadataStore(path)
+            store.migrate_manifest(settings.uploads_dir / MANIFEST_PATH)
+            _metadata_stores[path] = store
+    return store
 
-    original_filename = upload_file.filename or ""
-    suffix = Path(original_filename).suffix.lower()
+
+def _stored_file_from_row(row: dict[str, Any], *, is_duplicate: bool) -> StoredFile:
+    return StoredFile(
+        doc_id=str(row["doc_id"]),
+        file_hash=str(row["file_hash"]),
+        original_filename=str(row["original_filename"]),
+        stored_path=Path(str(row["stored_path"])),
+        content_type=str(row["content_type"]),
+        size_bytes=int(row["size_bytes"]),
+        uploaded_at=str(row["uploaded_at"]),
+        is_duplicate=is_duplicate,
+    )
+
+
+def _size_limit_error() -> FileStorageError:
+    return FileStorageError(
+        413,
+        f"Uploaded file exceeds size limit ({settings.max_upload_size_bytes} bytes)",
+    )
+
+
+async def _stream_to_file(upload_file: UploadFile, path: Path) -> tuple[str, int]:
+    """Copy an upload to ``path`` in chunks, hashing it and failing with 413 once it exceeds the limit."""
+    hasher = hashlib.sha256()
+    size_bytes = 0
+    with path.open("wb") as file_handle:
+        while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+            size_bytes += len(chunk)
+            if size_bytes > settings.max_upload_size_bytes:
+                raise _size_limit_error()
+            hasher.update(chunk)
+            file_handle.write(chunk)
+    return hasher.hexdigest(), size_bytes
+
+
+def _validated_suffix(filename: str) -> str:
+    suffix = Path(filename).suffix.lower()
     if suffix not in SUPPORTED_EXTENSIONS:
         raise FileStorageError(
             400,
             f"Unsupported file extension '{suffix or '<none>'}'. "
             f"Allowed: {', '.join(sorted(SUPPORTED_EXTENSIONS))}",
         )
+    return suffix
 
-    content = await upload_file.read()
-    if not content:
-        raise FileStorageError(400, "Uploaded file is empty")
-    if len(content) > settings.max_upload_size_bytes:
-        raise FileStorageError(
-            413,
-            f"Uploaded file exceeds size limit ({settings.max_upload_size_bytes} bytes)",
-        )
 
-    file_hash = hashlib.sha256(content).hexdigest()
-    doc_id = file_hash
-    manifest = _read_manifest()
-    existing = manifest.get(doc_id)
-    if existing:
-        existing_path = Path(str(existing["stored_path"]))
-        if existing_path.exists():
-            return StoredFile(
-                doc_id=doc_id,
-                file_hash=file_hash,
-                original_filename=str(existing["original_filename"]),
-                stored_path=existing_path,
-                content_type=str(existing["content_type"]),
-                size_bytes=int(existing["size_bytes"]),
-                uploaded_at=str(existing["uploaded_at"]),
-                is_duplicate=True,
-            )
+def _commit_stored_file(
+    temp_path: Path,
+    *,
+    file_hash: str,
+    size_bytes: int,
+    original_filename: str,
+    suffix: str,
+    content_type: str,
+) -> StoredFile:
+    """Move a fully written temp file into place and record it, or reuse a stored copy."""
+    try:
+        if size_bytes == 0:
+            raise FileStorageError(400, "Uploaded file is empty")
+
+        doc_id = file_hash
+        store = get_metadata_store()
+        existing = store.get(doc_id)
+        if existing and Path(str(existing["stored_path"])).exists():
+            return _stored_file_from_row(existing, is_duplicate=True)
 
-    stored_name = f"{doc_id[:12]}-{uuid4().hex}{suffix}"
-    stored_path = settings.uploads_dir / stored_name
-    stored_path.write_bytes(content)
+        stored_name = f"{doc_id[:12]}-{uuid4().hex}{suffix}"
+        stored_path = settings.uploads_dir / stored_name
+        temp_path.replace(stored_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
 
     uploaded_at = datetime.now(UTC).isoformat()
-    content_type = upload_file.content_type or "application/octet-stream"
 
     metadata = {
         "doc_id": doc_id,
@@ -115,15 +308,24 @@ async def save_upload(upload_file: UploadFile) -> StoredFile:
         "original_filename": original_filename,
         "stored_path": str(stored_path),
         "content_type": content_type,
-        "size_bytes": len(content),
+        "size_bytes": size_bytes,
         "uploaded_at": uploaded_at,
     }
-    manifest[doc_id] = metadata
-    _write_manifest(manifest)
+    if existing:
+        store.replace(metadata)
+    elif not store.insert(metadata):
+        # A concurrent upload of the same content won the insert; keep its copy.
+        stored_path.unlink(missing_ok=True)
+        winner = store.get(doc_id)
+        if winner is None:
+            raise FileStorageError(500, "Failed to record uploaded file metadata")
+        return _stored_file_from_row(winner, is_duplicate=True)
+
     stored_path.with_suffix(stored_path.suffix + ".json").write_text(
         json.dumps(metadata, ensure_ascii=True, indent=2, sort_keys=True),
         encoding="utf-8",
     )
+    INGESTED_BYTES.inc(size_bytes)
 
     return StoredFile(
         doc_id=doc_id,
@@ -131,7 +333,130 @@ async def save_upload(upload_file: UploadFile) -> StoredFile:
         original_filename=original_filename,
         stored_path=stored_path,
         content_type=content_type,
-        size_bytes=len(content),
+        size_bytes=size_bytes,
         uploaded_at=uploaded_at,
         is_duplicate=False,
     )
+
+
+async def save_upload(upload_file: UploadFile) -> StoredFile:
+    ensure_runtime_directories()
+
+    original_filename = upload_file.filename or ""
+    suffix = _validated_suffix(original_filename)
+
+    if upload_file.size is not None and upload_file.size > settings.max_upload_size_bytes:
+        raise _size_limit_error()
+
+    temp_path = settings.uploads_dir / f".upload-{uuid4().hex}{suffix}.part"
+    try:
+        with timed("ingestion", "save"):
+            file_hash, size_bytes = await _stream_to_file(upload_file, temp_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return _commit_stored_file(
+        temp_path,
+        file_hash=file_hash,
+        size_bytes=size_bytes,
+        original_filename=original_filename,
+        suffix=suffix,
+        content_type=upload_file.content_type or "application/octet-stream",
+    )
+
+
+def _copy_to_file(source: Path, path: Path, max_size_bytes: int | None) -> tuple[str, int]:
+    hasher = hashlib.sha256()
+    size_bytes = 0
+    with source.open("rb") as source_handle, path.open("wb") as file_handle:
+        while chunk := source_handle.read(UPLOAD_CHUNK_SIZE):
+            size_bytes += len(chunk)
+            if max_size_bytes is not None and size_bytes > max_size_bytes:
+                raise FileStorageError(413, f"File exceeds size limit ({max_size_bytes} bytes)")
+            hasher.update(chunk)
+            file_handle.write(chunk)
+    return hasher.hexdigest(), size_bytes
+
+
+def save_local_file(source: Path, *, max_size_bytes: int | None = None) -> StoredFile:
+    """Store a local file exactly like an upload of it (no size limit unless ``max_size_bytes`` is given)."""
+    ensure_runtime_directories()
+    suffix = _validated_suffix(source.name)
+
+    temp_path = settings.uploads_dir / f".upload-{uuid4().hex}{suffix}.part"
+    try:
+        with timed("ingestion", "save"):
+            file_hash, size_bytes = _copy_to_file(source, temp_path, max_size_bytes)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    return _commit_stored_file(
+        temp_path,
+        file_hash=file_hash,
+        size_bytes=size_bytes,
+        original_filename=source.name,
+        suffix=suffix,
+        content_type=mimetypes.guess_type(source.name)[0] or "application/octet-stream",
+    )
+
+
+def list_stored_files() -> list[StoredFile]:
+    return [_stored_file_from_row(row, is_duplicate=False) for row in get_metadata_store().list_documents()]
+
+
+def _sidecar_path(stored_path: Path) -> Path:
+    return stored_path.with_suffix(stored_path.suffix + ".json")
+
+
+def _remove(path: Path) -> int:
+    try:
+        size = path.stat().st_size
+        path.unlink()
+    except FileNotFoundError:
+        return 0
+    return size
+
+
+def delete_stored_files(doc_ids: list[str]) -> list[StoredFile]:
+    """Drop the metadata rows, files and sidecars of ``doc_ids``; returns the documents that existed."""
+    rows = get_metadata_store().delete(doc_ids)
+    for row in rows:
+        stored_path = Path(str(row["stored_path"]))
+        _remove(stored_path)
+        _remove(_sidecar_path(stored_path))
+    return [_stored_file_from_row(row, is_duplicate=False) for row in rows]
+
+
+def sweep_orphaned_uploads(min_age_seconds: float = 3600.0) -> int:
+    """Delete unreferenced stored files older than ``min_age_seconds``; returns bytes freed."""
+    referenced: set[str] = set()
+    for row in get_metadata_store().list_documents():
+        stored_path = Path(str(row["stored_path"]))
+        referenced.update((stored_path.name, _sidecar_path(stored_path).name))
+
+    cutoff = time.time() - min_age_seconds
+    freed = 0
+    for path in settings.uploads_dir.iterdir():
+        if not _STORED_NAME.match(path.name) or path.name in referenced or not path.is_file():
+            continue
+        if path.stat().st_mtime <= cutoff:
+            freed += _remove(path)
+    return freed
+
+
+def get_index_state(doc_id: str) -> IndexState | None:
+    row = get_metadata_store().get(doc_id)
+    if row is None or row["index_fingerprint"] is None:
+        return None
+
+    return IndexState(
+        fingerprint=str(row["index_fingerprint"]),
+        chunks_count=int(row["chunks_count"]),
+        indexed_at=str(row["indexed_at"] or ""),
+    )
+
+
+def mark_indexed(doc_id: str, fingerprint: str, chunks_count: int) -> None:
+    get_metadata_store().mark_indexed(doc_id, fingerprint, chunks_count)
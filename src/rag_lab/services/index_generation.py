@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from uuid import uuid4
+
+from rag_lab.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GENERATION_FILE_NAME = "index_generation"
+
+DocumentsChangedListener = Callable[[list[str]], None]
+
+
+class IndexGeneration:
+    """Token, shared through a file, that changes whenever indexed content changes."""
+
+    def __init__(self) -> None:
+        self._listeners: list[DocumentsChangedListener] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _path() -> Path:
+        return settings.vector_store_dir / GENERATION_FILE_NAME
+
+    def current(self) -> str:
+        try:
+            return self._path().read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return ""
+
+    def bump(self, doc_ids: Iterable[str]) -> str:
+        token = uuid4().hex
+        path = self._path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{token}")
+        temp_path.write_text(token, encoding="utf-8")
+        os.replace(temp_path, path)
+
+        changed = list(doc_ids)
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(changed)
+            except Exception:  # noqa: BLE001
+                logger.exception("Index change listener failed")
+        return token
+
+    def subscribe(self, listener: DocumentsChangedListener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+
+_index_generation = IndexGeneration()
+
+
+def get_index_generation() -> IndexGeneration:
+    return _index_generation
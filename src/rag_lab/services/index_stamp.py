@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from uuid import uuid4
+
+from rag_lab.core.config import index_fingerprint, settings
+from rag_lab.services.vector_backends import DEFAULT_COLLECTION
+
+STAMP_FILE_NAME = "index_stamp.json"
+COLLECTIONS_DIR_NAME = "collections"
+
+
+@dataclass(frozen=True)
+class IndexStamp:
+    """Which collection is being served and the configuration that built it."""
+
+    collection: str
+    fingerprint: str
+    embedding_model_name: str
+
+
+# ((path, inode, mtime_ns), stamp) of the last stamp file read.
+_cached_stamp: tuple[tuple[str, int, int], IndexStamp] | None = None
+
+
+def _stamp_path() -> Path:
+    return settings.vector_store_dir / STAMP_FILE_NAME
+
+
+def write_stamp(stamp: IndexStamp) -> None:
+    """Atomically point every worker sharing the vector store at ``stamp``."""
+    path = _stamp_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{uuid4().hex}")
+    temp_path.write_text(json.dumps(asdict(stamp), sort_keys=True), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def current_stamp() -> IndexStamp:
+    """Return the active stamp, re-reading the file only after it changed; never writes."""
+    global _cached_stamp
+    path = _stamp_path()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return target_stamp(DEFAULT_COLLECTION)
+    key = (str(path), stat.st_ino, stat.st_mtime_ns)
+    cached = _cached_stamp
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return target_stamp(DEFAULT_COLLECTION)
+    stamp = IndexStamp(
+        collection=str(data["collection"]),
+        fingerprint=str(data["fingerprint"]),
+        embedding_model_name=str(data["embedding_model_name"]),
+    )
+    _cached_stamp = (key, stamp)
+    return stamp
+
+
+def ensure_stamp() -> IndexStamp:
+    """Return the active stamp, first stamping an unstamped legacy index with the current settings."""
+    if not _stamp_path().exists():
+        write_stamp(target_stamp(DEFAULT_COLLECTION))
+    return current_stamp()
+
+
+def target_stamp(collection: str | None = None) -> IndexStamp:
+    fingerprint = index_fingerprint()
+    return IndexStamp(
+        collection=collection or f"{DEFAULT_COLLECTION}_{fingerprint}",
+        fingerprint=fingerprint,
+        embedding_model_name=settings.embedding_model_name,
+    )
+
+
+def is_stale() -> bool:
+    return current_stamp().fingerprint != index_fingerprint()
+
+
+def collection_dir(collection: str) -> Path:
+    """Directory for a collection's sidecar indexes (the default collection keeps the legacy layout)."""
+    if collection == DEFAULT_COLLECTION:
+        return settings.vector_store_dir
+    return settings.vector_store_dir / COLLECTIONS_DIR_NAME / collection
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Literal
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+from rag_lab.core.config import settings
+from rag_lab.db.sqlite import connect
+from rag_lab.services.file_storage_service import FileStorageError, StoredFile, save_upload
+from rag_lab.services.ingestion_service import IngestionError, index_stored_file
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB_NAME = "ingestion_jobs.sqlite3"
+JOB_STAGES = ("extracting", "chunking", "embedding")
+
+JobStatus = Literal["queued", "running", "completed", "failed"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    original_filename TEXT NOT NULL,
+    stored_path TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    uploaded_at TEXT NOT NULL,
+    is_duplicate INTEGER NOT NULL,
+    chunks_count INTEGER NOT NULL DEFAULT 0,
+    detail TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    owner TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_ingestion_jobs_status ON ingestion_jobs (status, created_at);
+"""
+
+_LEASE_COLUMNS = {"owner": "TEXT", "lease_expires_at": "REAL"}
+
+
+@dataclass(frozen=True)
+class IngestionJob:
+    job_id: str
+    status: JobStatus
+    stage: str
+    stored_file: StoredFile
+    chunks_count: int
+    detail: str | None
+    created_at: str
+    updated_at: str
+    stages: dict[str, dict[str, str | None]] = field(default_factory=dict)
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def _initial_stages() -> dict[str, dict[str, str | None]]:
+    return {name: {"status": "pending", "started_at": None, "finished_at": None} for name in JOB_STAGES}
+
+
+class IngestionJobStore:
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+            existing = {row["name"] for row in self._connection.execute("PRAGMA table_info(ingestion_jobs)")}
+            with self._connection:
+                for name, kind in _LEASE_COLUMNS.items():
+                    if name not in existing:
+                        self._connection.execute(f"ALTER TABLE ingestion_jobs ADD COLUMN {name} {kind}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def create(self, stored_file: StoredFile) -> IngestionJob:
+        now = _now()
+        job_id = uuid4().hex
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO ingestion_jobs (job_id, status, stage, stages, doc_id, file_hash, "
+                "original_filename, stored_path, content_type, size_bytes, uploaded_at, is_duplicate, "
+                "created_at, updated_at) VALUES (?, 'queued', 'queued', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    json.dumps(_initial_stages()),
+                    stored_file.doc_id,
+                    stored_file.file_hash,
+                    stored_file.original_filename,
+                    str(stored_file.stored_path),
+                    stored_file.content_type,
+                    stored_file.size_bytes,
+                    stored_file.uploaded_at,
+                    int(stored_file.is_duplicate),
+                    now,
+                    now,
+                ),
+            )
+        job = self.get(job_id)
+        assert job is not None
+        return job
+
+    def get(self, job_id: str) -> IngestionJob | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> IngestionJob | None:
+        """Move a queued job to 'running' under ``owner``; None when another worker claimed it first."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "UPDATE ingestion_jobs SET status = 'running', owner = ?, lease_expires_at = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = 'queued'",
+                (owner, time.time() + lease_seconds, _now(), job_id),
+            )
+        if cursor.rowcount != 1:
+            return None
+        return self.get(job_id)
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE ingestion_jobs SET lease_expires_at = ? WHERE status = 'running' AND owner = ?",
+                (time.time() + lease_seconds, owner),
+            )
+
+    def requeue_orphaned(self) -> list[str]:
+        """Reset running jobs whose lease lapsed (or that never had one) to 'queued' and return their ids."""
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "UPDATE ingestion_jobs SET status = 'queued', stage = 'queued', stages = ?, owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?) RETURNING job_id",
+                (json.dumps(_initial_stages()), _now(), time.time()),
+            ).fetchall()
+        return [str(row["job_id"]) for row in rows]
+
+    def recover_pending(self) -> list[str]:
+        """Requeue orphaned running jobs and return all queued job ids."""
+        self.requeue_orphaned()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT job_id FROM ingestion_jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        return [str(row["job_id"]) for row in rows]
+
+    def start_stage(self, job_id: str, stage: str) -> None:
+        self._update(job_id, stage=stage, stage_status="running")
+
+    def complete(self, job_id: str, chunks_count: int) -> None:
+        self._update(job_id, status="completed", stage="done", chunks_count=chunks_count)
+
+    def fail(self, job_id: str, detail: str) -> None:
+        self._update(job_id, status="failed", detail=detail, stage_status="failed")
+
+    def _update(
+        self,
+        job_id: str,
+        *,
+        status: JobStatus = "running",
+        stage: str | None = None,
+        stage_status: str | None = None,
+        chunks_count: int | None = None,
+        detail: str | None = None,
+    ) -> None:
+        now = _now()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT stage, stages, chunks_count FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+
+            stages: dict[str, dict[str, Any]] = json.loads(row["stages"])
+            current = str(row["stage"])
+            if current in stages and stages[current]["status"] == "running":
+                stages[current]["status"] = "failed" if stage_status == "failed" else "completed"
+                stages[current]["finished_at"] = now
+            if stage in stages and stage_status == "running":
+                stages[stage] = {"status": "running", "started_at": now, "finished_at": None}
+
+            self._connection.execute(
+                "UPDATE ingestion_jobs SET status = ?, stage = ?, stages = ?, chunks_count = ?, detail = ?, "
+                "updated_at = ? WHERE job_id = ?",
+                (
+                    status,
+                    stage or current,
+                    json.dumps(stages),
+                    chunks_count if chunks_count is not None else int(row["chunks_count"]),
+                    detail,
+                    now,
+                    job_id,
+                ),
+            )
+
+    @staticmethod
+    def _row_to_job(row: Any) -> IngestionJob:
+        return IngestionJob(
+            job_id=str(row["job_id"]),
+            status=row["status"],
+            stage=str(row["stage"]),
+            stored_file=StoredFile(
+                doc_id=str(row["doc_id"]),
+                file_hash=str(row["file_hash"]),
+                original_filename=str(row["original_filename"]),
+                stored_path=Path(str(row["stored_path"])),
+                content_type=str(row["content_type"]),
+                size_bytes=int(row["size_bytes"]),
+                uploaded_at=str(row["uploaded_at"]),
+                is_duplicate=bool(row["is_duplicate"]),
+            ),
+            chunks_count=int(row["chunks_count"]),
+            detail=row["detail"],
+            created_at=str(row["created_at"]),
+            updated_at=str(row["updated_at"]),
+            stages=json.loads(row["stages"]),
+        )
+
+
+class IngestionJobManager:
+    def __init__(self, store: IngestionJobStore, workers: int, lease_seconds: float = 60.0) -> None:
+        self._store = store
+        self._workers = max(1, workers)
+        self._lease_seconds = lease_seconds
+        self._owner = f"{os.getpid()}-{uuid4().hex[:12]}"
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    @property
+    def store(self) -> IngestionJobStore:
+        return self._store
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for job_id in self._store.recover_pending():
+            self._queue.put_nowait(job_id)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{index}")
+            for index in range(self._workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._keep_leases(), name="ingestion-leases"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, upload_file: UploadFile) -> IngestionJob:
+        try:
+            stored_file = await save_upload(upload_file)
+        except FileStorageError as exc:
+            raise IngestionError(exc.status_code, exc.detail) from exc
+
+        job = self._store.create(stored_file)
+        self.start()
+        await self._queue.put(job.job_id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _keep_leases(self) -> None:
+        # Renew this process's leases and pick up jobs whose owner died while running them.
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            self._store.renew_leases(self._owner, self._lease_seconds)
+            for job_id in self._store.requeue_orphaned():
+                self._queue.put_nowait(job_id)
+
+    async def _process(self, job_id: str) -> None:
+        job = self._store.claim(job_id, self._owner, self._lease_seconds)
+        if job is None:
+            return
+
+        async def _on_stage(stage: str) -> None:
+            self._store.start_stage(job_id, stage)
+
+        try:
+            result = await index_stored_file(job.stored_file, on_stage=_on_stage)
+        except IngestionError as exc:
+            logger.warning("Ingestion job %s failed: %s", job_id, exc.detail)
+            self._store.fail(job_id, exc.detail)
+        except Exception:  # noqa: BLE001
+            logger.exception("Unexpected failure in ingestion job %s", job_id)
+            self._store.fail(job_id, "Unexpected ingestion failure")
+        else:
+            self._store.complete(job_id, result.chunks_count)
+
+
+_job_manager: IngestionJobManager | None = None
+
+
+def get_ingestion_job_manager() -> IngestionJobManager:
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = IngestionJobManager(
+            IngestionJobStore(settings.data_dir / JOBS_DB_NAME),
+            workers=settings.ingestion_job_workers,
+            lease_seconds=settings.ingestion_job_lease_seconds,
+        )
+    return _job_manager
+
+
+async def shutdown_ingestion_job_manager() -> None:
+    global _job_manager
+    if _job_manager is not None:
+        await _job_manager.stop()
+        _job_manager.store.close()
+        _job_manager = None
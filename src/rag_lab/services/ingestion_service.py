@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from io import BytesIO
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from pathlib import Path
 
 from fastapi import UploadFile
 
-from rag_lab.core.config import settings
+from rag_lab.core.config import index_fingerprint, settings
+from rag_lab.core.metrics import timed
 from rag_lab.schemas.ingestion import IngestionFileResult
-from rag_lab.services.file_storage_service import FileStorageError, save_upload
-from rag_lab.services.vector_store_service import get_vector_store_service
+from rag_lab.services.file_storage_service import (
+    FileStorageError,
+    StoredFile,
+    get_index_state,
+    mark_indexed,
+    save_upload,
+)
+from rag_lab.services.pdf_extraction_service import (
+    ExtractedPage,
+    PdfExtractionError,
+    extract_pdf_pages,
+    extract_pdf_pages_sync,
+)
+from rag_lab.services.vector_store_service import DocumentChunks, get_async_vector_store_service
 
 logger = logging.getLogger(__name__)
 
+StageCallback = Callable[[str], Awaitable[None]]
+
 
 class IngestionError(Exception):
     def __init__(self, status_code: int, detail: str) -> None:
@@ -21,30 +38,43 @@ class IngestionError(Exception):
         super().__init__(detail)
 
 
-def _extract_text_from_pdf(path: Path) -> str:
-    try:
-        from pypdf import PdfReader
-    except ModuleNotFoundError as exc:
-        raise IngestionError(500, "PDF support dependency is not installed") from exc
+def _read_plain_text(path: Path) -> list[ExtractedPage]:
+    return [ExtractedPage(page_number=1, text=path.read_text(encoding="utf-8", errors="ignore"))]
 
-    try:
-        with path.open("rb") as file_handle:
-            reader = PdfReader(BytesIO(file_handle.read()))
-        pages = [page.extract_text() or "" for page in reader.pages]
-        return "\n".join(pages).strip()
-    except Exception as exc:  # noqa: BLE001
-        raise IngestionError(400, "Unable to parse PDF content") from exc
 
+def pages_to_text(pages: list[ExtractedPage]) -> str:
+    return "\n".join(page.text for page in pages).strip()
 
-def extract_text(path: Path) -> str:
+
+def extract_pages(path: Path) -> list[ExtractedPage]:
+    suffix = path.suffix.lower()
+    if suffix in {".txt", ".md"}:
+        return _read_plain_text(path)
+    if suffix == ".pdf":
+        try:
+            return extract_pdf_pages_sync(path)
+        except PdfExtractionError as exc:
+            raise IngestionError(exc.status_code, exc.detail) from exc
+    raise IngestionError(400, f"Unsupported file type '{suffix}'")
+
+
+async def extract_pages_async(path: Path) -> list[ExtractedPage]:
+    """Like :func:`extract_pages`, but keeps CPU-bound parsing off the event loop."""
     suffix = path.suffix.lower()
     if suffix in {".txt", ".md"}:
-        return path.read_text(encoding="utf-8", errors="ignore").strip()
+        return await asyncio.to_thread(_read_plain_text, path)
     if suffix == ".pdf":
-        return _extract_text_from_pdf(path)
+        try:
+            return await extract_pdf_pages(path)
+        except PdfExtractionError as exc:
+            raise IngestionError(exc.status_code, exc.detail) from exc
     raise IngestionError(400, f"Unsupported file type '{suffix}'")
 
 
+def extract_text(path: Path) -> str:
+    return pages_to_text(extract_pages(path))
+
+
 def chunk_text(text: str) -> list[str]:
     try:
         from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -60,27 +90,77 @@ def chunk_text(text: str) -> list[str]:
     return [chunk for chunk in chunks if chunk.strip()]
 
 
-async def ingest_upload(upload_file: UploadFile) -> IngestionFileResult:
-    try:
-        stored_file = await save_upload(upload_file)
-    except FileStorageError as exc:
-        raise IngestionError(exc.status_code, exc.detail) from exc
+async def _report_stage(on_stage: StageCallback | None, stage: str) -> None:
+    if on_stage is not None:
+        await on_stage(stage)
+
+
+def _file_result(stored_file: StoredFile, chunks_count: int, detail: str) -> IngestionFileResult:
+    return IngestionFileResult(
+        status="processed",
+        original_filename=stored_file.original_filename,
+        detail=detail,
+        doc_id=stored_file.doc_id,
+        file_hash=stored_file.file_hash,
+        stored_path=str(stored_file.stored_path),
+        content_type=stored_file.content_type,
+        size_bytes=stored_file.size_bytes,
+        chunks_count=chunks_count,
+    )
+
+
+async def _current_chunks_count(stored_file: StoredFile, fingerprint: str) -> int | None:
+    """Return the indexed chunk count if the doc is already indexed with this configuration."""
+    if not stored_file.is_duplicate:
+        return None
+
+    state = get_index_state(stored_file.doc_id)
+    if state is None or state.fingerprint != fingerprint or state.chunks_count <= 0:
+        return None
+
+    vector_store = get_async_vector_store_service()
+    if await vector_store.count_document_chunks(stored_file.doc_id) != state.chunks_count:
+        return None
+    return state.chunks_count
+
+
+@dataclass(frozen=True)
+class PreparedFile:
+    stored_file: StoredFile
+    chunks: list[str]
 
-    text = extract_text(stored_file.stored_path)
+
+async def prepare_stored_file(
+    stored_file: StoredFile, fingerprint: str, on_stage: StageCallback | None = None
+) -> PreparedFile | IngestionFileResult:
+    """Extract and chunk a stored file, or return its result if it is already indexed."""
+    existing_count = await _current_chunks_count(stored_file, fingerprint)
+    if existing_count is not None:
+        logger.info(
+            "Skipped re-indexing '%s' (doc_id=%s, chunks=%s): already indexed",
+            stored_file.original_filename,
+            stored_file.doc_id,
+            existing_count,
+        )
+        return _file_result(stored_file, existing_count, "Already indexed")
+
+    await _report_stage(on_stage, "extracting")
+    with timed("ingestion", "extract"):
+        text = pages_to_text(await extract_pages_async(stored_file.stored_path))
     if not text:
         raise IngestionError(400, "No extractable text found in the uploaded file")
 
-    chunks = chunk_text(text)
+    await _report_stage(on_stage, "chunking")
+    with timed("ingestion", "chunk"):
+        chunks = chunk_text(text)
     if not chunks:
         raise IngestionError(400, "Chunking produced zero chunks")
+    return PreparedFile(stored_file=stored_file, chunks=chunks)
 
-    vector_store = get_vector_store_service()
-    chunks_count = vector_store.upsert_document_chunks(
-        doc_id=stored_file.doc_id,
-        file_name=stored_file.original_filename,
-        stored_path=stored_file.stored_path,
-        chunks=chunks,
-    )
+
+def _indexed_result(prepared: PreparedFile, fingerprint: str, chunks_count: int) -> IngestionFileResult:
+    stored_file = prepared.stored_file
+    mark_indexed(stored_file.doc_id, fingerprint, chunks_count)
     logger.info(
         "Indexed file '%s' (doc_id=%s, chunks=%s, duplicate=%s)",
         stored_file.original_filename,
@@ -88,15 +168,101 @@ async def ingest_upload(upload_file: UploadFile) -> IngestionFileResult:
         chunks_count,
         stored_file.is_duplicate,
     )
+    return _file_result(stored_file, chunks_count, "Indexed successfully")
 
-    return IngestionFileResult(
-        status="processed",
-        original_filename=stored_file.original_filename,
-        detail="Indexed successfully",
+
+async def index_stored_file(
+    stored_file: StoredFile, on_stage: StageCallback | None = None
+) -> IngestionFileResult:
+    fingerprint = index_fingerprint()
+    prepared = await prepare_stored_file(stored_file, fingerprint, on_stage)
+    if isinstance(prepared, IngestionFileResult):
+        return prepared
+
+    await _report_stage(on_stage, "embedding")
+    vector_store = get_async_vector_store_service()
+    chunks_count = await vector_store.upsert_document_chunks(
         doc_id=stored_file.doc_id,
-        file_hash=stored_file.file_hash,
-        stored_path=str(stored_file.stored_path),
-        content_type=stored_file.content_type,
-        size_bytes=stored_file.size_bytes,
-        chunks_count=chunks_count,
+        file_name=stored_file.original_filename,
+        stored_path=stored_file.stored_path,
+        chunks=prepared.chunks,
     )
+    return _indexed_result(prepared, fingerprint, chunks_count)
+
+
+async def ingest_upload(upload_file: UploadFile) -> IngestionFileResult:
+    try:
+        stored_file = await save_upload(upload_file)
+    except FileStorageError as exc:
+        raise IngestionError(exc.status_code, exc.detail) from exc
+
+    return await index_stored_file(stored_file)
+
+
+IngestionOutcome = IngestionFileResult | Exception
+
+
+async def _index_batch(batch: list[PreparedFile], fingerprint: str) -> list[IngestionOutcome]:
+    vector_store = get_async_vector_store_service()
+    try:
+        counts = await vector_store.upsert_documents(
+            [
+                DocumentChunks(
+                    doc_id=prepared.stored_file.doc_id,
+                    file_name=prepared.stored_file.original_filename,
+                    stored_path=prepared.stored_file.stored_path,
+                    chunks=prepared.chunks,
+                )
+                for prepared in batch
+            ]
+        )
+    except Exception as exc:  # noqa: BLE001
+        if len(batch) == 1:
+            return [exc]
+        # Retry one by one so a single bad file does not fail the files batched with it.
+        logger.warning("Batched indexing of %d files failed; retrying them one by one", len(batch), exc_info=True)
+        return [outcome for prepared in batch for outcome in await _index_batch([prepared], fingerprint)]
+    return [_indexed_result(prepared, fingerprint, count) for prepared, count in zip(batch, counts, strict=True)]
+
+
+async def ingest_uploads(upload_files: list[UploadFile]) -> list[IngestionOutcome]:
+    """Ingest uploads concurrently, embedding ready chunks in batches; one result or exception per file."""
+    fingerprint = index_fingerprint()
+    limit = asyncio.Semaphore(max(1, settings.ingestion_max_concurrent_files))
+    outcomes: list[IngestionOutcome] = [IngestionError(500, "Ingestion was interrupted")] * len(upload_files)
+
+    async def _prepare(position: int) -> tuple[int, PreparedFile | IngestionOutcome]:
+        async with limit:
+            try:
+                stored_file = await save_upload(upload_files[position])
+                return position, await prepare_stored_file(stored_file, fingerprint)
+            except FileStorageError as exc:
+                return position, IngestionError(exc.status_code, exc.detail)
+            except Exception as exc:  # noqa: BLE001
+                return position, exc
+
+    async def _flush(batch: list[tuple[int, PreparedFile]]) -> None:
+        results = await _index_batch([prepared for _, prepared in batch], fingerprint)
+        for (position, _), result in zip(batch, results, strict=True):
+            outcomes[position] = result
+
+    tasks = [asyncio.create_task(_prepare(position)) for position in range(len(upload_files))]
+    pending: list[tuple[int, PreparedFile]] = []
+    pending_chunks = 0
+    try:
+        for finished in asyncio.as_completed(tasks):
+            position, prepared = await finished
+            if not isinstance(prepared, PreparedFile):
+                outcomes[position] = prepared
+                continue
+            pending.append((position, prepared))
+            pending_chunks += len(prepared.chunks)
+            if pending_chunks >= settings.ingestion_batch_max_chunks:
+                await _flush(pending)
+                pending, pending_chunks = [], 0
+        if pending:
+            await _flush(pending)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return outcomes
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from rag_lab.db.sqlite import connect, database_size, vacuum
+
+LEXICAL_INDEX_NAME = "lexical_index.sqlite3"
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+    text,
+    chunk_id UNINDEXED,
+    doc_id UNINDEXED,
+    file_name UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS chunk_rows (
+    chunk_id TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    fts_rowid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_chunk_rows_doc_id ON chunk_rows (doc_id);
+"""
+
+
+@dataclass(frozen=True)
+class LexicalHit:
+    chunk_id: str
+    doc_id: str
+    file_name: str
+    text: str
+    bm25: float
+
+
+@dataclass(frozen=True)
+class LexicalDocument:
+    doc_id: str
+    file_name: str
+    chunk_ids: Sequence[str]
+    chunks: Sequence[str]
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn free text into an FTS5 OR-query with one quoted phrase per whitespace-separated token."""
+    terms = [token for token in query.split() if any(char.isalnum() for char in token)]
+    if not terms:
+        return None
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class LexicalIndex:
+    """On-disk BM25 inverted index (SQLite FTS5) kept in step with the vector store."""
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._path = path
+        self._connection = connect(path)
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _delete_document(self, doc_id: str) -> None:
+        rows = self._connection.execute(
+            "SELECT fts_rowid FROM chunk_rows WHERE doc_id = ?", (doc_id,)
+        ).fetchall()
+        self._connection.executemany("DELETE FROM chunks_fts WHERE rowid = ?", [(row[0],) for row in rows])
+        self._connection.execute("DELETE FROM chunk_rows WHERE doc_id = ?", (doc_id,))
+
+    def delete_documents(self, doc_ids: Sequence[str]) -> None:
+        with self._lock, self._connection:
+            for doc_id in doc_ids:
+                self._delete_document(doc_id)
+
+    def vacuum(self) -> int:
+        """Merge the FTS segments left by deletes and reclaim free pages; returns bytes reclaimed."""
+        with self._lock:
+            before = database_size(self._path)
+            with self._connection:
+                self._connection.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('optimize')")
+            vacuum(self._connection, self._path)
+            return max(0, before - database_size(self._path))
+
+    def _insert_document(self, document: LexicalDocument) -> None:
+        self._delete_document(document.doc_id)
+        for chunk_id, text in zip(document.chunk_ids, document.chunks, strict=True):
+            cursor = self._connection.execute(
+                "INSERT INTO chunks_fts (text, chunk_id, doc_id, file_name) VALUES (?, ?, ?, ?)",
+                (text, chunk_id, document.doc_id, document.file_name),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO chunk_rows (chunk_id, doc_id, fts_rowid) VALUES (?, ?, ?)",
+                (chunk_id, document.doc_id, cursor.lastrowid),
+            )
+
+    def replace_documents(self, documents: Sequence[LexicalDocument]) -> None:
+        with self._lock, self._connection:
+            for document in documents:
+                self._insert_document(document)
+
+    def search(self, query: str, limit: int, doc_ids: Collection[str] | None = None) -> list[LexicalHit]:
+        """BM25 search, restricted to the chunks of ``doc_ids`` when given."""
+        match = build_match_query(query)
+        if match is None or limit <= 0:
+            return []
+
+        scope = ""
+        params: list[object] = [match]
+        if doc_ids is not None:
+            scope = (
+                " AND rowid IN (SELECT fts_rowid FROM chunk_rows "
+                "WHERE doc_id IN (SELECT value FROM json_each(?)))"
+            )
+            params.append(json.dumps(sorted(doc_ids)))
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT chunk_id, doc_id, file_name, text, bm25(chunks_fts) AS rank FROM chunks_fts "
+                f"WHERE chunks_fts MATCH ?{scope} ORDER BY rank LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        # FTS5 reports BM25 as a negative number where lower is better.
+        return [
+            LexicalHit(
+                chunk_id=str(row["chunk_id"]),
+                doc_id=str(row["doc_id"]),
+                file_name=str(row["file_name"]),
+                text=str(row["text"]),
+                bm25=-float(row["rank"]),
+            )
+            for row in rows
+        ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int) -> list[tuple[str, float]]:
+    """Fuse ranked id lists with RRF; scores are normalized so a top-1 hit in every list is 1.0."""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+
+    best_possible = len(rankings) / (k + 1) if rankings else 1.0
+    return sorted(
+        ((item_id, score / best_possible) for item_id, score in scores.items()),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from rag_lab.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PdfExtractionError(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(detail)
+
+    def __reduce__(self) -> tuple[type[PdfExtractionError], tuple[int, str]]:
+        # Keep the status code when the error crosses the process-pool boundary.
+        return (self.__class__, (self.status_code, self.detail))
+
+
+@dataclass(frozen=True)
+class ExtractedPage:
+    page_number: int
+    text: str
+    timed_out: bool = False
+
+
+class _PageTimeout(Exception):
+    pass
+
+
+def _raise_page_timeout(signum: int, frame: object) -> None:
+    raise _PageTimeout()
+
+
+@contextmanager
+def _page_deadline(seconds: float) -> Iterator[None]:
+    """Interrupt a page extraction after ``seconds`` via SIGALRM (POSIX main thread only)."""
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if seconds <= 0 or not hasattr(signal, "setitimer") or not in_main_thread:
+        yield
+        return
+
+    previous = signal.signal(signal.SIGALRM, _raise_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _load_reader(path: str) -> Any:
+    try:
+        from pypdf import PdfReader
+    except ModuleNotFoundError as exc:
+        raise PdfExtractionError(500, "PDF support dependency is not installed") from exc
+
+    try:
+        return PdfReader(path)
+    except Exception as exc:  # noqa: BLE001
+        raise PdfExtractionError(400, "Unable to parse PDF content") from exc
+
+
+def _count_pages(path: str) -> int:
+    return len(_load_reader(path).pages)
+
+
+def _extract_page_range(path: str, start: int, stop: int, page_timeout: float) -> list[ExtractedPage]:
+    reader = _load_reader(path)
+    pages: list[ExtractedPage] = []
+    for index in range(start, stop):
+        try:
+            with _page_deadline(page_timeout):
+                text = reader.pages[index].extract_text() or ""
+        except _PageTimeout:
+            logger.warning("PDF page %s of '%s' timed out after %ss", index + 1, path, page_timeout)
+            pages.append(ExtractedPage(page_number=index + 1, text="", timed_out=True))
+            continue
+        except Exception as exc:  # noqa: BLE001
+            raise PdfExtractionError(400, "Unable to parse PDF content") from exc
+        pages.append(ExtractedPage(page_number=index + 1, text=text))
+    return pages
+
+
+def extract_pdf_pages_sync(path: Path) -> list[ExtractedPage]:
+    """Extract all pages in the calling process (no page timeout outside the main thread)."""
+    page_count = _count_pages(str(path))
+    return _extract_page_range(str(path), 0, page_count, settings.pdf_page_timeout_seconds)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.pdf_extraction_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pdf_extraction_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def extract_pdf_pages(path: Path) -> list[ExtractedPage]:
+    """Extract page-tagged text on the process pool, splitting large PDFs into page ranges."""
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        page_count = await loop.run_in_executor(pool, _count_pages, str(path))
+
+        step = max(1, settings.pdf_pages_per_task)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        batches = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool, _extract_page_range, str(path), start, stop, settings.pdf_page_timeout_seconds
+                )
+                for start, stop in ranges
+            )
+        )
+    except BrokenProcessPool as exc:
+        shutdown_pdf_extraction_pool()
+        raise PdfExtractionError(500, "PDF extraction worker crashed") from exc
+    return [page for batch in batches for page in batch]
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
 
 from rag_lab.core.config import settings
-from rag_lab.schemas.rag_chat import RAGChatResponse, RAGSource
-from rag_lab.services.chat_service import ChatServiceError, generate_answer
-from rag_lab.services.vector_store_service import RetrievedChunk, get_vector_store_service
+from rag_lab.core.metrics import count_cache_lookup, timed
+from rag_lab.schemas.rag_chat import ContextUsage, RAGChatResponse, RAGSource
+from rag_lab.services.answer_cache import answer_cache_key, get_answer_cache
+from rag_lab.services.chat_service import (
+    ChatServiceError,
+    generate_answer,
+    get_generation_admission,
+    stream_answer,
+)
+from rag_lab.services.context_packer import PackedContext, pack_context
+from rag_lab.services.retrieval_filter import RetrievalFilter
+from rag_lab.services.vector_store_service import RetrievedChunk, get_async_vector_store_service
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +26,57 @@ NO_CONTEXT_ANSWER = (
 
 
 class RAGServiceError(Exception):
-    def __init__(self, status_code: int, detail: str) -> None:
+    def __init__(self, status_code: int, detail: str, retry_after: int | None = None) -> None:
         self.status_code = status_code
         self.detail = detail
+        self.retry_after = retry_after
         super().__init__(detail)
 
 
-def _build_prompt(question: str, sources: list[RetrievedChunk]) -> str:
-    context_parts: list[str] = []
-    for source in sources:
-        context_parts.append(
-            f"[{source.chunk_id}] file={source.file_name} score={source.score:.3f}\n{source.text}"
+@dataclass(frozen=True)
+class RAGStream:
+    used_context: bool
+    sources: list[RAGSource]
+    tokens: AsyncGenerator[str, None]
+    context: ContextUsage | None = None
+
+
+def _pack(raw_sources: list[RetrievedChunk]) -> PackedContext:
+    with timed("chat", "prompt_build"):
+        packed = pack_context(
+            raw_sources,
+            budget_tokens=settings.prompt_context_max_tokens,
+            chars_per_token=settings.prompt_chars_per_token,
+            max_overlap=settings.chunk_overlap,
         )
+    logger.info(
+        "Packed %s/%s chunks into %s of %s context tokens (%s tokens dropped)",
+        packed.chunks_used,
+        len(raw_sources),
+        packed.tokens_used,
+        packed.budget_tokens,
+        packed.tokens_dropped,
+    )
+    return packed
+
 
-    context = "\n\n".join(context_parts)
+def _context_usage(packed: PackedContext) -> ContextUsage:
+    return ContextUsage(
+        budget_tokens=packed.budget_tokens,
+        tokens_used=packed.tokens_used,
+        tokens_dropped=packed.tokens_dropped,
+        chunks_used=packed.chunks_used,
+        chunks_dropped=packed.chunks_dropped,
+    )
+
+
+def _used_sources(raw_sources: list[RetrievedChunk], packed: PackedContext) -> list[RetrievedChunk]:
+    used = set(packed.chunk_ids)
+    return [item for item in raw_sources if item.chunk_id in used]
+
+
+def _build_prompt(question: str, packed: PackedContext) -> str:
+    context = packed.render()
     return (
         "Ти backend-асистент. Відповідай тільки за наданим контекстом. "
         "Якщо контексту недостатньо, прямо скажи про це.\n\n"
@@ -38,22 +86,8 @@ def _build_prompt(question: str, sources: list[RetrievedChunk]) -> str:
     )
 
 
-async def answer_with_rag(question: str) -> RAGChatResponse:
-    if not question.strip():
-        raise RAGServiceError(400, "Message must not be empty")
-
-    try:
-        vector_store = get_vector_store_service()
-        raw_sources = vector_store.search(
-            query=question,
-            top_k=settings.retrieval_top_k,
-            score_threshold=settings.retrieval_score_threshold,
-        )
-    except Exception as exc:
-        logger.exception("Vector retrieval failed")
-        raise RAGServiceError(503, "Vector store is unavailable") from exc
-
-    sources = [
+def _to_sources(raw_sources: list[RetrievedChunk]) -> list[RAGSource]:
+    return [
         RAGSource(
             doc_id=item.doc_id,
             file_name=item.file_name,
@@ -64,13 +98,79 @@ async def answer_with_rag(question: str) -> RAGChatResponse:
         for item in raw_sources
     ]
 
-    if not sources:
+
+async def _retrieve(question: str, filters: RetrievalFilter | None) -> list[RetrievedChunk]:
+    if not question.strip():
+        raise RAGServiceError(400, "Message must not be empty")
+
+    try:
+        vector_store = get_async_vector_store_service()
+        with timed("chat", "retrieve"):
+            return await vector_store.search(
+                query=question,
+                top_k=settings.retrieval_top_k,
+                score_threshold=settings.retrieval_score_threshold,
+                filters=filters,
+            )
+    except Exception as exc:
+        logger.exception("Vector retrieval failed")
+        raise RAGServiceError(503, "Vector store is unavailable") from exc
+
+
+async def answer_with_rag(question: str, filters: RetrievalFilter | None = None) -> RAGChatResponse:
+    retrieved = await _retrieve(question, filters)
+    if not retrieved:
         return RAGChatResponse(answer=NO_CONTEXT_ANSWER, used_context=False, sources=[])
 
-    prompt = _build_prompt(question=question, sources=raw_sources)
+    packed = _pack(retrieved)
+    raw_sources = _used_sources(retrieved, packed)
+    sources = _to_sources(raw_sources)
+    prompt = _build_prompt(question=question, packed=packed)
+    cache_key = answer_cache_key(question, (item.chunk_id for item in raw_sources), settings.ollama_model)
+    try:
+        answer = await get_answer_cache().get_or_generate(
+            cache_key,
+            {item.doc_id for item in raw_sources},
+            lambda: generate_answer(prompt),
+        )
+    except ChatServiceError as exc:
+        raise RAGServiceError(exc.status_code, exc.detail, retry_after=exc.retry_after) from exc
+
+    return RAGChatResponse(answer=answer, used_context=True, sources=sources, context=_context_usage(packed))
+
+
+async def _single_token(text: str) -> AsyncGenerator[str, None]:
+    yield text
+
+
+async def _stream_tokens(prompt: str) -> AsyncGenerator[str, None]:
+    try:
+        async for token in stream_answer(prompt):
+            yield token
+    except ChatServiceError as exc:
+        raise RAGServiceError(exc.status_code, exc.detail, retry_after=exc.retry_after) from exc
+
+
+async def stream_answer_with_rag(question: str, filters: RetrievalFilter | None = None) -> RAGStream:
+    """Retrieve sources before streaming, so retrieval errors still get a proper HTTP status."""
+    retrieved = await _retrieve(question, filters)
+    if not retrieved:
+        return RAGStream(used_context=False, sources=[], tokens=_single_token(NO_CONTEXT_ANSWER))
+
+    packed = _pack(retrieved)
+    raw_sources = _used_sources(retrieved, packed)
+    sources = _to_sources(raw_sources)
+    context = _context_usage(packed)
+    cache_key = answer_cache_key(question, (item.chunk_id for item in raw_sources), settings.ollama_model)
+    cached_answer = get_answer_cache().get(cache_key)
+    count_cache_lookup("answer", cached_answer is not None)
+    if cached_answer is not None:
+        return RAGStream(used_context=True, sources=sources, tokens=_single_token(cached_answer), context=context)
+
     try:
-        answer = await generate_answer(prompt)
+        get_generation_admission().ensure_capacity()
     except ChatServiceError as exc:
-        raise RAGServiceError(exc.status_code, exc.detail) from exc
+        raise RAGServiceError(exc.status_code, exc.detail, retry_after=exc.retry_after) from exc
 
-    return RAGChatResponse(answer=answer, used_context=True, sources=sources)
+    prompt = _build_prompt(question=question, packed=packed)
+    return RAGStream(used_context=True, sources=sources, tokens=_stream_tokens(prompt), context=context)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+from rag_lab.core.config import settings
+from rag_lab.db.sqlite import connect
+from rag_lab.services.file_storage_service import StoredFile, list_stored_files, mark_indexed
+from rag_lab.services.index_generation import get_index_generation
+from rag_lab.services.index_stamp import (
+    IndexStamp,
+    collection_dir,
+    current_stamp,
+    ensure_stamp,
+    is_stale,
+    target_stamp,
+    write_stamp,
+)
+from rag_lab.services.ingestion_service import IngestionError, chunk_text, extract_text
+from rag_lab.services.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE_NAME = "reindex_checkpoint.sqlite3"
+LOCK_FILE_NAME = "reindex.lock"
+
+ProgressCallback = Callable[[int, int, str], None]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reindexed_documents (
+    doc_id TEXT PRIMARY KEY,
+    chunks_count INTEGER NOT NULL,
+    error TEXT,
+    indexed_at TEXT NOT NULL
+);
+"""
+
+
+class ReindexError(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        self.status_code = status_code
+        self.detail = detail
+        super().__init__(detail)
+
+
+@dataclass(frozen=True)
+class ReindexReport:
+    collection: str
+    fingerprint: str
+    indexed: int
+    failed: int
+    resumed: int
+    swapped: bool
+    elapsed_seconds: float
+
+
+class ReindexCheckpoint:
+    """Per-document progress of a re-index, stored next to the shadow collection."""
+
+    def __init__(self, path: Path) -> None:
+        self._lock = threading.Lock()
+        self._connection = connect(path)
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def done(self) -> dict[str, int]:
+        """Chunk counts of documents already processed (``-1`` for ones that failed)."""
+        with self._lock:
+            rows = self._connection.execute("SELECT doc_id, chunks_count FROM reindexed_documents").fetchall()
+        return {str(row["doc_id"]): int(row["chunks_count"]) for row in rows}
+
+    def record(self, doc_id: str, chunks_count: int, error: str | None = None) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO reindexed_documents (doc_id, chunks_count, error, indexed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (doc_id, chunks_count, error, datetime.now(UTC).isoformat()),
+            )
+
+    def forget(self, doc_ids: list[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM reindexed_documents WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids]
+            )
+
+
+@contextmanager
+def _exclusive_run_lock() -> Iterator[None]:
+    """Allow one re-index at a time across every process sharing the vector store."""
+    path = settings.vector_store_dir / LOCK_FILE_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as file_handle:
+        try:
+            fcntl.flock(file_handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as exc:
+            raise ReindexError(409, "A re-index is already running") from exc
+        try:
+            yield
+        finally:
+            fcntl.flock(file_handle, fcntl.LOCK_UN)
+
+
+class Reindexer:
+    """Rebuild the index into a throttled, resumable shadow collection, then swap the stamp."""
+
+    def __init__(
+        self,
+        *,
+        cpu_fraction: float | None = None,
+        on_progress: ProgressCallback | None = None,
+        service_factory: Callable[[IndexStamp], VectorStoreService] | None = None,
+    ) -> None:
+        fraction = settings.reindex_cpu_fraction if cpu_fraction is None else cpu_fraction
+        self._cpu_fraction = min(max(fraction, 0.01), 1.0)
+        self._on_progress = on_progress
+        self._service_factory = service_factory or (lambda stamp: VectorStoreService(stamp=stamp))
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Ask a running re-index to stop after the current document; progress is kept."""
+        self._stop.set()
+
+    def run(self) -> ReindexReport:
+        started = time.perf_counter()
+        target = target_stamp()
+        if ensure_stamp().fingerprint == target.fingerprint:
+            return ReindexReport(target.collection, target.fingerprint, 0, 0, 0, False, 0.0)
+
+        with _exclusive_run_lock():
+            checkpoint = ReindexCheckpoint(collection_dir(target.collection) / CHECKPOINT_FILE_NAME)
+            try:
+                resumed = len(checkpoint.done())
+                service = self._service_factory(target)
+                indexed, failed = self._index_pending(service, checkpoint)
+                swapped = not self._stop.is_set()
+                if swapped:
+                    indexed, failed = self._swap(target, service, checkpoint, indexed, failed)
+            finally:
+                checkpoint.close()
+
+        return ReindexReport(
+            collection=target.collection,
+            fingerprint=target.fingerprint,
+            indexed=indexed,
+            failed=failed,
+            resumed=resumed,
+            swapped=swapped,
+            elapsed_seconds=time.perf_counter() - started,
+        )
+
+    def _swap(
+        self,
+        target: IndexStamp,
+        service: VectorStoreService,
+        checkpoint: ReindexCheckpoint,
+        indexed: int,
+        failed: int,
+    ) -> tuple[int, int]:
+        self._reconcile(service, checkpoint)
+        previous = current_stamp()
+        write_stamp(target)
+        get_index_generation().bump([])
+        logger.info(
+            "Swapped index from '%s' to '%s'; the previous collection is kept on disk",
+            previous.collection,
+            target.collection,
+        )
+        # Catch documents uploaded or deleted through the old collection while the last pass ran;
+        # writers wait for their process to switch collections, so later changes land in this one.
+        late_indexed, late_failed = self._index_pending(service, checkpoint)
+        self._reconcile(service, checkpoint)
+        for doc_id, chunks_count in checkpoint.done().items():
+            if chunks_count >= 0:
+                mark_indexed(doc_id, target.fingerprint, chunks_count)
+        return indexed + late_indexed, failed + late_failed
+
+    def _reconcile(self, service: VectorStoreService, checkpoint: ReindexCheckpoint) -> None:
+        """Drop re-indexed documents that were deleted while the re-index ran."""
+        stored = {stored_file.doc_id for stored_file in list_stored_files()}
+        deleted = [doc_id for doc_id in checkpoint.done() if doc_id not in stored]
+        if deleted:
+            service.delete_documents(deleted)
+            checkpoint.forget(deleted)
+
+    def _index_pending(self, service: VectorStoreService, checkpoint: ReindexCheckpoint) -> tuple[int, int]:
+        indexed = failed = 0
+        while not self._stop.is_set():
+            done = checkpoint.done()
+            pending = [stored_file for stored_file in list_stored_files() if stored_file.doc_id not in done]
+            if not pending:
+                break
+            for position, stored_file in enumerate(pending, start=1):
+                if self._stop.is_set():
+                    break
+                if self._index_document(service, checkpoint, stored_file):
+                    indexed += 1
+                else:
+                    failed += 1
+                if self._on_progress is not None:
+                    self._on_progress(position, len(pending), stored_file.original_filename)
+        return indexed, failed
+
+    def _index_document(
+        self, service: VectorStoreService, checkpoint: ReindexCheckpoint, stored_file: StoredFile
+    ) -> bool:
+        started = time.perf_counter()
+        try:
+            if not stored_file.stored_path.exists():
+                raise IngestionError(404, "Stored file is missing")
+            chunks = chunk_text(extract_text(stored_file.stored_path))
+            chunks_count = service.upsert_document_chunks(
+                doc_id=stored_file.doc_id,
+                file_name=stored_file.original_filename,
+                stored_path=stored_file.stored_path,
+                chunks=chunks,
+            )
+        except IngestionError as exc:
+            logger.warning("Re-index skipped '%s': %s", stored_file.original_filename, exc.detail)
+            checkpoint.record(stored_file.doc_id, -1, exc.detail)
+            return False
+
+        checkpoint.record(stored_file.doc_id, chunks_count)
+        busy = time.perf_counter() - started
+        if self._cpu_fraction < 1.0:
+            self._stop.wait(busy * (1.0 / self._cpu_fraction - 1.0))
+        return True
+
+
+async def run_background_reindex(reindexer: Reindexer) -> None:
+    """Run a re-index on a worker thread if the index is stale, logging instead of raising."""
+    if not is_stale():
+        return
+    try:
+        report = await asyncio.to_thread(reindexer.run)
+    except ReindexError as exc:
+        logger.info("Background re-index not started: %s", exc.detail)
+        return
+    except Exception:  # noqa: BLE001
+        logger.exception("Background re-index failed")
+        return
+    logger.info(
+        "Background re-index into '%s': %s indexed, %s failed, swapped=%s in %.1fs",
+        report.collection,
+        report.indexed,
+        report.failed,
+        report.swapped,
+        report.elapsed_seconds,
+    )
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+from rag_lab.core.cache import LRUCache
+from rag_lab.core.config import settings
+from rag_lab.services.index_generation import get_index_generation
+
+if TYPE_CHECKING:
+    from rag_lab.services.vector_store_service import FilterScope, RetrievedChunk
+
+# Rough per-object overheads for CPython floats/lists/strings; only used for the byte cap.
+_FLOAT_BYTES = 32
+_ID_BYTES = 90
+_ROW_BYTES = 8
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def _embedding_size(embedding: list[float]) -> int:
+    return _ENTRY_OVERHEAD_BYTES + len(embedding) * _FLOAT_BYTES
+
+
+def _results_size(results: tuple[RetrievedChunk, ...]) -> int:
+    return _ENTRY_OVERHEAD_BYTES + sum(
+        _ENTRY_OVERHEAD_BYTES + len(item.text) + len(item.doc_id) + len(item.chunk_id) for item in results
+    )
+
+
+def _scope_size(scope: FilterScope) -> int:
+    candidates = scope.candidates
+    rows = len(candidates.rows) if candidates.rows is not None else 0
+    ids = len(scope.doc_ids) + len(candidates.ids) + len(candidates.doc_ids)
+    return _ENTRY_OVERHEAD_BYTES + ids * _ID_BYTES + rows * _ROW_BYTES
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+_query_embedding_cache: LRUCache[list[float]] | None = None
+_retrieval_result_cache: LRUCache[tuple[RetrievedChunk, ...]] | None = None
+_filter_scope_cache: LRUCache[FilterScope] | None = None
+_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> LRUCache[list[float]]:
+    global _query_embedding_cache
+    with _lock:
+        if _query_embedding_cache is None:
+            _query_embedding_cache = LRUCache(
+                max_entries=settings.query_embedding_cache_size,
+                max_bytes=settings.query_embedding_cache_max_bytes,
+                sizeof=_embedding_size,
+            )
+        return _query_embedding_cache
+
+
+def get_retrieval_result_cache() -> LRUCache[tuple[RetrievedChunk, ...]]:
+    global _retrieval_result_cache
+    with _lock:
+        if _retrieval_result_cache is None:
+            cache: LRUCache[tuple[RetrievedChunk, ...]] = LRUCache(
+                max_entries=settings.retrieval_cache_size,
+                max_bytes=settings.retrieval_cache_max_bytes,
+                sizeof=_results_size,
+            )
+            get_index_generation().subscribe(lambda _: cache.clear())
+            _retrieval_result_cache = cache
+        return _retrieval_result_cache
+
+
+def get_filter_scope_cache() -> LRUCache[FilterScope]:
+    """Candidate vectors per retrieval filter, dropped whenever the index changes."""
+    global _filter_scope_cache
+    with _lock:
+        if _filter_scope_cache is None:
+            cache: LRUCache[FilterScope] = LRUCache(
+                max_entries=settings.retrieval_filter_cache_size,
+                max_bytes=settings.retrieval_filter_cache_max_bytes,
+                sizeof=_scope_size,
+            )
+            get_index_generation().subscribe(lambda _: cache.clear())
+            _filter_scope_cache = cache
+        return _filter_scope_cache
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+
+def _utc_isoformat(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    # Naive datetimes are taken as UTC, the zone ``uploaded_at`` is recorded in.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.astimezone(UTC).isoformat()
+
+
+@dataclass(frozen=True)
+class RetrievalFilter:
+    """Restricts retrieval by doc id, file-name glob and upload time (after inclusive, before exclusive)."""
+
+    doc_ids: frozenset[str] | None = None
+    file_name_pattern: str | None = None
+    uploaded_after: str | None = None
+    uploaded_before: str | None = None
+
+    @classmethod
+    def create(
+        cls,
+        *,
+        doc_ids: Iterable[str] | None = None,
+        file_name_pattern: str | None = None,
+        uploaded_after: datetime | None = None,
+        uploaded_before: datetime | None = None,
+    ) -> RetrievalFilter | None:
+        """Build a filter from API values, or return None if nothing is restricted."""
+        scope = cls(
+            doc_ids=frozenset(doc_ids) if doc_ids is not None else None,
+            file_name_pattern=file_name_pattern or None,
+            uploaded_after=_utc_isoformat(uploaded_after),
+            uploaded_before=_utc_isoformat(uploaded_before),
+        )
+        return scope if scope != cls() else None
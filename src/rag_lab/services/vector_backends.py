@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections.abc import Collection, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+from uuid import uuid4
+
+from rag_lab.core.config import settings
+from rag_lab.db.locks import exclusive_file_lock
+from rag_lab.db.sqlite import connect, database_size, vacuum
+
+DEFAULT_COLLECTION = "rag_lab_documents"
+CHROMA_MAX_BATCH = 1000
+NUMPY_VECTORS_FILE = "vectors.bin"
+NUMPY_METADATA_FILE = "metadata.sqlite3"
+NUMPY_ANN_FILE = "hnsw.bin"
+NUMPY_COMPACT_FILE = "vectors.bin.compact"
+NUMPY_LOCK_FILE = "write.lock"
+INT8_SCALE = 127.0
+
+
+@dataclass(frozen=True)
+class VectorRecord:
+    id: str
+    text: str
+    metadata: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class VectorHit:
+    record: VectorRecord
+    score: float
+
+
+@dataclass(frozen=True)
+class CandidateSet:
+    """The vectors a scoped query may return; ``rows`` is valid while the backend ``version`` is unchanged."""
+
+    ids: tuple[str, ...]
+    doc_ids: tuple[str, ...]
+    rows: Any = None
+    version: str = ""
+
+
+def relevance_from_squared_l2(distance: float) -> float:
+    """Same relevance scale LangChain's Chroma wrapper used, so score thresholds carry over."""
+    return 1.0 - distance / math.sqrt(2)
+
+
+class VectorBackend(Protocol):
+    def add(self, records: Sequence[VectorRecord], embeddings: Sequence[Sequence[float]]) -> None: ...
+
+    def delete(self, ids: Sequence[str]) -> None: ...
+
+    def delete_document(self, doc_id: str) -> None: ...
+
+    def count_document(self, doc_id: str) -> int: ...
+
+    def count(self) -> int: ...
+
+    def candidates(self, ids: Collection[str], doc_ids: Collection[str]) -> CandidateSet: ...
+
+    def query(
+        self, embeddings: Sequence[Sequence[float]], k: int, candidates: CandidateSet | None = None
+    ) -> list[list[VectorHit]]: ...
+
+    def iter_records(self, batch_size: int) -> Iterator[tuple[list[VectorRecord], list[list[float]]]]: ...
+
+    def compact(self) -> int | None: ...
+
+    def close(self) -> None: ...
+
+
+class ChromaBackend:
+    def __init__(self, collection_name: str = DEFAULT_COLLECTION, persist_directory: Path | None = None) -> None:
+        try:
+            import chromadb
+        except ModuleNotFoundError as exc:
+            raise RuntimeError("Chroma vector store dependencies are not installed") from exc
+
+        client = chromadb.PersistentClient(path=str(persist_directory or settings.vector_store_dir))
+        # Vectors always arrive precomputed, so the collection gets no embedding function.
+        self._collection: Any = client.get_or_create_collection(collection_name, embedding_function=None)
+
+    def add(self, records: Sequence[VectorRecord], embeddings: Sequence[Sequence[float]]) -> None:
+        for start in range(0, len(records), CHROMA_MAX_BATCH):
+            batch = records[start : start + CHROMA_MAX_BATCH]
+            self._collection.upsert(
+                ids=[record.id for record in batch],
+                embeddings=[list(vector) for vector in embeddings[start : start + CHROMA_MAX_BATCH]],
+                documents=[record.text for record in batch],
+                metadatas=[record.metadata for record in batch],
+            )
+
+    def delete(self, ids: Sequence[str]) -> None:
+        for start in range(0, len(ids), CHROMA_MAX_BATCH):
+            self._collection.delete(ids=list(ids[start : start + CHROMA_MAX_BATCH]))
+
+    def delete_document(self, doc_id: str) -> None:
+        self._collection.delete(where={"doc_id": doc_id})
+
+    def count_document(self, doc_id: str) -> int:
+        return len(self._collection.get(where={"doc_id": doc_id}, include=[])["ids"])
+
+    def count(self) -> int:
+        return int(self._collection.count())
+
+    def candidates(self, ids: Collection[str], doc_ids: Collection[str]) -> CandidateSet:
+        return CandidateSet(ids=tuple(sorted(ids)), doc_ids=tuple(sorted(doc_ids)))
+
+    def query(
+        self, embeddings: Sequence[Sequence[float]], k: int, candidates: CandidateSet | None = None
+    ) -> list[list[VectorHit]]:
+        where: dict[str, Any] | None = None
+        if candidates is not None:
+            clauses: list[dict[str, Any]] = []
+            if candidates.ids:
+                clauses.append({"content_hash": {"$in": list(candidates.ids)}})
+            if candidates.doc_ids:
+                clauses.append({"doc_id": {"$in": list(candidates.doc_ids)}})
+            if not clauses:
+                return [[] for _ in embeddings]
+            where = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        response = self._collection.query(
+            query_embeddings=[list(vector) for vector in embeddings],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            [
+                VectorHit(
+                    record=VectorRecord(id=str(item_id), text=text or "", metadata=dict(metadata or {})),
+                    score=relevance_from_squared_l2(float(distance)),
+                )
+                for item_id, text, metadata, distance in zip(ids, documents, metadatas, distances, strict=True)
+            ]
+            for ids, documents, metadatas, distances in zip(
+                response["ids"], response["documents"], response["metadatas"], response["distances"], strict=True
+            )
+        ]
+
+    def iter_records(self, batch_size: int) -> Iterator[tuple[list[VectorRecord], list[list[float]]]]:
+        offset = 0
+        while True:
+            page = self._collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset
+            )
+            if not page["ids"]:
+                return
+            records = [
+                VectorRecord(id=str(item_id), text=text or "", metadata=dict(metadata or {}))
+                for item_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"], strict=True)
+            ]
+            yield records, [list(map(float, vector)) for vector in page["embeddings"]]
+            offset += len(page["ids"])
+
+    def compact(self) -> int | None:
+        """Chroma manages its own storage and offers no compaction to call, so report it as unsupported."""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+_NUMPY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_vectors_live_id ON vectors (id) WHERE deleted = 0;
+CREATE INDEX IF NOT EXISTS ix_vectors_doc_id ON vectors (doc_id) WHERE deleted = 0;
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class NumpyBackend:
+    """Memory-mapped matrix of normalized vectors with a SQLite sidecar; deletes are tombstones until compaction."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        dtype: str | None = None,
+        ann_threshold: int | None = None,
+    ) -> None:
+        try:
+            import numpy as np
+        except ModuleNotFoundError as exc:
+            raise RuntimeError("The numpy vector backend requires the rag-lab[numpy] extra") from exc
+
+        self._np = np
+        self._directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = connect(directory / NUMPY_METADATA_FILE)
+        self._dtype = dtype or settings.vector_index_dtype
+        self._dim = 0
+        self._ann_threshold = ann_threshold if ann_threshold is not None else settings.vector_index_ann_threshold
+        self._matrix: Any = None
+        self._ann: Any = None
+        self._rows_version = ""
+        self._live = np.zeros(0, dtype=bool)
+        self._version: str | None = None
+        with self._writing():
+            self._connection.executescript(_NUMPY_SCHEMA)
+            self._finish_compaction()
+            self._sync()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._directory / NUMPY_VECTORS_FILE
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Serialize writes with other threads and with other processes sharing the directory."""
+        with self._lock, exclusive_file_lock(self._directory / NUMPY_LOCK_FILE):
+            yield
+
+    def _sync(self) -> None:
+        """Reload the live-row mask if another process has written since it was read."""
+        row = self._connection.execute("SELECT value FROM info WHERE key = 'version'").fetchone()
+        version = row["value"] if row is not None else ""
+        if version == self._version:
+            return
+        # A compaction commits its renumbered rows before it swaps the new matrix in.
+        with exclusive_file_lock(self._directory / NUMPY_LOCK_FILE):
+            info = {row["key"]: row["value"] for row in self._connection.execute("SELECT key, value FROM info")}
+            rows = self._connection.execute("SELECT row, deleted FROM vectors ORDER BY row").fetchall()
+        self._dtype = info.get("dtype") or self._dtype
+        self._dim = int(info["dim"]) if "dim" in info else 0
+        # Changes whenever compaction renumbers rows, invalidating resolved candidate sets.
+        self._rows_version = info.get("rows_version", "")
+        live = self._np.zeros(rows[-1]["row"] + 1 if rows else 0, dtype=bool)
+        for row in rows:
+            live[row["row"]] = not row["deleted"]
+        self._live = live
+        self._matrix = None
+        self._ann = None
+        self._version = info.get("version", "")
+
+    def _bump_version(self) -> None:
+        # Written in the caller's transaction; if it rolls back, the mismatch forces a reload.
+        self._version = uuid4().hex
+        self._connection.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('version', ?)", (self._version,))
+
+    def _finish_compaction(self) -> None:
+        """Complete a compaction whose metadata committed before its matrix was swapped in."""
+        compact_path = self._directory / NUMPY_COMPACT_FILE
+        committed = self._connection.execute("SELECT 1 FROM info WHERE key = 'compacting'").fetchone()
+        if committed is not None and compact_path.exists():
+            os.replace(compact_path, self._vectors_path)
+            (self._directory / NUMPY_ANN_FILE).unlink(missing_ok=True)
+        # Without the committed marker the half-written matrix is simply discarded.
+        compact_path.unlink(missing_ok=True)
+        if committed is not None:
+            with self._connection:
+                self._connection.execute("DELETE FROM info WHERE key = 'compacting'")
+
+    def _disk_usage(self) -> int:
+        files = (self._vectors_path, self._directory / NUMPY_ANN_FILE)
+        return database_size(self._directory / NUMPY_METADATA_FILE) + sum(
+            path.stat().st_size for path in files if path.exists()
+        )
+
+    def _numpy_dtype(self) -> Any:
+        return {"float32": self._np.float32, "float16": self._np.float16, "int8": self._np.int8}[self._dtype]
+
+    def _normalize(self, vectors: Any) -> Any:
+        np = self._np
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _encode(self, vectors: Any) -> Any:
+        np = self._np
+        vectors = self._normalize(vectors)
+        if self._dtype == "int8":
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(self._numpy_dtype())
+
+    def _decode(self, rows: Any) -> Any:
+        decoded = rows.astype(self._np.float32, copy=False)
+        return decoded / INT8_SCALE if self._dtype == "int8" else decoded
+
+    def _row_bytes(self) -> int:
+        return self._dim * self._np.dtype(self._numpy_dtype()).itemsize
+
+    def _rows(self) -> Any:
+        if self._matrix is None and self._dim and len(self._live):
+            self._matrix = self._np.memmap(
+                self._vectors_path, dtype=self._numpy_dtype(), mode="r", shape=(len(self._live), self._dim)
+            )
+        return self._matrix
+
+    def add(self, records: Sequence[VectorRecord], embeddings: Sequence[Sequence[float]]) -> None:
+        if not records:
+            return
+
+        encoded = self._encode(embeddings)
+        with self._writing(), self._connection:
+            self._sync()
+            self._bump_version()
+            if not self._dim:
+                self._dim = int(encoded.shape[1])
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+                    [("dim", str(self._dim)), ("dtype", self._dtype)],
+                )
+            elif encoded.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {encoded.shape[1]} does not match index ({self._dim})")
+
+            stale = self._connection.execute(
+                f"SELECT row FROM vectors WHERE deleted = 0 AND id IN ({','.join('?' * len(records))})",
+                [record.id for record in records],
+            ).fetchall()
+            self._tombstone([row["row"] for row in stale])
+
+            (first_row,) = self._connection.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()
+            self._connection.executemany(
+                "INSERT INTO vectors (row, id, doc_id, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        first_row + offset,
+                        record.id,
+                        str(record.metadata.get("doc_id", "")),
+                        record.text,
+                        json.dumps(record.metadata, ensure_ascii=True),
+                    )
+                    for offset, record in enumerate(records)
+                ],
+            )
+            with self._vectors_path.open("ab") as file_handle:
+                # Drop rows appended by a write whose metadata commit never happened.
+                file_handle.truncate(first_row * self._row_bytes())
+                file_handle.write(encoded.tobytes())
+            self._live = self._np.concatenate([self._live[:first_row], self._np.ones(len(records), dtype=bool)])
+            self._matrix = None
+            if self._ann is not None:
+                self._ann.resize_index(len(self._live))
+                self._ann.add_items(self._decode(encoded), self._np.arange(first_row, len(self._live)))
+
+    def _tombstone(self, rows: Sequence[int]) -> None:
+        if not rows:
+            return
+        self._bump_version()
+        self._connection.executemany("UPDATE vectors SET deleted = 1 WHERE row = ?", [(row,) for row in rows])
+        for row in rows:
+            self._live[row] = False
+            if self._ann is not None:
+                self._ann.mark_deleted(row)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._writing(), self._connection:
+            self._sync()
+            for start in range(0, len(ids), 500):
+                batch = list(ids[start : start + 500])
+                rows = self._connection.execute(
+                    f"SELECT row FROM vectors WHERE deleted = 0 AND id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                self._tombstone([row["row"] for row in rows])
+
+    def delete_document(self, doc_id: str) -> None:
+        with self._writing(), self._connection:
+            self._sync()
+            rows = self._connection.execute(
+                "SELECT row FROM vectors WHERE deleted = 0 AND doc_id = ?", (doc_id,)
+            ).fetchall()
+            self._tombstone([row["row"] for row in rows])
+
+    def count_document(self, doc_id: str) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COUNT(*) FROM vectors WHERE deleted = 0 AND doc_id = ?", (doc_id,)
+            ).fetchone()
+        return int(row[0])
+
+    def count(self) -> int:
+        with self._lock:
+            self._sync()
+            return int(self._live.sum())
+
+    def _load_ann(self) -> Any:
+        """Build (or load) the HNSW graph lazily; returns None when hnswlib is unavailable."""
+        if self._ann is not None:
+            return self._ann
+        try:
+            import hnswlib
+        except ModuleNotFoundError:
+            return None
+
+        matrix = self._rows()
+        ann_path = self._directory / NUMPY_ANN_FILE
+        index: Any = None
+        if ann_path.exists():
+            index = hnswlib.Index(space="ip", dim=self._dim)
+            index.load_index(str(ann_path), max_elements=max(len(self._live), 1))
+            saved = index.get_current_count()
+            if saved > len(self._live):
+                index = None
+            else:
+                # The saved graph may predate rows added and deleted since, here or by another process.
+                if saved < len(self._live):
+                    index.add_items(
+                        self._decode(matrix[saved : len(self._live)]), self._np.arange(saved, len(self._live))
+                    )
+                for row in self._np.flatnonzero(~self._live):
+                    try:
+                        index.mark_deleted(int(row))
+                    except RuntimeError:
+                        pass
+                if saved < len(self._live):
+                    self._save_ann(index)
+        if index is None:
+            index = hnswlib.Index(space="ip", dim=self._dim)
+            index.init_index(max_elements=max(len(self._live), 1), ef_construction=200, M=16)
+            index.add_items(self._decode(matrix[: len(self._live)]), self._np.arange(len(self._live)))
+            for row in self._np.flatnonzero(~self._live):
+                index.mark_deleted(int(row))
+            self._save_ann(index)
+        self._ann = index
+        return index
+
+    def _save_ann(self, index: Any) -> None:
+        # Readers in other processes may be loading the previous graph.
+        ann_path = self._directory / NUMPY_ANN_FILE
+        temp_path = ann_path.with_name(f".{ann_path.name}.{uuid4().hex}")
+        index.save_index(str(temp_path))
+        os.replace(temp_path, ann_path)
+
+    def candidates(self, ids: Collection[str], doc_ids: Collection[str]) -> CandidateSet:
+        with self._lock:
+            self._sync()
+            rows = self._connection.execute(
+                "SELECT row FROM vectors WHERE deleted = 0 AND id IN (SELECT value FROM json_each(?)) "
+                "UNION SELECT row FROM vectors WHERE deleted = 0 AND doc_id IN (SELECT value FROM json_each(?)) "
+                "ORDER BY row",
+                (json.dumps(sorted(ids)), json.dumps(sorted(doc_ids))),
+            ).fetchall()
+        return CandidateSet(
+            ids=tuple(sorted(ids)),
+            doc_ids=tuple(sorted(doc_ids)),
+            rows=self._np.array([row[0] for row in rows], dtype=self._np.int64),
+            version=self._rows_version,
+        )
+
+    def query(
+        self, embeddings: Sequence[Sequence[float]], k: int, candidates: CandidateSet | None = None
+    ) -> list[list[VectorHit]]:
+        np = self._np
+        with self._lock:
+            self._sync()
+            matrix = self._rows()
+            scope: Any = None
+            if candidates is not None:
+                if candidates.version != self._rows_version:
+                    candidates = self.candidates(candidates.ids, candidates.doc_ids)
+                # Rows tombstoned since the candidates were resolved drop out here.
+                scope = candidates.rows[self._live[candidates.rows]]
+                live_count = len(scope)
+            else:
+                live_count = int(self._live.sum())
+            if matrix is None or live_count == 0 or k <= 0:
+                return [[] for _ in embeddings]
+
+            queries = self._normalize(embeddings)
+            limit = min(k, live_count)
+            ann = self._load_ann() if scope is None and live_count >= self._ann_threshold else None
+            if ann is not None:
+                ann.set_ef(max(limit * 2, 64))
+                labels, distances = ann.knn_query(queries, k=limit)
+                ranked = [
+                    [
+                        (row, similarity)
+                        for row, similarity in zip(row_labels.tolist(), (1.0 - row_distances).tolist(), strict=True)
+                        if self._live[row]
+                    ]
+                    for row_labels, row_distances in zip(labels, distances, strict=True)
+                ]
+            else:
+                if scope is None:
+                    scores = self._decode(matrix[: len(self._live)]) @ queries.T
+                    scores[~self._live] = -np.inf
+                    scope = np.arange(len(self._live))
+                else:
+                    scores = self._decode(matrix[scope]) @ queries.T
+                ranked = []
+                for column in scores.T:
+                    top = np.argpartition(-column, limit - 1)[:limit]
+                    top = top[np.argsort(-column[top])]
+                    ranked.append([(int(scope[position]), float(column[position])) for position in top])
+
+            return [[self._hit(row, similarity) for row, similarity in hits] for hits in ranked]
+
+    def _hit(self, row: int, similarity: float) -> VectorHit:
+        record = self._connection.execute(
+            "SELECT id, text, metadata FROM vectors WHERE row = ?", (row,)
+        ).fetchone()
+        return VectorHit(
+            record=VectorRecord(
+                id=str(record["id"]), text=str(record["text"]), metadata=json.loads(record["metadata"])
+            ),
+            # Unit vectors: squared L2 distance = 2 - 2 * cosine, matching Chroma's scale.
+            score=relevance_from_squared_l2(2.0 - 2.0 * similarity),
+        )
+
+    def iter_records(self, batch_size: int) -> Iterator[tuple[list[VectorRecord], list[list[float]]]]:
+        with self._lock:
+            self._sync()
+            matrix = self._rows()
+            rows = self._connection.execute(
+                "SELECT row, id, text, metadata FROM vectors WHERE deleted = 0 ORDER BY row"
+            ).fetchall()
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            records = [
+                VectorRecord(id=str(row["id"]), text=str(row["text"]), metadata=json.loads(row["metadata"]))
+                for row in batch
+            ]
+            vectors = self._decode(matrix[[row["row"] for row in batch]])
+            yield records, vectors.tolist()
+
+    def compact(self, batch_rows: int = 65536) -> int:
+        """Rewrite the matrix without tombstoned rows, renumbering live rows; returns bytes reclaimed."""
+        np = self._np
+        with self._writing():
+            self._sync()
+            if self._live.all():
+                return 0
+
+            before = self._disk_usage()
+            live_rows = np.flatnonzero(self._live)
+            matrix = self._rows()
+            compact_path = self._directory / NUMPY_COMPACT_FILE
+            with compact_path.open("wb") as file_handle:
+                for start in range(0, len(live_rows), batch_rows):
+                    file_handle.write(np.ascontiguousarray(matrix[live_rows[start : start + batch_rows]]).tobytes())
+                file_handle.flush()
+                os.fsync(file_handle.fileno())
+
+            with self._connection:
+                self._connection.execute("DELETE FROM vectors WHERE deleted = 1")
+                # Ascending order never collides: each target row number is already free.
+                self._connection.executemany(
+                    "UPDATE vectors SET row = ? WHERE row = ?",
+                    [(new_row, int(old_row)) for new_row, old_row in enumerate(live_rows) if new_row != old_row],
+                )
+                self._rows_version = uuid4().hex
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+                    [("compacting", "1"), ("rows_version", self._rows_version)],
+                )
+                self._bump_version()
+            self._matrix = None
+            self._ann = None
+            self._live = np.ones(len(live_rows), dtype=bool)
+            self._finish_compaction()
+            vacuum(self._connection, self._directory / NUMPY_METADATA_FILE)
+            return max(0, before - self._disk_usage())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._ann is not None:
+                self._save_ann(self._ann)
+            self._matrix = None
+            self._connection.close()
+
+
+def create_vector_backend(kind: str | None = None, collection_name: str = DEFAULT_COLLECTION) -> VectorBackend:
+    kind = kind or settings.vector_backend
+    if kind == "chroma":
+        return ChromaBackend(collection_name)
+    if kind == "numpy":
+        return NumpyBackend(settings.vector_store_dir / "numpy" / collection_name)
+    raise ValueError(f"Unknown vector backend '{kind}'")
+
+
+def migrate_vectors(source: VectorBackend, target: VectorBackend, batch_size: int = 1000) -> int:
+    copied = 0
+    for records, embeddings in source.iter_records(batch_size):
+        target.add(records, embeddings)
+        copied += len(records)
+    return copied
@@ -1,10 +1,67 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 from rag_lab.core.config import ensure_runtime_directories, settings
+from rag_lab.core.metrics import CHUNKS_EMBEDDED, CHUNKS_REUSED, count_cache_lookup, timed
+from rag_lab.db.locks import exclusive_file_lock
+from rag_lab.services.chunk_registry import (
+    CHUNK_REGISTRY_NAME,
+    ChunkRegistry,
+    RegisteredDocument,
+    content_hash,
+)
+from rag_lab.services.embedding_backends import Embeddings, create_embeddings
+from rag_lab.services.file_storage_service import get_metadata_store
+from rag_lab.services.index_generation import get_index_generation
+from rag_lab.services.index_stamp import IndexStamp, collection_dir, current_stamp, ensure_stamp
+from rag_lab.services.lexical_index_service import (
+    LEXICAL_INDEX_NAME,
+    LexicalDocument,
+    LexicalIndex,
+    reciprocal_rank_fusion,
+)
+from rag_lab.services.retrieval_cache import (
+    get_filter_scope_cache,
+    get_query_embedding_cache,
+    get_retrieval_result_cache,
+    normalize_query,
+)
+from rag_lab.services.retrieval_filter import RetrievalFilter
+from rag_lab.services.vector_backends import (
+    CandidateSet,
+    VectorBackend,
+    VectorHit,
+    VectorRecord,
+    create_vector_backend,
+)
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+WRITE_LOCK_FILE_NAME = "write.lock"
+# How long a service replaced after a re-index swap stays open for requests still using it.
+RETIRED_SERVICE_GRACE_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class DocumentChunks:
+    doc_id: str
+    file_name: str
+    stored_path: Path
+    chunks: list[str]
 
 
 @dataclass(frozen=True)
@@ -14,86 +71,476 @@ class RetrievedChunk:
     chunk_id: str
     score: float
     text: str
+    chunk_index: int | None = None
+
+
+@dataclass(frozen=True)
+class FilterScope:
+    doc_ids: frozenset[str]
+    candidates: CandidateSet
+
+
+@dataclass(frozen=True)
+class CompactionReport:
+    vectors_compacted: bool
+    vector_bytes_reclaimed: int
+    sidecar_bytes_reclaimed: int
+    elapsed_seconds: float
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.vector_bytes_reclaimed + self.sidecar_bytes_reclaimed
+
+
+def _chunk_index_from_id(chunk_id: str) -> int | None:
+    _, _, index = chunk_id.rpartition(":")
+    return int(index) if index.isdigit() else None
 
 
 class VectorStoreService:
-    def __init__(self) -> None:
-        try:
-            from langchain_chroma import Chroma
-            from langchain_huggingface import HuggingFaceEmbeddings
-        except ModuleNotFoundError as exc:
-            raise RuntimeError("LangChain vector store dependencies are not installed") from exc
+    """Embeds, stores and searches chunks of one collection, by default the stamped one."""
 
+    def __init__(
+        self,
+        backend: VectorBackend | None = None,
+        embeddings: Embeddings | None = None,
+        *,
+        stamp: IndexStamp | None = None,
+    ) -> None:
         ensure_runtime_directories()
-        self._embeddings = HuggingFaceEmbeddings(
-            model_name=settings.embedding_model_name,
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True},
-        )
-        self._store: Any = Chroma(
-            collection_name="rag_lab_documents",
-            persist_directory=str(settings.vector_store_dir),
-            embedding_function=self._embeddings,
-        )
+        self.stamp = stamp or current_stamp()
+        self._embeddings = embeddings or create_embeddings(model_name=self.stamp.embedding_model_name)
+        self._backend = backend or create_vector_backend(collection_name=self.stamp.collection)
+        sidecar_dir = collection_dir(self.stamp.collection)
+        self._lexical = LexicalIndex(sidecar_dir / LEXICAL_INDEX_NAME)
+        self._registry = ChunkRegistry(sidecar_dir / CHUNK_REGISTRY_NAME)
+        self._write_lock_path = sidecar_dir / WRITE_LOCK_FILE_NAME
+        self._write_lock = threading.Lock()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Serialize "is this hash stored?" decisions with orphan deletes across threads and processes."""
+        with self._write_lock, exclusive_file_lock(self._write_lock_path):
+            yield
+
+    def close(self) -> None:
+        self._backend.close()
+        self._lexical.close()
+        self._registry.close()
+
+    def warm_up(self) -> None:
+        """Run one dummy encode and touch the collection so first requests pay no init cost."""
+        self._embeddings.embed_query("warm-up")
+        self._backend.count()
 
     def delete_document(self, doc_id: str) -> None:
-        self._store.delete(where={"doc_id": doc_id})
+        self.delete_documents([doc_id])
+
+    def delete_documents(self, doc_ids: list[str]) -> None:
+        if not doc_ids:
+            return
+        with self._writing():
+            orphaned = self._registry.delete_documents(doc_ids)
+            self._backend.delete(sorted(orphaned))
+            self._delete_legacy_vectors(doc_ids)
+            self._lexical.delete_documents(doc_ids)
+        get_index_generation().bump(doc_ids)
+
+    def compact(self) -> CompactionReport:
+        """Reclaim the disk space of deleted vectors and of the sidecar rows that referenced them."""
+        started = time.perf_counter()
+        with self._writing():
+            vector_bytes = self._backend.compact()
+            sidecar_bytes = self._registry.vacuum() + self._lexical.vacuum()
+        return CompactionReport(
+            vectors_compacted=vector_bytes is not None,
+            vector_bytes_reclaimed=vector_bytes or 0,
+            sidecar_bytes_reclaimed=sidecar_bytes,
+            elapsed_seconds=time.perf_counter() - started,
+        )
+
+    def _delete_legacy_vectors(self, doc_ids: list[str]) -> None:
+        # Vectors written before chunks were content-addressed are keyed by doc_id, not content hash.
+        for doc_id in doc_ids:
+            self._backend.delete_document(doc_id)
+
+    def count_document_chunks(self, doc_id: str) -> int:
+        return self._registry.count_document(doc_id)
 
     def upsert_document_chunks(self, *, doc_id: str, file_name: str, stored_path: Path, chunks: list[str]) -> int:
-        try:
-            from langchain_core.documents import Document
-        except ModuleNotFoundError as exc:
-            raise RuntimeError("LangChain core dependency is not installed") from exc
-
-        self.delete_document(doc_id)
-        documents: list[Any] = []
-        ids: list[str] = []
-
-        for index, chunk in enumerate(chunks):
-            chunk_id = f"{doc_id}:{index}"
-            metadata = {
-                "doc_id": doc_id,
-                "file_name": file_name,
-                "stored_path": str(stored_path),
-                "chunk_index": index,
-                "chunk_id": chunk_id,
-            }
-            documents.append(Document(page_content=chunk, metadata=metadata))
-            ids.append(chunk_id)
-
-        if not documents:
-            return 0
-
-        self._store.add_documents(documents=documents, ids=ids)
-        return len(documents)
-
-    def search(self, *, query: str, top_k: int, score_threshold: float) -> list[RetrievedChunk]:
-        pairs = self._store.similarity_search_with_relevance_scores(query, k=top_k)
-        results: list[RetrievedChunk] = []
+        return self.upsert_documents(
+            [DocumentChunks(doc_id=doc_id, file_name=file_name, stored_path=stored_path, chunks=chunks)]
+        )[0]
+
+    def upsert_documents(self, documents: list[DocumentChunks]) -> list[int]:
+        """Index documents' chunks, embedding only content no document has stored yet."""
+        hashes = {document.doc_id: [content_hash(chunk) for chunk in document.chunks] for document in documents}
+        texts = {
+            value: chunk
+            for document in documents
+            for value, chunk in zip(hashes[document.doc_id], document.chunks, strict=True)
+        }
+        with timed("ingestion", "embed"):
+            embedded = self._embed_contents(self._registry.missing(texts), texts)
+
+        with timed("ingestion", "store"), self._writing():
+            # A concurrent delete may have orphaned a hash we expected to reuse.
+            late = self._registry.missing(texts) - embedded.keys()
+            embedded.update(self._embed_contents(late, texts))
+            if embedded:
+                self._backend.add(
+                    [
+                        VectorRecord(id=value, text=texts[value], metadata={"content_hash": value})
+                        for value in embedded
+                    ],
+                    list(embedded.values()),
+                )
+            self._delete_legacy_vectors([document.doc_id for document in documents])
+            orphaned = self._registry.replace_documents(
+                [
+                    RegisteredDocument(
+                        doc_id=document.doc_id,
+                        file_name=document.file_name,
+                        stored_path=str(document.stored_path),
+                        hashes=hashes[document.doc_id],
+                    )
+                    for document in documents
+                ]
+            )
+            self._backend.delete(sorted(orphaned))
+            self._lexical.replace_documents(
+                [
+                    LexicalDocument(
+                        doc_id=document.doc_id,
+                        file_name=document.file_name,
+                        chunk_ids=[f"{document.doc_id}:{index}" for index in range(len(document.chunks))],
+                        chunks=document.chunks,
+                    )
+                    for document in documents
+                ]
+            )
+        total_chunks = sum(len(document.chunks) for document in documents)
+        CHUNKS_EMBEDDED.inc(len(embedded))
+        CHUNKS_REUSED.inc(total_chunks - len(embedded))
+        get_index_generation().bump([document.doc_id for document in documents])
+        return [len(document.chunks) for document in documents]
+
+    def _embed_contents(self, hashes: set[str], texts: dict[str, str]) -> dict[str, list[float]]:
+        ordered = sorted(hashes)
+        if not ordered:
+            return {}
+        vectors = self._embeddings.embed_documents([texts[value] for value in ordered])
+        return dict(zip(ordered, vectors, strict=True))
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed queries, reusing cached vectors and encoding all misses in one batch."""
+        cache = get_query_embedding_cache()
+        keys = [(self.stamp.embedding_model_name, normalize_query(query)) for query in queries]
+        embeddings: list[list[float] | None] = [cache.get(key) for key in keys]
+
+        missing = [index for index, embedding in enumerate(embeddings) if embedding is None]
+        for embedding in embeddings:
+            count_cache_lookup("query_embedding", embedding is not None)
+        if missing:
+            with timed("retrieval", "embed_query"):
+                computed = self._embeddings.embed_queries([queries[index] for index in missing])
+            for index, embedding in zip(missing, computed, strict=True):
+                embeddings[index] = embedding
+                cache.put(keys[index], embedding)
+
+        return [embedding for embedding in embeddings if embedding is not None]
+
+    def embed_query(self, query: str) -> list[float]:
+        return self.embed_queries([query])[0]
+
+    def search(
+        self, *, query: str, top_k: int, score_threshold: float, filters: RetrievalFilter | None = None
+    ) -> list[RetrievedChunk]:
+        return self.search_batch(queries=[query], top_k=top_k, score_threshold=score_threshold, filters=filters)[0]
+
+    def _filter_scope(self, filters: RetrievalFilter, generation: str) -> FilterScope:
+        """Resolve a filter to its documents and candidate vectors, cached per index generation."""
+        cache = get_filter_scope_cache()
+        key = (self.stamp.collection, generation, filters)
+        scope = cache.get(key)
+        count_cache_lookup("filter_scope", scope is not None)
+        if scope is None:
+            with timed("retrieval", "filter_scope"):
+                doc_ids = get_metadata_store().matching_doc_ids(filters)
+                hashes = self._registry.document_hashes(doc_ids) if doc_ids else set()
+                scope = FilterScope(doc_ids=frozenset(doc_ids), candidates=self._backend.candidates(hashes, doc_ids))
+            cache.put(key, scope)
+        return scope
+
+    def search_batch(
+        self,
+        *,
+        queries: list[str],
+        top_k: int,
+        score_threshold: float,
+        filters: RetrievalFilter | None = None,
+    ) -> list[list[RetrievedChunk]]:
+        """Answer many queries with one batched encode and one similarity query, optionally fused with BM25."""
+        cache = get_retrieval_result_cache()
+        generation = get_index_generation().current()
+        mode = settings.retrieval_mode
+        keys = [(generation, mode, normalize_query(query), top_k, score_threshold, filters) for query in queries]
+        results: list[list[RetrievedChunk] | None] = []
+        for key in keys:
+            cached = cache.get(key)
+            count_cache_lookup("retrieval_results", cached is not None)
+            results.append(list(cached) if cached is not None else None)
 
-        for document, score in pairs:
-            if score < score_threshold:
-                continue
+        missing = [index for index, result in enumerate(results) if result is None]
+        scope = self._filter_scope(filters, generation) if missing and filters is not None else None
+        if scope is not None and not scope.doc_ids:
+            for index in missing:
+                results[index] = []
+                cache.put(keys[index], ())
+            missing = []
+        if missing:
+            embeddings = self.embed_queries([queries[index] for index in missing])
+            n_results = max(top_k, settings.hybrid_candidates) if mode == "hybrid" else top_k
+            with timed("retrieval", "vector_search"):
+                if scope is None:
+                    hit_lists = self._backend.query(embeddings, n_results)
+                else:
+                    hit_lists = self._backend.query(embeddings, n_results, scope.candidates)
+            doc_ids = scope.doc_ids if scope is not None else None
+            for index, hits in zip(missing, hit_lists, strict=True):
+                chunks = self._to_chunks(hits, score_threshold, doc_ids)
+                if mode == "hybrid":
+                    chunks = self._fuse_with_lexical(queries[index], chunks, doc_ids)
+                chunks = _collapse_duplicates(chunks)[:top_k]
+                results[index] = chunks
+                cache.put(keys[index], tuple(chunks))
 
-            metadata = document.metadata
+        return [result or [] for result in results]
+
+    def _fuse_with_lexical(
+        self, query: str, dense: list[RetrievedChunk], doc_ids: frozenset[str] | None = None
+    ) -> list[RetrievedChunk]:
+        with timed("retrieval", "lexical_search"):
+            lexical = self._lexical.search(query, settings.hybrid_candidates, doc_ids)
+        by_id = {chunk.chunk_id: chunk for chunk in dense}
+        for hit in lexical:
+            by_id.setdefault(
+                hit.chunk_id,
+                RetrievedChunk(
+                    doc_id=hit.doc_id,
+                    file_name=hit.file_name,
+                    chunk_id=hit.chunk_id,
+                    score=0.0,
+                    text=hit.text,
+                    chunk_index=_chunk_index_from_id(hit.chunk_id),
+                ),
+            )
+
+        fused = reciprocal_rank_fusion(
+            [[chunk.chunk_id for chunk in dense], [hit.chunk_id for hit in lexical]],
+            k=settings.hybrid_rrf_k,
+        )
+        return [replace(by_id[chunk_id], score=score) for chunk_id, score in fused]
+
+    def _to_chunks(
+        self, hits: list[VectorHit], score_threshold: float, doc_ids: frozenset[str] | None = None
+    ) -> list[RetrievedChunk]:
+        hits = [hit for hit in hits if hit.score >= score_threshold]
+        refs = self._registry.resolve(
+            (hit.record.metadata["content_hash"] for hit in hits if "content_hash" in hit.record.metadata),
+            doc_ids,
+        )
+        results: list[RetrievedChunk] = []
+        for hit in hits:
+            metadata = hit.record.metadata
+            if "content_hash" in metadata:
+                ref = refs.get(str(metadata["content_hash"]))
+                if ref is None:
+                    # Orphaned vector whose delete has not landed yet.
+                    continue
+                doc_id, file_name, chunk_id = ref.doc_id, ref.file_name, ref.chunk_id
+            else:
+                doc_id = str(metadata.get("doc_id", ""))
+                file_name = str(metadata.get("file_name", "unknown"))
+                chunk_id = str(metadata.get("chunk_id", hit.record.id))
             results.append(
                 RetrievedChunk(
-                    doc_id=str(metadata.get("doc_id", "")),
-                    file_name=str(metadata.get("file_name", "unknown")),
-                    chunk_id=str(metadata.get("chunk_id", "")),
-                    score=float(score),
-                    text=document.page_content,
+                    doc_id=doc_id,
+                    file_name=file_name,
+                    chunk_id=chunk_id,
+                    score=float(hit.score),
+                    text=hit.record.text,
+                    chunk_index=_chunk_index_from_id(chunk_id),
                 )
             )
-
         return results
 
 
+def _collapse_duplicates(chunks: list[RetrievedChunk]) -> list[RetrievedChunk]:
+    """Keep only the best-ranked chunk for each distinct content (e.g. shared boilerplate)."""
+    seen: set[str] = set()
+    unique: list[RetrievedChunk] = []
+    for chunk in chunks:
+        key = content_hash(chunk.text)
+        if key not in seen:
+            seen.add(key)
+            unique.append(chunk)
+    return unique
+
+
 _vector_store_service: VectorStoreService | None = None
+_vector_store_lock = threading.Lock()
+
+
+_switching_to: IndexStamp | None = None
+_switch_settled = threading.Condition(_vector_store_lock)
 
 
 def get_vector_store_service() -> VectorStoreService:
-    global _vector_store_service
-    if _vector_store_service is None:
-        _vector_store_service = VectorStoreService()
-    return _vector_store_service
+    """Return the active collection's service; a newly swapped-in collection is opened in the background."""
+    global _vector_store_service, _switching_to
+    stamp = current_stamp()
+    service = _vector_store_service
+    if service is not None and service.stamp == stamp:
+        return service
+    with _vector_store_lock:
+        if _vector_store_service is None:
+            _vector_store_service = VectorStoreService(stamp=ensure_stamp())
+        elif _vector_store_service.stamp != stamp and _switching_to != stamp:
+            _switching_to = stamp
+            threading.Thread(target=_switch_service, args=(stamp,), name="vector-store-switch", daemon=True).start()
+        return _vector_store_service
+
+
+def get_vector_store_writer() -> VectorStoreService:
+    """Like ``get_vector_store_service`` but waits out a pending switch, so no write lands in a retiring collection."""
+    get_vector_store_service()
+    with _switch_settled:
+        _switch_settled.wait_for(lambda: _switching_to is None)
+        assert _vector_store_service is not None
+        return _vector_store_service
+
+
+def _switch_service(stamp: IndexStamp) -> None:
+    global _vector_store_service, _switching_to
+    try:
+        service = VectorStoreService(stamp=stamp)
+        service.warm_up()
+    except Exception:  # noqa: BLE001
+        logger.exception("Could not open collection '%s'; still serving the previous one", stamp.collection)
+        with _vector_store_lock:
+            _switching_to = None
+            _switch_settled.notify_all()
+        return
+    with _vector_store_lock:
+        retired, _vector_store_service = _vector_store_service, service
+        _switching_to = None
+        _switch_settled.notify_all()
+    logger.info("Switched vector store to collection '%s'", stamp.collection)
+    if retired is not None:
+        time.sleep(RETIRED_SERVICE_GRACE_SECONDS)
+        retired.close()
+
+
+class AsyncVectorStoreService:
+    """Runs blocking vector store calls on a bounded pool, keeping one thread free of writes."""
+
+    def __init__(
+        self,
+        factory: Callable[[], VectorStoreService] = get_vector_store_service,
+        *,
+        write_factory: Callable[[], VectorStoreService] | None = None,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+    ) -> None:
+        workers = max(2, max_workers or settings.vector_store_workers)
+        self._factory = factory
+        self._write_factory = write_factory or factory
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vector-store")
+        self._pending = asyncio.Semaphore(max(1, max_pending or settings.vector_store_max_pending))
+        self._writes = asyncio.Semaphore(workers - 1)
+
+    async def _run(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            # Run in a copy of the caller's context so stage timings reach its Server-Timing header.
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, partial(context.run, func, *args, **kwargs))
+
+    def _call(self, method: str, /, *args: Any, **kwargs: Any) -> Any:
+        return getattr(self._factory(), method)(*args, **kwargs)
+
+    def _call_writer(self, method: str, /, *args: Any, **kwargs: Any) -> Any:
+        return getattr(self._write_factory(), method)(*args, **kwargs)
+
+    async def search(
+        self, *, query: str, top_k: int, score_threshold: float, filters: RetrievalFilter | None = None
+    ) -> list[RetrievedChunk]:
+        return await self._run(
+            self._call, "search", query=query, top_k=top_k, score_threshold=score_threshold, filters=filters
+        )
+
+    async def search_batch(
+        self,
+        *,
+        queries: list[str],
+        top_k: int,
+        score_threshold: float,
+        filters: RetrievalFilter | None = None,
+    ) -> list[list[RetrievedChunk]]:
+        return await self._run(
+            self._call,
+            "search_batch",
+            queries=queries,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            filters=filters,
+        )
+
+    async def upsert_document_chunks(
+        self, *, doc_id: str, file_name: str, stored_path: Path, chunks: list[str]
+    ) -> int:
+        async with self._writes:
+            return await self._run(
+                self._call_writer,
+                "upsert_document_chunks",
+                doc_id=doc_id,
+                file_name=file_name,
+                stored_path=stored_path,
+                chunks=chunks,
+            )
+
+    async def upsert_documents(self, documents: list[DocumentChunks]) -> list[int]:
+        async with self._writes:
+            return await self._run(self._call_writer, "upsert_documents", documents)
+
+    async def warm_up(self) -> None:
+        await self._run(self._call, "warm_up")
+
+    async def count_document_chunks(self, doc_id: str) -> int:
+        return await self._run(self._call, "count_document_chunks", doc_id)
+
+    async def delete_document(self, doc_id: str) -> None:
+        async with self._writes:
+            await self._run(self._call_writer, "delete_document", doc_id)
+
+    async def delete_documents(self, doc_ids: list[str]) -> None:
+        async with self._writes:
+            await self._run(self._call_writer, "delete_documents", doc_ids)
+
+    async def compact(self) -> CompactionReport:
+        async with self._writes:
+            return await self._run(self._call_writer, "compact")
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_async_vector_store_service: AsyncVectorStoreService | None = None
+
+
+def get_async_vector_store_service() -> AsyncVectorStoreService:
+    global _async_vector_store_service
+    if _async_vector_store_service is None:
+        _async_vector_store_service = AsyncVectorStoreService(write_factory=get_vector_store_writer)
+    return _async_vector_store_service
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+from rag_lab.core.config import settings
+from rag_lab.services.chat_service import ChatServiceError, preload_model
+from rag_lab.services.vector_store_service import get_async_vector_store_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    error: str | None = None
+    durations: dict[str, float] = field(default_factory=dict)
+
+
+_state = WarmupState()
+
+
+def get_warmup_state() -> WarmupState:
+    return _state
+
+
+def mark_ready() -> None:
+    _state.ready = True
+    _state.error = None
+
+
+async def run_warmup() -> None:
+    """Preload the embedding model, vector store and (optionally) the Ollama model."""
+    started = time.perf_counter()
+    try:
+        await get_async_vector_store_service().warm_up()
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Vector store warm-up failed")
+        _state.error = f"Vector store warm-up failed: {exc}"
+        return
+    _state.durations["vector_store"] = time.perf_counter() - started
+
+    if settings.warmup_ollama:
+        started = time.perf_counter()
+        try:
+            await preload_model()
+        except ChatServiceError as exc:
+            logger.warning("Ollama model preload failed: %s", exc.detail)
+        else:
+            _state.durations["ollama"] = time.perf_counter() - started
+
+    mark_ready()
+    logger.info("Warm-up finished: %s", _state.durations)
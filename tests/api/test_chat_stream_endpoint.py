@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from rag_lab.main import app
+from rag_lab.services.vector_store_service import AsyncVectorStoreService, RetrievedChunk
+
+
+class _FakeVectorStore:
+    def search(self, *, query: str, top_k: int, score_threshold: float, filters=None):
+        return [
+            RetrievedChunk(
+                doc_id="doc-1",
+                file_name="guide.md",
+                chunk_id="doc-1:0",
+                score=0.9,
+                text="Some useful context",
+            )
+        ]
+
+
+async def _fake_stream_answer(prompt: str):
+    for token in ["Hello", ", ", "world"]:
+        yield token
+
+
+def test_chat_stream_sends_sources_before_tokens(monkeypatch):
+    monkeypatch.setattr(
+        "rag_lab.services.rag_service.get_async_vector_store_service",
+        lambda: AsyncVectorStoreService(lambda: _FakeVectorStore()),
+    )
+    monkeypatch.setattr("rag_lab.services.rag_service.stream_answer", _fake_stream_answer)
+
+    client = TestClient(app)
+    response = client.post("/api/v1/ollama/chat/chat/stream", json={"message": "Hi?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n")[0] for block in response.text.strip().split("\n\n")]
+    assert events == [
+        "event: sources",
+        "event: token",
+        "event: token",
+        "event: token",
+        "event: done",
+    ]
+    assert '"doc-1:0"' in response.text
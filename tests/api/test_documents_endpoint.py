@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+
+from rag_lab.core.config import settings
+from rag_lab.main import app
+from rag_lab.services.file_storage_service import save_local_file
+
+
+class _RecordingVectorStore:
+    def __init__(self):
+        self.deleted = []
+
+    async def delete_documents(self, doc_ids):
+        self.deleted.append(list(doc_ids))
+
+
+def test_list_and_delete_documents(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path / "data")
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "data" / "uploads")
+    store = _RecordingVectorStore()
+    monkeypatch.setattr("rag_lab.services.document_service.get_async_vector_store_service", lambda: store)
+    stored = []
+    for name, text in [("a.txt", "alpha"), ("b.md", "beta"), ("c.txt", "gamma")]:
+        (tmp_path / name).write_text(text, encoding="utf-8")
+        stored.append(save_local_file(tmp_path / name))
+    client = TestClient(app)
+
+    page = client.get("/api/v1/documents", params={"offset": 1, "limit": 1}).json()
+    assert page["total"] == 3
+    assert len(page["documents"]) == 1
+
+    response = client.delete(f"/api/v1/documents/{stored[0].doc_id}")
+    assert response.status_code == 200
+    assert not stored[0].stored_path.exists()
+    assert not stored[0].stored_path.with_suffix(".txt.json").exists()
+
+    response = client.post(
+        "/api/v1/documents/delete:batch", json={"doc_ids": [stored[1].doc_id, stored[2].doc_id, "missing"]}
+    )
+    assert [item["original_filename"] for item in response.json()["deleted"]] == ["b.md", "c.txt"]
+    assert response.json()["not_found"] == ["missing"]
+    assert store.deleted == [[stored[0].doc_id], [stored[1].doc_id, stored[2].doc_id]]
+    assert client.get("/api/v1/documents").json()["total"] == 0
+    assert client.delete(f"/api/v1/documents/{stored[0].doc_id}").status_code == 404
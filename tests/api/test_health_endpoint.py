@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from rag_lab.main import app
+from rag_lab.services import warmup_service
+
+
+def test_readiness_reports_warmup_state(monkeypatch):
+    monkeypatch.setattr(warmup_service, "_state", warmup_service.WarmupState())
+    client = TestClient(app)
+
+    assert client.get("/health/ready").status_code == 503
+
+    warmup_service.mark_ready()
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_importing_app_does_not_load_torch():
+    code = "import sys, rag_lab.main; print('torch' in sys.modules or 'sentence_transformers' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == "False"
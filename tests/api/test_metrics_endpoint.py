@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+
+from rag_lab.main import app
+from rag_lab.services.vector_store_service import AsyncVectorStoreService, RetrievedChunk
+
+
+class _FakeVectorStore:
+    def search(self, *, query: str, top_k: int, score_threshold: float, filters=None):
+        return [
+            RetrievedChunk(
+                doc_id="doc-1", file_name="guide.md", chunk_id="doc-1:0", score=0.9, text="Some useful context"
+            )
+        ]
+
+
+async def _fake_generate_answer(prompt: str) -> str:
+    return "mocked answer"
+
+
+def test_chat_reports_stage_timings_and_metrics(monkeypatch):
+    monkeypatch.setattr(
+        "rag_lab.services.rag_service.get_async_vector_store_service",
+        lambda: AsyncVectorStoreService(lambda: _FakeVectorStore()),
+    )
+    monkeypatch.setattr("rag_lab.services.rag_service.generate_answer", _fake_generate_answer)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/ollama/chat/chat", json={"message": "Which stage is slow?"})
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert "chat.retrieve;dur=" in timing
+    assert "chat.prompt_build;dur=" in timing
+    assert "total;dur=" in timing
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'rag_lab_stage_duration_seconds_count{pipeline="chat",stage="retrieve"}' in metrics.text
+    assert 'rag_lab_cache_requests_total{cache="answer",result="miss"}' in metrics.text
@@ -0,0 +1,38 @@
+import pytest
+
+from rag_lab.core.config import settings
+from rag_lab.services.index_stamp import IndexStamp
+from rag_lab.services.vector_backends import NumpyBackend
+from rag_lab.services.vector_store_service import VectorStoreService
+
+
+class BagOfLettersEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[text.count(letter) + 0.01 for letter in "aeiostn"] for text in texts]
+
+    def embed_queries(self, texts):
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_queries([text])[0]
+
+
+@pytest.fixture
+def vector_store_factory(monkeypatch, tmp_path):
+    """Build a ``VectorStoreService`` on a "test" collection under ``tmp_path``."""
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+
+    def _factory(*, backend=None, embeddings=None):
+        return VectorStoreService(
+            backend=backend or NumpyBackend(tmp_path / "numpy"),
+            embeddings=embeddings or BagOfLettersEmbeddings(),
+            stamp=IndexStamp(collection="test", fingerprint="test", embedding_model_name="fake"),
+        )
+
+    return _factory
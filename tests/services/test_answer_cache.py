@@ -0,0 +1,32 @@
+import asyncio
+
+from rag_lab.services.answer_cache import AnswerCache, answer_cache_key
+
+
+def test_concurrent_identical_questions_share_one_generation():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60)
+    calls = 0
+
+    async def _generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def _scenario():
+        key = answer_cache_key("What is  RAG?", ["doc-1:0", "doc-2:3"], "llama3.1:8b")
+        same_key = answer_cache_key("what is RAG?", ["doc-2:3", "doc-1:0"], "llama3.1:8b")
+        answers = await asyncio.gather(
+            *(cache.get_or_generate(key, {"doc-1", "doc-2"}, _generate) for _ in range(25)),
+            cache.get_or_generate(same_key, {"doc-1", "doc-2"}, _generate),
+        )
+        return key, answers
+
+    key, answers = asyncio.run(_scenario())
+
+    assert calls == 1
+    assert set(answers) == {"answer"}
+    assert cache.get(key) == "answer"
+
+    cache.evict_documents(["doc-2"])
+    assert cache.get(key) is None
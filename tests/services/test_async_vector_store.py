@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from rag_lab.core.config import Settings
+from rag_lab.services.vector_store_service import AsyncVectorStoreService
+
+
+class _SlowVectorStore:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def upsert_document_chunks(self, *, doc_id, file_name, stored_path, chunks):
+        self.release.wait(timeout=5)
+        return len(chunks)
+
+    def search(self, *, query: str, top_k: int, score_threshold: float, filters=None):
+        return []
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_search_is_not_blocked_by_running_upserts(max_workers):
+    store = _SlowVectorStore()
+    facade = AsyncVectorStoreService(lambda: store, max_workers=max_workers, max_pending=8)
+
+    async def _scenario():
+        upserts = [
+            asyncio.create_task(
+                facade.upsert_document_chunks(doc_id=f"doc-{i}", file_name="a.txt", stored_path=None, chunks=["x"])
+            )
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        results = await asyncio.wait_for(facade.search(query="q", top_k=4, score_threshold=0.2), timeout=1)
+        elapsed = time.perf_counter() - started
+
+        store.release.set()
+        counts = await asyncio.gather(*upserts)
+        return results, elapsed, counts
+
+    try:
+        results, elapsed, counts = asyncio.run(_scenario())
+    finally:
+        facade.shutdown()
+
+    assert results == []
+    assert elapsed < 1
+    assert counts == [1, 1, 1]
+
+
+def test_settings_reject_a_single_vector_store_worker(monkeypatch):
+    monkeypatch.setenv("RAG_LAB_VECTOR_STORE_WORKERS", "1")
+
+    with pytest.raises(ValidationError):
+        Settings()
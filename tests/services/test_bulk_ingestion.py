@@ -0,0 +1,43 @@
+from rag_lab.core.config import settings
+from rag_lab.services.bulk_ingestion_service import BulkIngestor
+
+
+class _RecordingVectorStore:
+    def __init__(self):
+        self.batches = []
+        self.counts = {}
+
+    def upsert_documents(self, documents):
+        self.batches.append(sorted(document.file_name for document in documents))
+        for document in documents:
+            self.counts[document.doc_id] = len(document.chunks)
+        return [len(document.chunks) for document in documents]
+
+    def count_document_chunks(self, doc_id):
+        return self.counts.get(doc_id, 0)
+
+
+def test_bulk_ingest_batches_files_and_resumes_from_checkpoint(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path / "data")
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "data" / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "data" / "vector_store")
+    source = tmp_path / "docs"
+    (source / "nested").mkdir(parents=True)
+    (source / "a.txt").write_text("Alpha policy text.", encoding="utf-8")
+    (source / "nested" / "b.md").write_text("# Beta\n\nBeta runbook.", encoding="utf-8")
+    (source / "nested" / "copy-of-a.txt").write_text("Alpha policy text.", encoding="utf-8")
+    (source / "empty.txt").write_text("", encoding="utf-8")
+    (source / "table.csv").write_text("x,y", encoding="utf-8")
+    (source / ".hidden.txt").write_text("ignored", encoding="utf-8")
+    store = _RecordingVectorStore()
+
+    first = BulkIngestor(workers=1, batch_chunks=1000, service=store).run(source)
+
+    assert store.batches == [["a.txt", "b.md"]]
+    assert (first.files_seen, first.indexed, first.skipped, first.failed) == (4, 2, 1, 1)
+
+    (source / "a.txt").write_text("Alpha policy text, revised.", encoding="utf-8")
+    second = BulkIngestor(workers=1, batch_chunks=1000, service=store).run(source)
+
+    assert store.batches[1:] == [["a.txt"]]
+    assert (second.indexed, second.resumed, second.failed) == (1, 2, 1)
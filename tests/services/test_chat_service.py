@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from rag_lab.core.metrics import OLLAMA_SECONDS, OLLAMA_TOKENS
+from rag_lab.services import chat_service
+from rag_lab.services.chat_service import ChatServiceError, GenerationAdmission
+
+
+def test_admission_rejects_when_queue_is_full():
+    admission = GenerationAdmission(max_concurrent=1, max_queued=1)
+
+    async def _scenario():
+        release = asyncio.Event()
+
+        async def _hold():
+            async with admission.slot():
+                await release.wait()
+
+        running = asyncio.create_task(_hold())
+        waiting = asyncio.create_task(_hold())
+        await asyncio.sleep(0)
+        assert (admission.in_flight, admission.queued) == (1, 1)
+
+        with pytest.raises(ChatServiceError) as exc_info:
+            async with admission.slot():
+                pass
+
+        release.set()
+        await asyncio.gather(running, waiting)
+        return exc_info.value
+
+    error = asyncio.run(_scenario())
+
+    assert error.status_code == 503
+    assert error.retry_after is not None
+    assert (admission.in_flight, admission.queued) == (0, 0)
+
+
+def test_generate_answer_records_ollama_eval_stats(monkeypatch):
+    def _handler(request):
+        return httpx.Response(
+            200,
+            json={
+                "response": "ok",
+                "done": True,
+                "prompt_eval_count": 120,
+                "prompt_eval_duration": 300_000_000,
+                "eval_count": 42,
+                "eval_duration": 1_500_000_000,
+            },
+        )
+
+    monkeypatch.setattr(chat_service, "_client", httpx.AsyncClient(transport=httpx.MockTransport(_handler)))
+    monkeypatch.setattr(chat_service, "_admission", None)
+    tokens_before = OLLAMA_TOKENS.value(phase="eval")
+    observations_before = OLLAMA_SECONDS.count(phase="eval")
+
+    assert asyncio.run(chat_service.generate_answer("hi")) == "ok"
+    assert OLLAMA_TOKENS.value(phase="eval") - tokens_before == 42
+    assert OLLAMA_SECONDS.count(phase="eval") - observations_before == 1
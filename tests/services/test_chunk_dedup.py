@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from rag_lab.db.locks import exclusive_file_lock
+from rag_lab.services.index_stamp import collection_dir
+from rag_lab.services.vector_backends import NumpyBackend
+from rag_lab.services.vector_store_service import WRITE_LOCK_FILE_NAME, DocumentChunks
+
+pytest.importorskip("numpy")
+
+BOILERPLATE = "Confidential. Do not distribute outside the company."
+
+
+def test_shared_chunks_are_embedded_once_and_deleted_when_orphaned(vector_store_factory, tmp_path):
+    service = vector_store_factory()
+
+    service.upsert_document_chunks(
+        doc_id="v1", file_name="policy-v1.md", stored_path=tmp_path / "v1", chunks=[BOILERPLATE, "Leave is 20 days."]
+    )
+    service.upsert_document_chunks(
+        doc_id="v2", file_name="policy-v2.md", stored_path=tmp_path / "v2", chunks=[BOILERPLATE, "Leave is 25 days."]
+    )
+
+    assert service._embeddings.texts.count(BOILERPLATE) == 1
+    assert service._backend.count() == 3
+    assert service.count_document_chunks("v2") == 2
+
+    hits = service.search(query=f"  {BOILERPLATE} ", top_k=5, score_threshold=-1.0)
+    assert [chunk.text for chunk in hits].count(BOILERPLATE) == 1
+
+    service.delete_document("v1")
+    assert service._backend.count() == 2
+    hits = service.search(query=BOILERPLATE, top_k=5, score_threshold=-1.0)
+    assert [chunk.chunk_id for chunk in hits if chunk.text == BOILERPLATE] == ["v2:0"]
+
+    service.delete_document("v2")
+    assert service._backend.count() == 0
+
+    report = service.compact()
+    assert report.vectors_compacted
+    assert report.vector_bytes_reclaimed > 0
+
+
+def test_batched_upsert_embeds_once_and_keeps_content_moved_between_documents(vector_store_factory, tmp_path):
+    service = vector_store_factory()
+    service.upsert_document_chunks(doc_id="a", file_name="a.md", stored_path=tmp_path / "a", chunks=["Moved text."])
+
+    counts = service.upsert_documents(
+        [
+            DocumentChunks(doc_id="a", file_name="a.md", stored_path=tmp_path / "a", chunks=["New text for a."]),
+            DocumentChunks(doc_id="b", file_name="b.md", stored_path=tmp_path / "b", chunks=["Moved text.", BOILERPLATE]),
+            DocumentChunks(doc_id="c", file_name="c.md", stored_path=tmp_path / "c", chunks=[BOILERPLATE]),
+        ]
+    )
+
+    assert counts == [1, 2, 1]
+    assert sorted(service._embeddings.texts) == sorted(["Moved text.", BOILERPLATE, "New text for a."])
+    assert service._backend.count() == 3
+    hits = service.search(query="Moved text.", top_k=1, score_threshold=-1.0)
+    assert [chunk.chunk_id for chunk in hits] == ["b:0"]
+
+
+def test_upserts_wait_for_the_collection_write_lock(vector_store_factory, tmp_path):
+    service = vector_store_factory()
+    writer = threading.Thread(
+        target=service.upsert_document_chunks,
+        kwargs={"doc_id": "v1", "file_name": "v1.md", "stored_path": tmp_path / "v1", "chunks": [BOILERPLATE]},
+    )
+
+    with exclusive_file_lock(collection_dir("test") / WRITE_LOCK_FILE_NAME):
+        writer.start()
+        writer.join(timeout=0.2)
+        assert writer.is_alive()
+        assert service.count_document_chunks("v1") == 0
+    writer.join(timeout=5)
+
+    assert service.count_document_chunks("v1") == 1
+
+
+class _UncompactableBackend(NumpyBackend):
+    def compact(self):
+        return None
+
+
+def test_compaction_reports_backends_that_cannot_compact(vector_store_factory, tmp_path):
+    service = vector_store_factory(backend=_UncompactableBackend(tmp_path / "numpy"))
+
+    report = service.compact()
+
+    assert not report.vectors_compacted
+    assert report.vector_bytes_reclaimed == 0
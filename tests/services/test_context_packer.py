@@ -0,0 +1,37 @@
+from rag_lab.services.context_packer import pack_context
+from rag_lab.services.vector_store_service import RetrievedChunk
+
+
+def _chunk(doc_id, index, text, score):
+    return RetrievedChunk(
+        doc_id=doc_id, file_name=f"{doc_id}.md", chunk_id=f"{doc_id}:{index}", score=score, text=text, chunk_index=index
+    )
+
+
+def test_pack_context_merges_neighbours_and_strips_overlap():
+    first = "Install the CLI first. Then configure the retrieval threshold carefully."
+    second = "configure the retrieval threshold carefully. Restart the API afterwards."
+
+    packed = pack_context(
+        [_chunk("doc", 1, second, 0.7), _chunk("doc", 0, first, 0.9)],
+        budget_tokens=1000,
+        chars_per_token=4.0,
+        max_overlap=120,
+    )
+
+    [block] = packed.blocks
+    assert block.chunk_ids == ("doc:0", "doc:1")
+    assert block.text.count("configure the retrieval threshold") == 1
+    assert block.text.endswith("Restart the API afterwards.")
+    assert (packed.chunks_used, packed.chunks_dropped, packed.tokens_dropped) == (2, 0, 0)
+
+
+def test_pack_context_orders_by_score_and_reports_dropped_tokens():
+    chunks = [_chunk("low", 0, "l" * 400, 0.3), _chunk("high", 0, "h" * 400, 0.9), _chunk("mid", 0, "m" * 400, 0.6)]
+
+    packed = pack_context(chunks, budget_tokens=160, chars_per_token=4.0, max_overlap=120)
+
+    assert [(block.doc_id, block.truncated) for block in packed.blocks] == [("high", False), ("mid", True)]
+    assert packed.tokens_used <= packed.budget_tokens
+    assert packed.chunks_dropped == 1
+    assert packed.tokens_dropped > 100
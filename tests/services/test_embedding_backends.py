@@ -0,0 +1,71 @@
+import threading
+import time
+
+from rag_lab.services.embedding_backends import HashEmbeddings, OnnxEmbeddings, cosine_agreement, plan_batches
+
+
+def test_plan_batches_groups_similar_lengths_under_token_budget():
+    lengths = [5, 200, 6, 180, 7, 8]
+
+    batches = plan_batches(lengths, max_batch_tokens=400)
+
+    assert sorted(index for batch in batches for index in batch) == list(range(len(lengths)))
+    assert all(len(batch) * max(lengths[index] for index in batch) <= 400 for batch in batches)
+    assert batches[0] == [0, 2, 4, 5]
+
+
+class _StaticEmbeddings:
+    def __init__(self, vectors):
+        self._vectors = vectors
+
+    def embed_documents(self, texts):
+        return self._vectors[: len(texts)]
+
+
+def test_cosine_agreement_reports_mean_and_min():
+    reference = _StaticEmbeddings([[1.0, 0.0], [0.0, 1.0]])
+    candidate = _StaticEmbeddings([[2.0, 0.0], [1.0, 1.0]])
+
+    report = cosine_agreement(reference, candidate, ["a", "b"])
+
+    assert report.samples == 2
+    assert round(report.min_cosine, 4) == 0.7071
+    assert round(report.mean_cosine, 4) == 0.8536
+
+
+def test_hash_embeddings_are_deterministic_and_word_sensitive():
+    embeddings = HashEmbeddings(dim=64)
+
+    first, again, related, unrelated = embeddings.embed_documents(
+        ["Reset the API key", "reset the api KEY", "How to reset an API key?", "Quarterly revenue grew"]
+    )
+
+    def dot(left, right):
+        return sum(a * b for a, b in zip(left, right))
+
+    assert first == again
+    assert dot(first, related) > dot(first, unrelated)
+
+
+def test_workers_starting_together_export_the_onnx_model_once(tmp_path):
+    exports = []
+
+    def _export(model_name, path):
+        exports.append(path)
+        time.sleep(0.05)
+        path.write_text("model")
+
+    embeddings = OnnxEmbeddings.__new__(OnnxEmbeddings)
+    embeddings._export = _export
+    paths = []
+    threads = [
+        threading.Thread(target=lambda: paths.append(embeddings._ensure_model("org/model", tmp_path, quantize=False)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(exports) == 1
+    assert {path.read_text() for path in paths} == {"model"}
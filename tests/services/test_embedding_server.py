@@ -0,0 +1,85 @@
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from rag_lab.services.embedding_backends import HashEmbeddings
+from rag_lab.services.embedding_server import EmbeddingClient, EmbeddingServer, EmbeddingServerError, MicroBatcher
+
+
+class _CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        super().__init__(dim=16)
+        self.calls: list[int] = []
+        self.query_calls: list[int] = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts)
+
+    def embed_queries(self, texts):
+        self.query_calls.append(len(texts))
+        return super().embed_queries(texts)
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    embeddings = _CountingEmbeddings()
+
+    async def _scenario():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = MicroBatcher(embeddings, window_seconds=0.05, max_batch_texts=64, executor=executor)
+            results = await asyncio.gather(*(batcher.embed([f"text {i}", "shared"]) for i in range(5)))
+            await batcher.close()
+        return results
+
+    results = asyncio.run(_scenario())
+
+    assert embeddings.calls == [10]
+    assert results[3] == HashEmbeddings(dim=16).embed_documents(["text 3", "shared"])
+
+
+def _start_server(socket_path: Path, factory) -> tuple[asyncio.AbstractEventLoop, EmbeddingServer]:
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server = EmbeddingServer(socket_path, window_seconds=0.02, max_batch_texts=256, embeddings_factory=factory)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(timeout=5)
+    return loop, server
+
+
+def test_client_round_trip_batches_requests_from_many_threads():
+    loaded: dict[str, _CountingEmbeddings] = {}
+
+    def _factory(model_name):
+        loaded[model_name] = _CountingEmbeddings()
+        return loaded[model_name]
+
+    # AF_UNIX paths are limited to ~100 bytes, so avoid pytest's long tmp_path.
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = Path(tmp) / "embedding.sock"
+        loop, server = _start_server(socket_path, _factory)
+        try:
+            client = EmbeddingClient(socket_path, "model-a", timeout_seconds=5)
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                vectors = list(pool.map(lambda i: client.embed_query(f"question {i}"), range(8)))
+        finally:
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=5)
+            loop.call_soon_threadsafe(loop.stop)
+
+    expected = HashEmbeddings(dim=16).embed_queries([f"question {i}" for i in range(8)])
+    # Vectors travel as float32.
+    assert all(got == pytest.approx(want, abs=1e-6) for got, want in zip(vectors, expected, strict=True))
+    assert list(loaded) == ["model-a"]
+    assert loaded["model-a"].calls == []
+    assert sum(loaded["model-a"].query_calls) == 8
+    assert len(loaded["model-a"].query_calls) < 8
+    assert not socket_path.exists()
+
+
+def test_client_reports_unreachable_server():
+    client = EmbeddingClient(Path("/nonexistent/embedding.sock"), "model-a", timeout_seconds=1)
+
+    with pytest.raises(EmbeddingServerError):
+        client.embed_documents(["hello"])
@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from rag_lab.core.config import settings
+from rag_lab.services.file_storage_service import (
+    UPLOAD_CHUNK_SIZE,
+    DocumentMetadataStore,
+    FileStorageError,
+    save_upload,
+)
+
+
+def test_legacy_manifest_is_migrated_once(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "abc": {
+                    "doc_id": "abc",
+                    "file_hash": "abc",
+                    "original_filename": "old.md",
+                    "stored_path": str(tmp_path / "abc.md"),
+                    "content_type": "text/markdown",
+                    "size_bytes": 3,
+                    "uploaded_at": "2025-01-01T00:00:00+00:00",
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    store = DocumentMetadataStore(tmp_path / "documents.sqlite3")
+
+    other = DocumentMetadataStore(tmp_path / "documents.sqlite3")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        imported = list(pool.map(lambda candidate: candidate.migrate_manifest(manifest_path), [store, other]))
+
+    assert sorted(imported) == [0, 1]
+    assert store.migrate_manifest(manifest_path) == 0
+    assert store.get("abc")["original_filename"] == "old.md"
+    assert not manifest_path.exists()
+
+
+def test_legacy_manifest_skips_malformed_entries_and_keeps_unreadable_file(tmp_path):
+    store = DocumentMetadataStore(tmp_path / "documents.sqlite3")
+    broken_path = tmp_path / "broken.json"
+    broken_path.write_text("{not json", encoding="utf-8")
+    partial_path = tmp_path / "partial.json"
+    partial_path.write_text(json.dumps({"abc": {"doc_id": "abc"}, "bad": "entry"}), encoding="utf-8")
+
+    assert store.migrate_manifest(broken_path) == 0
+    assert broken_path.exists()
+    assert store.migrate_manifest(partial_path) == 0
+    assert store.get("abc") is None
+
+
+def test_oversized_upload_is_rejected_without_leftovers(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+    monkeypatch.setattr(settings, "max_upload_size_bytes", UPLOAD_CHUNK_SIZE + 1)
+
+    upload = UploadFile(file=BytesIO(b"x" * (UPLOAD_CHUNK_SIZE * 3)), filename="big.txt")
+    with pytest.raises(FileStorageError) as exc_info:
+        asyncio.run(save_upload(upload))
+
+    assert exc_info.value.status_code == 413
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+
+def test_streamed_upload_is_hashed_and_stored(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+
+    content = b"0123456789" * (UPLOAD_CHUNK_SIZE // 5)
+    stored = asyncio.run(save_upload(UploadFile(file=BytesIO(content), filename="notes.md")))
+
+    assert stored.size_bytes == len(content)
+    assert stored.stored_path.read_bytes() == content
+    assert stored.file_hash == hashlib.sha256(content).hexdigest()
@@ -0,0 +1,69 @@
+import asyncio
+from io import BytesIO
+
+from starlette.datastructures import Headers, UploadFile
+
+from rag_lab.core.config import settings
+from rag_lab.schemas.ingestion import IngestionFileResult
+from rag_lab.services.ingestion_service import IngestionError, ingest_uploads
+
+
+class _BatchingVectorStore:
+    def __init__(self, failing_file=None):
+        self.batches = []
+        self.failing_file = failing_file
+
+    async def upsert_documents(self, documents):
+        if any(document.file_name == self.failing_file for document in documents):
+            raise RuntimeError("store rejected the batch")
+        self.batches.append([document.file_name for document in documents])
+        return [len(document.chunks) for document in documents]
+
+    async def count_document_chunks(self, doc_id):
+        return 0
+
+
+def _upload(name: str, content: bytes) -> UploadFile:
+    return UploadFile(file=BytesIO(content), filename=name, headers=Headers({"content-type": "text/plain"}))
+
+
+def _setup(monkeypatch, tmp_path, store):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+    monkeypatch.setattr("rag_lab.services.ingestion_service.chunk_text", lambda text: text.split())
+    monkeypatch.setattr("rag_lab.services.ingestion_service.get_async_vector_store_service", lambda: store)
+
+
+def test_uploads_are_embedded_in_shared_batches_with_per_file_outcomes(monkeypatch, tmp_path):
+    store = _BatchingVectorStore()
+    _setup(monkeypatch, tmp_path, store)
+    monkeypatch.setattr(settings, "ingestion_batch_max_chunks", 1000)
+    files = [
+        _upload("a.txt", b"alpha beta"),
+        _upload("table.csv", b"x,y"),
+        _upload("b.md", b"gamma delta epsilon"),
+        _upload("c.txt", b"zeta"),
+    ]
+
+    outcomes = asyncio.run(ingest_uploads(files))
+
+    assert [sorted(batch) for batch in store.batches] == [["a.txt", "b.md", "c.txt"]]
+    assert [outcome.chunks_count for outcome in outcomes if isinstance(outcome, IngestionFileResult)] == [2, 3, 1]
+    assert isinstance(outcomes[1], IngestionError)
+    assert outcomes[1].status_code == 400
+
+
+def test_failed_batch_is_retried_per_file(monkeypatch, tmp_path):
+    store = _BatchingVectorStore(failing_file="bad.txt")
+    _setup(monkeypatch, tmp_path, store)
+    monkeypatch.setattr(settings, "ingestion_batch_max_chunks", 1000)
+
+    outcomes = asyncio.run(
+        ingest_uploads([_upload("good.txt", b"one two"), _upload("bad.txt", b"three"), _upload("ok.txt", b"four")])
+    )
+
+    assert isinstance(outcomes[0], IngestionFileResult) and outcomes[0].status == "processed"
+    assert isinstance(outcomes[1], RuntimeError)
+    assert isinstance(outcomes[2], IngestionFileResult)
+    assert sorted(name for batch in store.batches for name in batch) == ["good.txt", "ok.txt"]
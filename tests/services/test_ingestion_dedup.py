@@ -0,0 +1,50 @@
+import asyncio
+from io import BytesIO
+
+from starlette.datastructures import Headers, UploadFile
+
+from rag_lab.core.config import settings
+from rag_lab.services.ingestion_service import ingest_upload
+
+
+class _CountingVectorStore:
+    def __init__(self):
+        self.upserts = 0
+        self.counts = {}
+
+    async def upsert_document_chunks(self, *, doc_id, file_name, stored_path, chunks):
+        self.upserts += 1
+        self.counts[doc_id] = len(chunks)
+        return len(chunks)
+
+    async def count_document_chunks(self, doc_id):
+        return self.counts.get(doc_id, 0)
+
+
+def _upload(content: bytes) -> UploadFile:
+    return UploadFile(
+        file=BytesIO(content),
+        filename="manual.txt",
+        headers=Headers({"content-type": "text/plain"}),
+    )
+
+
+def test_duplicate_upload_skips_reindexing(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+    monkeypatch.setattr("rag_lab.services.ingestion_service.chunk_text", lambda text: text.split())
+    store = _CountingVectorStore()
+    monkeypatch.setattr("rag_lab.services.ingestion_service.get_async_vector_store_service", lambda: store)
+
+    first = asyncio.run(ingest_upload(_upload(b"alpha beta gamma")))
+    second = asyncio.run(ingest_upload(_upload(b"alpha beta gamma")))
+
+    assert store.upserts == 1
+    assert first.chunks_count == second.chunks_count == 3
+    assert second.detail == "Already indexed"
+
+    monkeypatch.setattr(settings, "chunk_size", settings.chunk_size + 1)
+    asyncio.run(ingest_upload(_upload(b"alpha beta gamma")))
+
+    assert store.upserts == 2
@@ -0,0 +1,65 @@
+import asyncio
+from pathlib import Path
+
+from rag_lab.schemas.ingestion import IngestionFileResult
+from rag_lab.services.file_storage_service import StoredFile
+from rag_lab.services.ingestion_job_service import IngestionJobManager, IngestionJobStore
+
+
+def _stored_file(tmp_path: Path) -> StoredFile:
+    return StoredFile(
+        doc_id="doc-1",
+        file_hash="doc-1",
+        original_filename="note.txt",
+        stored_path=tmp_path / "note.txt",
+        content_type="text/plain",
+        size_bytes=5,
+        uploaded_at="2026-01-01T00:00:00+00:00",
+        is_duplicate=False,
+    )
+
+
+def test_queued_jobs_survive_restart_and_complete(monkeypatch, tmp_path):
+    db_path = tmp_path / "jobs.sqlite3"
+    store = IngestionJobStore(db_path)
+    job = store.create(_stored_file(tmp_path))
+    store.start_stage(job.job_id, "extracting")
+    store.close()
+
+    async def _fake_index(stored_file, on_stage=None):
+        for stage in ("extracting", "chunking", "embedding"):
+            await on_stage(stage)
+        return IngestionFileResult(status="processed", original_filename=stored_file.original_filename, chunks_count=3)
+
+    monkeypatch.setattr("rag_lab.services.ingestion_job_service.index_stored_file", _fake_index)
+
+    restarted = IngestionJobStore(db_path)
+    manager = IngestionJobManager(restarted, workers=1)
+
+    async def _scenario():
+        manager.start()
+        await asyncio.wait_for(manager._queue.join(), timeout=2)
+        await manager.stop()
+
+    asyncio.run(_scenario())
+
+    finished = restarted.get(job.job_id)
+    assert finished.status == "completed"
+    assert finished.chunks_count == 3
+    assert all(stage["status"] == "completed" for stage in finished.stages.values())
+
+
+def test_only_one_worker_claims_a_job_and_live_leases_are_not_recovered(tmp_path):
+    db_path = tmp_path / "jobs.sqlite3"
+    first = IngestionJobStore(db_path)
+    second = IngestionJobStore(db_path)
+    job = first.create(_stored_file(tmp_path))
+
+    assert first.claim(job.job_id, "worker-a", lease_seconds=60) is not None
+    assert second.claim(job.job_id, "worker-b", lease_seconds=60) is None
+    assert second.recover_pending() == []
+    assert second.get(job.job_id).status == "running"
+
+    first.renew_leases("worker-a", lease_seconds=-1)
+    assert second.requeue_orphaned() == [job.job_id]
+    assert second.claim(job.job_id, "worker-b", lease_seconds=60) is not None
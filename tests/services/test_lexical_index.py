@@ -0,0 +1,42 @@
+import time
+
+from rag_lab.services.lexical_index_service import LexicalDocument, LexicalIndex, reciprocal_rank_fusion
+
+
+def test_exact_identifiers_are_found_and_deleted(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical.sqlite3")
+    index.replace_documents(
+        [
+            LexicalDocument(
+                doc_id="doc-1",
+                file_name="errors.md",
+                chunk_ids=["doc-1:0", "doc-1:1"],
+                chunks=["Error ERR-4012 means the upstream timed out.", "Set config.max_retries to 5."],
+            ),
+            LexicalDocument(
+                doc_id="doc-2",
+                file_name="other.md",
+                chunk_ids=["doc-2:0"],
+                chunks=["Error ERR-5000 is unrelated to retries."],
+            ),
+        ]
+    )
+
+    started = time.perf_counter()
+    hits = index.search("what does ERR-4012 mean", limit=5)
+    elapsed = time.perf_counter() - started
+
+    assert hits[0].chunk_id == "doc-1:0"
+    assert elapsed < 0.05
+    assert [hit.chunk_id for hit in index.search("config.max_retries", limit=5)] == ["doc-1:1"]
+
+    index.delete_documents(["doc-1"])
+    assert index.search("ERR-4012", limit=5) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+
+    assert fused[0][0] == "b"
+    assert {item_id for item_id, _ in fused} == {"a", "b", "c", "d"}
+    assert all(0 < score <= 1 for _, score in fused)
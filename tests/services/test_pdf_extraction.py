@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from rag_lab.core.config import settings
+from rag_lab.services.pdf_extraction_service import extract_pdf_pages, shutdown_pdf_extraction_pool
+
+
+def _write_pdf(path, page_texts):
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{4 + index * 2} 0 R" for index in range(len(page_texts)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_texts)} >>")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for index, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + index * 2} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref_offset = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode(
+        "latin-1"
+    )
+    path.write_bytes(body)
+
+
+def test_pdf_pages_are_extracted_in_parallel_ranges_with_page_numbers(monkeypatch, tmp_path):
+    pytest.importorskip("pypdf")
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 2)
+    monkeypatch.setattr(settings, "pdf_extraction_workers", 2)
+    path = tmp_path / "manual.pdf"
+    _write_pdf(path, ["Alpha", "Bravo", "Charlie", "Delta", "Echo"])
+
+    try:
+        pages = asyncio.run(extract_pdf_pages(path))
+    finally:
+        shutdown_pdf_extraction_pool()
+
+    assert [page.page_number for page in pages] == [1, 2, 3, 4, 5]
+    assert [page.text.strip() for page in pages] == ["Alpha", "Bravo", "Charlie", "Delta", "Echo"]
@@ -1,14 +1,14 @@
 import asyncio
 
 from rag_lab.services.rag_service import NO_CONTEXT_ANSWER, answer_with_rag
-from rag_lab.services.vector_store_service import RetrievedChunk
+from rag_lab.services.vector_store_service import AsyncVectorStoreService, RetrievedChunk
 
 
 class _FakeVectorStore:
     def __init__(self, chunks):
         self._chunks = chunks
 
-    def search(self, *, query: str, top_k: int, score_threshold: float):
+    def search(self, *, query: str, top_k: int, score_threshold: float, filters=None):
         return self._chunks
 
 
@@ -28,8 +28,8 @@ def test_answer_with_rag_retrieval_path(monkeypatch):
         )
     ]
     monkeypatch.setattr(
-        "rag_lab.services.rag_service.get_vector_store_service",
-        lambda: _FakeVectorStore(chunks),
+        "rag_lab.services.rag_service.get_async_vector_store_service",
+        lambda: AsyncVectorStoreService(lambda: _FakeVectorStore(chunks)),
     )
     monkeypatch.setattr(
         "rag_lab.services.rag_service.generate_answer",
@@ -45,8 +45,8 @@ def test_answer_with_rag_retrieval_path(monkeypatch):
 
 def test_answer_with_rag_no_context(monkeypatch):
     monkeypatch.setattr(
-        "rag_lab.services.rag_service.get_vector_store_service",
-        lambda: _FakeVectorStore([]),
+        "rag_lab.services.rag_service.get_async_vector_store_service",
+        lambda: AsyncVectorStoreService(lambda: _FakeVectorStore([])),
     )
 
     result = asyncio.run(answer_with_rag("Unknown question"))
@@ -0,0 +1,148 @@
+import threading
+
+from rag_lab.core.config import index_fingerprint, settings
+from rag_lab.services import vector_store_service
+from rag_lab.services.file_storage_service import delete_stored_files, get_index_state, get_metadata_store
+from rag_lab.services.index_stamp import STAMP_FILE_NAME, current_stamp, ensure_stamp, target_stamp, write_stamp
+from rag_lab.services.reindex_service import Reindexer
+from rag_lab.services.vector_backends import NumpyBackend
+from rag_lab.services.vector_store_service import VectorStoreService
+
+
+class _FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_queries(self, texts):
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _add_document(name, text):
+    store = get_metadata_store()
+    path = settings.uploads_dir / name
+    path.write_text(text, encoding="utf-8")
+    store.insert(
+        {
+            "doc_id": name,
+            "file_hash": name,
+            "original_filename": name,
+            "stored_path": str(path),
+            "content_type": "text/plain",
+            "size_bytes": len(text),
+            "uploaded_at": "2026-01-01T00:00:00+00:00",
+        }
+    )
+
+
+def _service(tmp_path, stamp):
+    return VectorStoreService(
+        backend=NumpyBackend(tmp_path / "numpy" / stamp.collection),
+        embeddings=_FakeEmbeddings(),
+        stamp=stamp,
+    )
+
+
+def test_reindex_resumes_from_checkpoint_and_swaps(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+    monkeypatch.setattr("rag_lab.services.reindex_service.chunk_text", lambda text: text.split())
+    old_stamp = ensure_stamp()
+    _add_document("a.txt", "alpha beta")
+    _add_document("b.txt", "gamma delta epsilon")
+
+    monkeypatch.setattr(settings, "chunk_size", settings.chunk_size + 100)
+    first = Reindexer(cpu_fraction=1.0, service_factory=lambda stamp: _service(tmp_path, stamp))
+    first._on_progress = lambda position, total, name: first.stop()
+    interrupted = first.run()
+
+    assert not interrupted.swapped
+    assert current_stamp() == old_stamp
+
+    resumed = Reindexer(cpu_fraction=1.0, service_factory=lambda stamp: _service(tmp_path, stamp)).run()
+
+    assert resumed.swapped
+    assert (resumed.indexed, resumed.resumed) == (1, 1)
+    assert current_stamp().collection == resumed.collection != old_stamp.collection
+    assert get_index_state("b.txt").fingerprint == index_fingerprint()
+    assert get_index_state("b.txt").chunks_count == 3
+
+
+def test_documents_deleted_during_a_reindex_do_not_come_back(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(settings, "uploads_dir", tmp_path / "uploads")
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path / "vector_store")
+    monkeypatch.setattr("rag_lab.services.reindex_service.chunk_text", lambda text: text.split())
+    ensure_stamp()
+    _add_document("a.txt", "alpha beta")
+    _add_document("b.txt", "gamma delta epsilon")
+
+    monkeypatch.setattr(settings, "chunk_size", settings.chunk_size + 100)
+    first = Reindexer(cpu_fraction=1.0, service_factory=lambda stamp: _service(tmp_path, stamp))
+    first._on_progress = lambda position, total, name: first.stop()
+    first.run()
+    shadow = _service(tmp_path, target_stamp())
+    (deleted,) = [name for name in ("a.txt", "b.txt") if shadow.count_document_chunks(name) > 0]
+    delete_stored_files([deleted])
+
+    resumed = Reindexer(cpu_fraction=1.0, service_factory=lambda stamp: _service(tmp_path, stamp)).run()
+
+    assert resumed.swapped
+    assert shadow.count_document_chunks(deleted) == 0
+    assert get_index_state(deleted) is None
+
+
+class _RecordingService:
+    warmed_up = threading.Event()
+
+    def __init__(self, *, stamp):
+        self.stamp = stamp
+        self.closed = threading.Event()
+
+    def warm_up(self):
+        self.warmed_up.wait(timeout=5)
+
+    def close(self):
+        self.closed.set()
+
+
+def test_service_switches_to_new_stamp_in_the_background(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "vector_store_dir", tmp_path)
+    monkeypatch.setattr(vector_store_service, "VectorStoreService", _RecordingService)
+    monkeypatch.setattr(vector_store_service, "RETIRED_SERVICE_GRACE_SECONDS", 0.0)
+    monkeypatch.setattr(vector_store_service, "_vector_store_service", None)
+
+    assert not (tmp_path / STAMP_FILE_NAME).exists()
+    old = vector_store_service.get_vector_store_service()
+    assert old.stamp == current_stamp()
+    assert (tmp_path / STAMP_FILE_NAME).exists()
+
+    new_stamp = target_stamp("shadow")
+    write_stamp(new_stamp)
+    assert vector_store_service.get_vector_store_service() is old
+    writers = []
+    writer = threading.Thread(target=lambda: writers.append(vector_store_service.get_vector_store_writer()))
+    writer.start()
+    writer.join(timeout=0.2)
+    assert writer.is_alive()
+
+    _RecordingService.warmed_up.set()
+    writer.join(timeout=5)
+    assert writers[0].stamp == new_stamp
+    assert old.closed.wait(timeout=5)
+    assert vector_store_service.get_vector_store_service().stamp == new_stamp
+
+
+def test_fingerprint_covers_the_embedding_backend(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_backend", "huggingface")
+    huggingface = index_fingerprint()
+    monkeypatch.setattr(settings, "onnx_quantize", not settings.onnx_quantize)
+    assert index_fingerprint() == huggingface
+
+    monkeypatch.setattr(settings, "embedding_backend", "onnx")
+    onnx = index_fingerprint()
+    monkeypatch.setattr(settings, "onnx_quantize", not settings.onnx_quantize)
+    assert len({huggingface, onnx, index_fingerprint()}) == 3
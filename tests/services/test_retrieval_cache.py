@@ -0,0 +1,74 @@
+from rag_lab.core.cache import LRUCache
+from rag_lab.services.vector_backends import VectorHit, VectorRecord
+
+
+def test_lru_cache_respects_byte_cap():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.put("c", "12345")
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "12345"
+    stats = cache.stats()
+    assert (stats.entries, stats.size_bytes, stats.evictions) == (2, 10, 1)
+
+
+class _FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_queries(self, texts):
+        return self.embed_documents(texts)
+
+
+class _FakeBackend:
+    def __init__(self):
+        self.searches = 0
+
+    def query(self, embeddings, k):
+        self.searches += 1
+        record = VectorRecord(
+            id="doc-1:0",
+            text="text",
+            metadata={"doc_id": "doc-1", "file_name": "a.md", "chunk_id": "doc-1:0"},
+        )
+        return [[VectorHit(record=record, score=0.9)] for _ in embeddings]
+
+    def delete(self, ids):
+        pass
+
+    def delete_document(self, doc_id):
+        pass
+
+
+def test_search_results_are_cached_until_index_changes(vector_store_factory):
+    service = vector_store_factory(backend=_FakeBackend(), embeddings=_FakeEmbeddings())
+
+    first = service.search(query="How  to install?", top_k=4, score_threshold=0.2)
+    second = service.search(query="How to install?", top_k=4, score_threshold=0.2)
+    service.delete_document("doc-1")
+    third = service.search(query="How to install?", top_k=4, score_threshold=0.2)
+
+    assert first == second == third
+    assert service._backend.searches == 2
+    assert service._embeddings.calls == 1
+
+
+def test_search_batch_encodes_all_queries_in_one_pass(vector_store_factory):
+    service = vector_store_factory(backend=_FakeBackend(), embeddings=_FakeEmbeddings())
+    queries = [f"batch question {index}" for index in range(20)]
+
+    results = service.search_batch(queries=queries, top_k=3, score_threshold=0.2)
+
+    assert len(results) == 20
+    assert all(chunks[0].chunk_id == "doc-1:0" for chunks in results)
+    assert (service._embeddings.calls, service._embeddings.texts) == (1, 20)
+    assert service._backend.searches == 1
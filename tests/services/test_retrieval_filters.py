@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+
+from rag_lab.core.config import settings
+from rag_lab.services.file_storage_service import get_metadata_store
+from rag_lab.services.retrieval_cache import get_filter_scope_cache
+from rag_lab.services.retrieval_filter import RetrievalFilter
+from rag_lab.services.vector_backends import NumpyBackend, VectorRecord
+from rag_lab.services.vector_store_service import VectorStoreService
+
+pytest.importorskip("numpy")
+
+BOILERPLATE = "Confidential. Do not distribute outside the company."
+
+
+def _service(vector_store_factory, tmp_path) -> VectorStoreService:
+    service = vector_store_factory()
+
+    store = get_metadata_store()
+    for doc_id, file_name, uploaded_at, text in [
+        ("a", "policy-a.md", "2026-01-05T10:00:00+00:00", "Leave is 20 days."),
+        ("b", "report-b.md", "2026-06-05T10:00:00+00:00", "Revenue grew in spring."),
+    ]:
+        store.insert(
+            {
+                "doc_id": doc_id,
+                "file_hash": doc_id,
+                "original_filename": file_name,
+                "stored_path": str(tmp_path / doc_id),
+                "content_type": "text/markdown",
+                "size_bytes": 1,
+                "uploaded_at": uploaded_at,
+            }
+        )
+        service.upsert_document_chunks(
+            doc_id=doc_id, file_name=file_name, stored_path=tmp_path / doc_id, chunks=[BOILERPLATE, text]
+        )
+    return service
+
+
+@pytest.mark.parametrize("mode", ["vector", "hybrid"])
+def test_filters_restrict_search_to_matching_documents(monkeypatch, vector_store_factory, tmp_path, mode):
+    monkeypatch.setattr(settings, "retrieval_mode", mode)
+    service = _service(vector_store_factory, tmp_path)
+
+    unfiltered = service.search(query=BOILERPLATE, top_k=4, score_threshold=-1.0)
+    assert unfiltered[0].chunk_id == "a:0"
+
+    for scope in [
+        RetrievalFilter.create(doc_ids=["b"]),
+        RetrievalFilter.create(file_name_pattern="report-*"),
+        RetrievalFilter.create(uploaded_after=datetime(2026, 3, 1)),
+    ]:
+        hits = service.search(query=BOILERPLATE, top_k=4, score_threshold=-1.0, filters=scope)
+        # Shared content is attributed to the document inside the scope.
+        assert hits[0].chunk_id == "b:0"
+        assert {hit.doc_id for hit in hits} == {"b"}
+
+    nothing = RetrievalFilter.create(doc_ids=[])
+    assert service.search(query=BOILERPLATE, top_k=4, score_threshold=-1.0, filters=nothing) == []
+
+
+def test_filter_scope_is_cached_until_the_index_changes(vector_store_factory, tmp_path):
+    service = _service(vector_store_factory, tmp_path)
+    scope = RetrievalFilter.create(doc_ids=["a"])
+    cache = get_filter_scope_cache()
+
+    service.search(query="leave", top_k=2, score_threshold=-1.0, filters=scope)
+    hits_before = cache.stats().hits
+    service.search(query="days off", top_k=2, score_threshold=-1.0, filters=scope)
+    assert cache.stats().hits == hits_before + 1
+
+    service.delete_document("a")
+    assert service.search(query="leave", top_k=2, score_threshold=-1.0, filters=scope) == []
+
+
+def test_numpy_backend_scores_only_candidate_rows(tmp_path):
+    backend = NumpyBackend(tmp_path)
+    backend.add(
+        [VectorRecord(id=value, text=value, metadata={"content_hash": value}) for value in ["x", "y"]],
+        [[1.0, 0.0], [0.0, 1.0]],
+    )
+    candidates = backend.candidates({"y"}, set())
+
+    [hits] = backend.query([[1.0, 0.0]], k=2, candidates=candidates)
+    assert [hit.record.id for hit in hits] == ["y"]
+
+    backend.delete(["y"])
+    assert backend.query([[1.0, 0.0]], k=2, candidates=candidates) == [[]]
@@ -0,0 +1,119 @@
+import pytest
+
+from rag_lab.services.vector_backends import NumpyBackend, VectorRecord, migrate_vectors
+
+np = pytest.importorskip("numpy")
+
+
+def _records(doc_id, count):
+    return [
+        VectorRecord(id=f"{doc_id}:{index}", text=f"chunk {index}", metadata={"doc_id": doc_id, "chunk_index": index})
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_numpy_backend_exact_top_k_survives_reopen(tmp_path, dtype):
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(50, 16)).astype(np.float32)
+    backend = NumpyBackend(tmp_path, dtype=dtype)
+    backend.add(_records("doc-a", 25), vectors[:25])
+    backend.add(_records("doc-b", 25), vectors[25:])
+    backend.delete_document("doc-a")
+    backend.close()
+
+    reopened = NumpyBackend(tmp_path)
+    [hits] = reopened.query([vectors[30]], k=3)
+
+    assert reopened.count() == 25
+    assert reopened.count_document("doc-a") == 0
+    assert hits[0].record.id == "doc-b:5"
+    assert hits[0].score == pytest.approx(1.0, abs=0.02)
+    assert all(hit.record.metadata["doc_id"] == "doc-b" for hit in hits)
+
+
+def test_migrate_vectors_copies_live_records(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    source = NumpyBackend(tmp_path / "source")
+    source.add(_records("doc-a", 4), vectors)
+    target = NumpyBackend(tmp_path / "target", dtype="float16")
+
+    assert migrate_vectors(source, target, batch_size=3) == 4
+    [hits] = target.query([vectors[2]], k=1)
+    assert hits[0].record.id == "doc-a:2"
+
+
+def test_numpy_backend_compaction_drops_tombstones_and_keeps_results(tmp_path):
+    rng = np.random.default_rng(11)
+    vectors = rng.normal(size=(40, 16)).astype(np.float32)
+    backend = NumpyBackend(tmp_path)
+    backend.add(_records("doc-a", 20), vectors[:20])
+    backend.add(_records("doc-b", 20), vectors[20:])
+    backend.delete_document("doc-a")
+    [expected] = backend.query([vectors[33]], k=3)
+
+    reclaimed = backend.compact()
+    [hits] = backend.query([vectors[33]], k=3)
+
+    assert reclaimed >= 20 * 16 * 4
+    assert [hit.record.id for hit in hits] == [hit.record.id for hit in expected]
+    backend.close()
+    reopened = NumpyBackend(tmp_path)
+    assert reopened.count() == 20
+    assert reopened.query([vectors[33]], k=1)[0][0].record.id == "doc-b:13"
+
+
+def test_numpy_backends_sharing_a_directory_see_each_others_writes(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    first = NumpyBackend(tmp_path)
+    second = NumpyBackend(tmp_path)
+
+    first.add(_records("doc-a", 2), vectors[:2])
+    second.add(_records("doc-b", 2), vectors[2:])
+    assert first.query([vectors[3]], k=1)[0][0].record.id == "doc-b:1"
+
+    second.delete_document("doc-a")
+    assert first.count() == 2
+    assert {hit.record.id for hit in first.query([vectors[0]], k=4)[0]} == {"doc-b:0", "doc-b:1"}
+
+
+def test_numpy_backend_ann_skips_rows_deleted_after_the_graph_was_saved(tmp_path):
+    pytest.importorskip("hnswlib")
+    vectors = np.eye(4, dtype=np.float32)
+    writer = NumpyBackend(tmp_path, ann_threshold=1)
+    writer.add(_records("doc-a", 4), vectors)
+    writer.query([vectors[0]], k=1)
+    NumpyBackend(tmp_path).delete(["doc-a:0"])
+
+    [hits] = NumpyBackend(tmp_path, ann_threshold=1).query([vectors[0]], k=4)
+    assert "doc-a:0" not in {hit.record.id for hit in hits}
+
+
+def test_numpy_backend_picks_up_compaction_by_another_process(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    reader = NumpyBackend(tmp_path)
+    reader.add(_records("doc-a", 2) + _records("doc-b", 2), vectors)
+    reader.delete_document("doc-a")
+    candidates = reader.candidates({"doc-b:1"}, set())
+
+    NumpyBackend(tmp_path).compact()
+
+    assert reader.query([vectors[3]], k=1)[0][0].record.id == "doc-b:1"
+    assert [hit.record.id for hit in reader.query([vectors[3]], k=2, candidates=candidates)[0]] == ["doc-b:1"]
+    reader.add(_records("doc-c", 1), vectors[:1])
+    assert reader.query([vectors[0]], k=1)[0][0].record.id == "doc-c:0"
+
+
+def test_numpy_backend_ann_extends_a_saved_graph_with_rows_added_since(tmp_path):
+    hnswlib = pytest.importorskip("hnswlib")
+    vectors = np.eye(6, dtype=np.float32)
+    writer = NumpyBackend(tmp_path, ann_threshold=1)
+    writer.add(_records("doc-a", 4), vectors[:4])
+    writer.query([vectors[0]], k=1)
+    NumpyBackend(tmp_path).add(_records("doc-b", 2), vectors[4:])
+
+    [hits] = NumpyBackend(tmp_path, ann_threshold=1).query([vectors[5]], k=1)
+    assert hits[0].record.id == "doc-b:1"
+    saved = hnswlib.Index(space="ip", dim=6)
+    saved.load_index(str(tmp_path / "hnsw.bin"))
+    assert saved.get_current_count() == 6